@@ -13,10 +13,35 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+import os
+import tempfile
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
+import aiofiles
 import aiomysql
 
+# query_by_keys 每条 IN 查询最多携带的参数个数
+QUERY_BY_KEYS_CHUNK_SIZE = 500
+
+# iter_query 每批返回的行数
+ITER_QUERY_BATCH_SIZE = 1000
+
+# LOAD DATA 默认文件格式（制表符分隔、反斜杠转义）需要转义的字符
+_LOAD_DATA_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def to_load_data_value(value: Any) -> str:
+    """
+    把一个字段值转换成 LOAD DATA 默认格式中的文本，None 写成 \\N
+    :param value: 字段值
+    :return:
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value).translate(_LOAD_DATA_ESCAPES)
+
 
 class AsyncMysqlDB:
     def __init__(self, pool: aiomysql.Pool) -> None:
@@ -35,6 +60,25 @@ class AsyncMysqlDB:
                 data = await cur.fetchall()
                 return data or []
 
+    async def iter_query(self, sql: str, *args: Union[str, int],
+                         batch_size: int = ITER_QUERY_BATCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        流式查询记录，使用服务端游标 (SSDictCursor) 每次只从连接里读取 batch_size 行，内存占用和结果集大小无关，
+        适合导出千万级的评论表。迭代期间会一直占用一个连接，结果没读完之前这个连接不能执行其他语句
+        :param sql: 查询的sql
+        :param args: sql中传递动态参数列表
+        :param batch_size: 每批返回的行数
+        :return: 按批返回记录的异步迭代器
+        """
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cur:
+                await cur.execute(sql, args)
+                while True:
+                    rows = await cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield list(rows)
+
     async def get_first(self, sql: str, *args: Union[str, int]) -> Union[Dict[str, Any], None]:
         """
         从给定的 SQL 中查询记录，返回的是符合条件的第一个结果
@@ -48,6 +92,32 @@ class AsyncMysqlDB:
                 data = await cur.fetchone()
                 return data
 
+    async def query_by_keys(self, table_name: str, key_field: str, keys: Sequence[Union[str, int]],
+                            fields: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """
+        按条件字段的值列表批量查询记录 (SELECT ... WHERE key IN (...))，参数化查询，每 QUERY_BY_KEYS_CHUNK_SIZE 个值一条语句
+        :param table_name: 表名
+        :param key_field: 条件字段名
+        :param keys: 条件字段的值列表，统一转换成字符串，和 varchar 类型的ID字段比较时才能走索引
+        :param fields: 需要查询的字段，为空时查询所有字段
+        :return:
+        """
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        if not keys:
+            return []
+        fieldstr = ','.join([f'`{field}`' for field in fields]) if fields else '*'
+        rows: List[Dict[str, Any]] = []
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                for start in range(0, len(keys), QUERY_BY_KEYS_CHUNK_SIZE):
+                    chunk = keys[start:start + QUERY_BY_KEYS_CHUNK_SIZE]
+                    sql = "SELECT %s FROM %s WHERE `%s` IN (%s)" % (
+                        fieldstr, table_name, key_field, ','.join(['%s'] * len(chunk))
+                    )
+                    await cur.execute(sql, chunk)
+                    rows.extend(await cur.fetchall() or [])
+        return rows
+
     async def item_to_table(self, table_name: str, item: Dict[str, Any]) -> int:
         """
         表中插入数据
@@ -105,3 +175,120 @@ class AsyncMysqlDB:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, args)
                 return rows
+
+    async def batch_insert(self, table_name: str, items: List[Dict[str, Any]]) -> int:
+        """
+        批量追加记录 (INSERT INTO ... VALUES ...)，用于只追加不更新的表，executemany 会被改写成一条多值 INSERT 语句
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，字段集合不同的记录会被分组后分别写入
+        :return: 写入的行数
+        """
+        if not items:
+            return 0
+
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(list(item.values()))
+
+        affected_rows = 0
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                for fields, values in groups.items():
+                    fieldstr = ','.join([f'`{field}`' for field in fields])
+                    valstr = ','.join(['%s'] * len(fields))
+                    sql = "INSERT INTO %s (%s) VALUES (%s)" % (table_name, fieldstr, valstr)
+                    affected_rows += await cur.executemany(sql, values)
+        return affected_rows
+
+    async def batch_insert_or_update(self, table_name: str, items: List[Dict[str, Any]],
+                                     insert_only_fields: Sequence[str] = ("add_ts",),
+                                     update_fields: Optional[Sequence[str]] = None) -> int:
+        """
+        批量写入记录，唯一键冲突时更新已有记录 (INSERT ... ON DUPLICATE KEY UPDATE)
+        依赖表中自然主键(帖子ID、评论ID、用户ID)上的唯一索引，executemany 会被改写成一条多值 INSERT 语句
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，字段集合不同的记录会被分组后分别写入
+        :param insert_only_fields: 只在新增时写入、冲突时不更新的字段，默认保留首次入库的 add_ts
+        :param update_fields: 冲突时只更新这些字段，None 表示更新除 insert_only_fields 之外的所有字段
+        :return: 受影响的行数（新增计1，更新计2，数据未变化计0）
+        """
+        if not items:
+            return 0
+
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(list(item.values()))
+
+        affected_rows = 0
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                for fields, values in groups.items():
+                    fieldstr = ','.join([f'`{field}`' for field in fields])
+                    valstr = ','.join(['%s'] * len(fields))
+                    updates = [f'`{field}`=VALUES(`{field}`)' for field in fields
+                               if field not in insert_only_fields and (update_fields is None or field in update_fields)]
+                    if not updates:
+                        updates = [f'`{fields[0]}`=`{fields[0]}`']
+                    sql = "INSERT INTO %s (%s) VALUES (%s) ON DUPLICATE KEY UPDATE %s" % (
+                        table_name, fieldstr, valstr, ','.join(updates)
+                    )
+                    affected_rows += await cur.executemany(sql, values)
+        return affected_rows
+
+    async def bulk_load_or_update(self, table_name: str, items: List[Dict[str, Any]],
+                                  insert_only_fields: Sequence[str] = ("add_ts",),
+                                  staging_dir: Optional[str] = None,
+                                  update_fields: Optional[Sequence[str]] = None) -> int:
+        """
+        大批量写入记录：先把数据写到本地暂存文件，用 LOAD DATA LOCAL INFILE 导入临时暂存表，
+        再用一条 INSERT ... SELECT ... ON DUPLICATE KEY UPDATE 合并进正式表，适合百万级评论的回填导入
+        需要连接池开启 local_infile，且 MySQL 服务端开启 local_infile
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，字段集合不同的记录会被分组后分别写入
+        :param insert_only_fields: 只在新增时写入、冲突时不更新的字段，默认保留首次入库的 add_ts
+        :param staging_dir: 暂存文件目录，默认使用系统临时目录
+        :param update_fields: 冲突时只更新这些字段，None 表示更新除 insert_only_fields 之外的所有字段
+        :return: 受影响的行数（新增计1，更新计2，数据未变化计0）
+        """
+        if not items:
+            return 0
+
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(list(item.values()))
+
+        staging_table = f"{table_name}_staging"
+        affected_rows = 0
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                for fields, values in groups.items():
+                    fd, staging_path = tempfile.mkstemp(prefix=f"{table_name}_", suffix=".tsv", dir=staging_dir)
+                    os.close(fd)
+                    try:
+                        # 暂存表复制了正式表的唯一索引，LOAD DATA LOCAL 遇到重复ID保留先导入的一条，
+                        # 倒序写入使同一批里重复的ID保留最后一条，和 batch_insert_or_update 一致
+                        async with aiofiles.open(staging_path, "w", encoding="utf-8", newline="") as f:
+                            await f.write("".join(
+                                "\t".join(to_load_data_value(value) for value in row) + "\n" for row in reversed(values)
+                            ))
+                        fieldstr = ','.join([f'`{field}`' for field in fields])
+                        updates = [f'`{field}`=VALUES(`{field}`)' for field in fields
+                               if field not in insert_only_fields and (update_fields is None or field in update_fields)]
+                        if not updates:
+                            updates = [f'`{fields[0]}`=`{fields[0]}`']
+                        # 临时表只对当前连接可见，不同连接同时导入不会互相影响
+                        await cur.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging_table} LIKE {table_name}")
+                        await cur.execute(f"TRUNCATE TABLE {staging_table}")
+                        await cur.execute(
+                            f"LOAD DATA LOCAL INFILE %s INTO TABLE {staging_table} CHARACTER SET utf8mb4 ({fieldstr})",
+                            (staging_path,)
+                        )
+                        affected_rows += await cur.execute(
+                            "INSERT INTO %s (%s) SELECT %s FROM %s ON DUPLICATE KEY UPDATE %s" % (
+                                table_name, fieldstr, fieldstr, staging_table, ','.join(updates)
+                            )
+                        )
+                    finally:
+                        os.remove(staging_path)
+                await cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging_table}")
+        return affected_rows
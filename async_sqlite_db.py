@@ -0,0 +1,289 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/24 11:05
+# @Desc    : 异步SQLite的增删改查封装，接口和 AsyncMysqlDB 保持一致
+import asyncio
+import functools
+import pathlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+
+# query_by_keys 每条 IN 查询最多携带的参数个数，低于 sqlite 默认的 999 个参数上限
+QUERY_BY_KEYS_CHUNK_SIZE = 500
+
+# iter_query 每批返回的行数
+ITER_QUERY_BATCH_SIZE = 1000
+
+
+class AsyncSqliteDB:
+    def __init__(self, db_path: str) -> None:
+        self.__db_path = db_path
+        self.__conn: Optional[sqlite3.Connection] = None
+        # sqlite 连接只在一个线程里使用，所有读写都串行提交到这个线程，不阻塞事件循环
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.__unique_fields: Dict[str, List[str]] = {}
+
+    async def __run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, functools.partial(func, *args))
+
+    def __connection(self) -> sqlite3.Connection:
+        if self.__conn is None:
+            pathlib.Path(self.__db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.__db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self.__conn = conn
+        return self.__conn
+
+    def __execute(self, sql: str, args: Sequence[Any]) -> sqlite3.Cursor:
+        return self.__connection().execute(sql, args)
+
+    async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
+        """
+        从给定的 SQL 中查询记录，返回的是一个列表
+        :param sql: 查询的sql
+        :param args: sql中传递动态参数列表
+        :return:
+        """
+        def _query():
+            return [dict(row) for row in self.__execute(sql, args).fetchall()]
+
+        return await self.__run(_query)
+
+    async def iter_query(self, sql: str, *args: Union[str, int],
+                         batch_size: int = ITER_QUERY_BATCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        流式查询记录，sqlite 游标本身按需读取，每次在数据库线程里 fetchmany 一批，内存占用和结果集大小无关
+        :param sql: 查询的sql
+        :param args: sql中传递动态参数列表
+        :param batch_size: 每批返回的行数
+        :return: 按批返回记录的异步迭代器
+        """
+        cursor: sqlite3.Cursor = await self.__run(self.__execute, sql, args)
+        try:
+            while True:
+                rows = await self.__run(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            await self.__run(cursor.close)
+
+    async def get_first(self, sql: str, *args: Union[str, int]) -> Union[Dict[str, Any], None]:
+        """
+        从给定的 SQL 中查询记录，返回的是符合条件的第一个结果
+        :param sql: 查询的sql
+        :param args:sql中传递动态参数列表
+        :return:
+        """
+        def _get_first():
+            row = self.__execute(sql, args).fetchone()
+            return dict(row) if row is not None else None
+
+        return await self.__run(_get_first)
+
+    async def query_by_keys(self, table_name: str, key_field: str, keys: Sequence[Union[str, int]],
+                            fields: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """
+        按条件字段的值列表批量查询记录 (SELECT ... WHERE key IN (...))，参数化查询，每 QUERY_BY_KEYS_CHUNK_SIZE 个值一条语句
+        :param table_name: 表名
+        :param key_field: 条件字段名
+        :param keys: 条件字段的值列表，统一转换成字符串
+        :param fields: 需要查询的字段，为空时查询所有字段
+        :return:
+        """
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        if not keys:
+            return []
+        fieldstr = ','.join([f'`{field}`' for field in fields]) if fields else '*'
+
+        def _query_by_keys():
+            rows: List[Dict[str, Any]] = []
+            for start in range(0, len(keys), QUERY_BY_KEYS_CHUNK_SIZE):
+                chunk = keys[start:start + QUERY_BY_KEYS_CHUNK_SIZE]
+                sql = "SELECT %s FROM %s WHERE `%s` IN (%s)" % (
+                    fieldstr, table_name, key_field, ','.join(['?'] * len(chunk))
+                )
+                rows.extend(dict(row) for row in self.__execute(sql, chunk).fetchall())
+            return rows
+
+        return await self.__run(_query_by_keys)
+
+    async def item_to_table(self, table_name: str, item: Dict[str, Any]) -> int:
+        """
+        表中插入数据
+        :param table_name: 表名
+        :param item: 一条记录的字典信息
+        :return:
+        """
+        fieldstr = ','.join([f'`{field}`' for field in item.keys()])
+        valstr = ','.join(['?'] * len(item))
+        sql = "INSERT INTO %s (%s) VALUES(%s)" % (table_name, fieldstr, valstr)
+        return await self.__run(lambda: self.__execute(sql, list(item.values())).lastrowid)
+
+    async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
+                           value_where: Union[str, int, float]) -> int:
+        """
+        更新指定表的记录
+        :param table_name: 表名
+        :param updates: 需要更新的字段和值的 key - value 映射
+        :param field_where: update 语句 where 条件中的字段名
+        :param value_where: update 语句 where 条件中的字段值
+        :return:
+        """
+        upsets = ','.join([f'`{field}`=?' for field in updates.keys()])
+        sql = 'UPDATE %s SET %s WHERE `%s`=?' % (table_name, upsets, field_where)
+        values = list(updates.values()) + [value_where]
+        return await self.__run(lambda: self.__execute(sql, values).rowcount)
+
+    async def execute(self, sql: str, *args: Union[str, int]) -> int:
+        """
+        需要更新、写入等操作的 excute 执行语句
+        :param sql:
+        :param args:
+        :return:
+        """
+        return await self.__run(lambda: self.__execute(sql, args).rowcount)
+
+    async def executescript(self, sql_script: str):
+        """
+        执行多条 sql 语句，用于初始化表结构
+        :param sql_script:
+        :return:
+        """
+        await self.__run(lambda: self.__connection().executescript(sql_script))
+
+    def __get_unique_fields(self, table_name: str) -> List[str]:
+        """
+        查询表上的唯一索引字段（帖子ID、评论ID、用户ID），作为 upsert 的冲突字段
+        """
+        if table_name not in self.__unique_fields:
+            conn = self.__connection()
+            unique_fields: List[str] = []
+            for index in conn.execute(f"PRAGMA index_list(`{table_name}`)").fetchall():
+                if index["unique"] and index["origin"] == "c":
+                    unique_fields = [info["name"] for info in conn.execute(f"PRAGMA index_info(`{index['name']}`)")]
+                    break
+            if not unique_fields:
+                raise ValueError(f"[AsyncSqliteDB] table {table_name} has no unique index for upsert")
+            self.__unique_fields[table_name] = unique_fields
+        return self.__unique_fields[table_name]
+
+    async def batch_insert(self, table_name: str, items: List[Dict[str, Any]]) -> int:
+        """
+        批量追加记录 (INSERT INTO ... VALUES ...)，用于只追加不更新的表，整批数据在一个事务里提交
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，字段集合不同的记录会被分组后分别写入
+        :return: 写入的行数
+        """
+        if not items:
+            return 0
+
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(list(item.values()))
+
+        def _batch_insert() -> int:
+            conn = self.__connection()
+            affected_rows = 0
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for fields, values in groups.items():
+                    fieldstr = ','.join([f'`{field}`' for field in fields])
+                    valstr = ','.join(['?'] * len(fields))
+                    sql = "INSERT INTO %s (%s) VALUES (%s)" % (table_name, fieldstr, valstr)
+                    affected_rows += conn.executemany(sql, values).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return affected_rows
+
+        return await self.__run(_batch_insert)
+
+    async def batch_insert_or_update(self, table_name: str, items: List[Dict[str, Any]],
+                                     insert_only_fields: Sequence[str] = ("add_ts",),
+                                     update_fields: Optional[Sequence[str]] = None) -> int:
+        """
+        批量写入记录，唯一键冲突时更新已有记录 (INSERT ... ON CONFLICT DO UPDATE)，整批数据在一个事务里提交
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，字段集合不同的记录会被分组后分别写入
+        :param insert_only_fields: 只在新增时写入、冲突时不更新的字段，默认保留首次入库的 add_ts
+        :param update_fields: 冲突时只更新这些字段，None 表示更新除 insert_only_fields 之外的所有字段
+        :return: 受影响的行数
+        """
+        if not items:
+            return 0
+
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(list(item.values()))
+
+        def _batch_upsert() -> int:
+            conn = self.__connection()
+            conflict_fields = self.__get_unique_fields(table_name)
+            affected_rows = 0
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for fields, values in groups.items():
+                    fieldstr = ','.join([f'`{field}`' for field in fields])
+                    valstr = ','.join(['?'] * len(fields))
+                    updates = [f'`{field}`=excluded.`{field}`' for field in fields
+                               if field not in insert_only_fields and field not in conflict_fields
+                               and (update_fields is None or field in update_fields)]
+                    conflict_action = "DO UPDATE SET %s" % ','.join(updates) if updates else "DO NOTHING"
+                    sql = "INSERT INTO %s (%s) VALUES (%s) ON CONFLICT(%s) %s" % (
+                        table_name, fieldstr, valstr, ','.join([f'`{field}`' for field in conflict_fields]),
+                        conflict_action
+                    )
+                    affected_rows += conn.executemany(sql, values).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return affected_rows
+
+        return await self.__run(_batch_upsert)
+
+    async def bulk_load_or_update(self, table_name: str, items: List[Dict[str, Any]],
+                                  insert_only_fields: Sequence[str] = ("add_ts",),
+                                  staging_dir: Optional[str] = None,
+                                  update_fields: Optional[Sequence[str]] = None) -> int:
+        """
+        和 AsyncMysqlDB.bulk_load_or_update 接口保持一致，SQLite 没有 LOAD DATA，
+        本地库在一个事务里批量 upsert 已经是最快的写法，直接使用 batch_insert_or_update
+        :param table_name: 表名
+        :param items: 记录的字典信息列表
+        :param insert_only_fields: 只在新增时写入、冲突时不更新的字段
+        :param staging_dir: 不使用
+        :param update_fields: 冲突时只更新这些字段
+        :return: 受影响的行数
+        """
+        return await self.batch_insert_or_update(table_name, items, insert_only_fields, update_fields)
+
+    async def close(self):
+        """
+        关闭数据库连接
+        :return:
+        """
+        def _close():
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
+
+        await self.__run(_close)
+        self.__executor.shutdown(wait=True)
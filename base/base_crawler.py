@@ -10,7 +10,7 @@
 
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from playwright.async_api import BrowserContext, BrowserType
 
@@ -30,6 +30,12 @@ class AbstractCrawler(ABC):
         """
         pass
 
+    async def close(self):
+        """
+        close crawler, release the browser context
+        """
+        pass
+
     @abstractmethod
     async def launch_browser(self, chromium: BrowserType, playwright_proxy: Optional[Dict], user_agent: Optional[str],
                              headless: bool = True) -> BrowserContext:
@@ -77,6 +83,19 @@ class AbstractStore(ABC):
     async def store_creator(self, creator: Dict):
         pass
 
+    # 批量写入接口，默认逐条调用单条写入，支持批量写入的存储实现（csv、json、jsonl、db）会重写
+    async def store_contents(self, content_items: List[Dict]):
+        for content_item in content_items:
+            await self.store_content(content_item)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
+    async def store_creators(self, creators: List[Dict]):
+        for creator in creators:
+            await self.store_creator(creator)
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
@@ -12,6 +12,7 @@
 import argparse
 
 import config
+from tools.crawl_budget import parse_duration
 from tools.utils import str2bool
 
 
@@ -33,9 +34,13 @@ async def parse_cmd():
     parser.add_argument('--get_sub_comment', type=str2bool,
                         help=''''whether to crawl level two comment, supported values case insensitive ('yes', 'true', 't', 'y', '1', 'no', 'false', 'f', 'n', '0')''', default=config.ENABLE_GET_SUB_COMMENTS)
     parser.add_argument('--save_data_option', type=str,
-                        help='where to save the data (csv or db or json)', choices=['csv', 'db', 'json'], default=config.SAVE_DATA_OPTION)
+                        help='where to save the data (csv or db or json or jsonl or sqlite or parquet)', choices=['csv', 'db', 'json', 'jsonl', 'sqlite', 'parquet'], default=config.SAVE_DATA_OPTION)
     parser.add_argument('--cookies', type=str,
                         help='cookies used for cookie login type', default=config.COOKIES)
+    parser.add_argument('--max-duration', type=parse_duration,
+                        help='max run duration, seconds or with s/m/h suffix (eg: 90 | 30m | 2h), 0 means unlimited', default=config.CRAWLER_MAX_DURATION_SEC)
+    parser.add_argument('--max-requests', type=int,
+                        help='max number of api requests in this run, 0 means unlimited', default=config.CRAWLER_MAX_REQUESTS)
 
     args = parser.parse_args()
 
@@ -49,3 +54,5 @@ async def parse_cmd():
     config.ENABLE_GET_SUB_COMMENTS = args.get_sub_comment
     config.SAVE_DATA_OPTION = args.save_data_option
     config.COOKIES = args.cookies
+    config.CRAWLER_MAX_DURATION_SEC = args.max_duration
+    config.CRAWLER_MAX_REQUESTS = args.max_requests
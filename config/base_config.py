@@ -45,8 +45,51 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
-# 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json
+# 数据保存类型选项配置,支持六种类型：csv、db、json、jsonl、sqlite、parquet, 最好保存到DB，有排重的功能。
+# jsonl 每条数据追加一行，不会像 json 那样每次重写整个文件，数据量大时推荐使用
+# sqlite 是单文件数据库，不需要安装 MySQL 也能排重，数据库文件路径见 config/db_config.py SQLITE_DB_PATH
+# parquet 是列式存储，按平台、数据类型、日期分区写到 data/parquet 目录下，适合用 pandas/duckdb/spark 做分析
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or sqlite or parquet
+
+# 文件类存储（csv、jsonl）的缓冲配置：缓冲区达到多少条或距离上次写入超过多少秒时写入文件
+STORE_FLUSH_ITEMS = 100
+STORE_FLUSH_INTERVAL_SEC = 2
+
+# 文件类存储定期 fsync 的间隔（秒），降低机器断电/进程崩溃时丢失的数据量
+STORE_FSYNC_INTERVAL_SEC = 10
+
+# 文件类存储（csv、jsonl）的流式压缩算法：""（不压缩）、gzip、zstd（需要安装 zstandard）
+STORE_COMPRESSION = ""
+
+# 文件类存储（csv、jsonl）按分段滚动：单个分段写入磁盘超过多少字节或多少条后切换到新分段，0 表示不限制
+# 开启后会在同目录生成 *.manifest.json 记录所有分段
+STORE_ROTATE_MAX_BYTES = 0
+STORE_ROTATE_MAX_ITEMS = 0
+
+# parquet 存储每个 row group 的行数和压缩算法（zstd、snappy、gzip、none）
+PARQUET_ROW_GROUP_SIZE = 5000
+PARQUET_COMPRESSION = "zstd"
+
+# 是否开启存储写入队列（write-behind）：爬虫协程只把数据放入有界队列，由后台协程批量写入存储，队列满时爬虫协程才会等待
+ENABLE_STORE_QUEUE = True
+
+# 存储写入队列的最大长度、后台协程每批最多写入的条数、后台写入协程数量
+STORE_QUEUE_MAX_SIZE = 1000
+STORE_QUEUE_BATCH_SIZE = 100
+STORE_QUEUE_WORKERS = 1
+
+# 存储写入失败后的最大重试次数、第一次重试前等待的秒数（之后每次翻倍）；
+# 重试后仍然失败、或者退出时没来得及写入的数据追加到 {STORE_QUEUE_RECOVERY_DIR}/{平台}_{日期}.jsonl，不会丢弃
+STORE_QUEUE_MAX_RETRIES = 3
+STORE_QUEUE_RETRY_BACKOFF_SEC = 1
+STORE_QUEUE_RECOVERY_DIR = "data/store_recovery"
+
+# 是否开启数据库批量导入模式（仅 MySQL）：评论先写到本地暂存文件，用 LOAD DATA LOCAL INFILE 导入暂存表后一条语句合并进评论表，
+# 适合百万级评论的回填导入，需要 MySQL 服务端开启 local_infile，建议同时调大 STORE_QUEUE_BATCH_SIZE
+ENABLE_DB_BULK_LOAD = False
+
+# 批量导入暂存文件的目录，为空时使用系统临时目录
+DB_BULK_LOAD_DIR = ""
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -57,12 +100,78 @@ START_PAGE = 1
 # 爬取视频/帖子的数量控制
 CRAWLER_MAX_NOTES_COUNT = 200
 
+# 单次运行的最长时长（秒），0 表示不限制；到点前会停止派发新任务，等待在途任务收尾并刷新存储后退出
+CRAWLER_MAX_DURATION_SEC = 0
+
+# 单次运行的最大请求数，0 表示不限制；预算会按关键词/创作者平均分配，用完后不再派发新任务
+CRAWLER_MAX_REQUESTS = 0
+
+# 开启最长运行时长时，截止时间前预留给在途任务收尾的时间（秒，至少 1 秒）：到这个时间点停止派发新任务，
+# 截止时间到了在途任务还没结束时先关闭浏览器上下文，再取消爬虫任务
+CRAWLER_DRAIN_RESERVE_SEC = 30
+
+# 开启最长运行时长时，退出前等待存储队列和媒体下载池收尾的最短时间（秒）：收尾最多使用剩余的运行时长，但至少有这么长；
+# 超时后没下载完的媒体保留 .part 临时文件并写入媒体清单，之后可以用 download_media.py 续传
+CRAWLER_DRAIN_GRACE_SEC = 30
+
+# 是否开启跨运行的已爬取ID索引：开启后详情和评论阶段会跳过新鲜期内已经入库过的帖子，创作者阶段跳过已经入库过的创作者主页信息，
+# 适合每天重复爬取相同关键词
+ENABLE_SEEN_INDEX = False
+
+# 已爬取ID索引的存放目录（每个平台一个文件）、新鲜期（小时）、布隆过滤器预计本次新增的ID数量
+SEEN_INDEX_DIR = "data/seen_index"
+SEEN_INDEX_FRESHNESS_HOURS = 24
+SEEN_INDEX_BLOOM_CAPACITY = 1000000
+
+# 是否开启互动数据快照：开启后数据库存储每次入库都会往 content_engagement_snapshot 表追加一行（ID、时间、点赞/收藏/评论/分享/播放数），
+# 只有计数变化的帖子不再改写帖子表，适合反复刷新同一批帖子跟踪互动数据变化
+ENABLE_ENGAGEMENT_SNAPSHOT = False
+
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
+# 图片、视频流式下载时每次写入磁盘的块大小（字节），单个下载的内存占用只有一个块
+MEDIA_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# 图片、视频下载中断后的重试次数，重试时用 Range 请求从断点继续下载（未下载完的 .part 文件下次运行也会继续下载）
+MEDIA_DOWNLOAD_MAX_RETRIES = 3
+
+# 大文件（B站视频）多连接分段下载：同时下载的分段数，单个文件超过 2 倍最小分段大小（字节）时才按字节范围切分
+MEDIA_DOWNLOAD_SEGMENT_CONCURRENCY = 4
+MEDIA_DOWNLOAD_MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+# 是否开启独立的媒体下载池：爬虫只提交图片、视频下载任务，由后台协程下载，爬取元数据不再等待大文件下载
+ENABLE_MEDIA_DOWNLOAD_POOL = True
+
+# 媒体下载池的队列最大长度、后台下载协程数量、同一个 CDN 域名同时下载的最大数量
+MEDIA_DOWNLOAD_QUEUE_MAX_SIZE = 1000
+MEDIA_DOWNLOAD_WORKERS = 8
+MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY = 4
+
+# 所有媒体下载共享的带宽上限（字节/秒），0 表示不限速，eg: 10 * 1024 * 1024 表示 10MB/s
+MEDIA_DOWNLOAD_MAX_BYTES_PER_SEC = 0
+
+# 是否开启按内容哈希寻址的媒体文件库：图片、视频按 sha256 只保存一份（原保存路径硬链接到文件库），
+# 下载前按媒体ID（图片ID、微博 pid、B站 aid/cid/qn）查询，已经下载过的媒体不再重复下载
+ENABLE_MEDIA_BLOB_STORE = False
+
+# 媒体文件库目录，需要和 data 目录在同一个文件系统上才能使用硬链接，否则会复制文件
+MEDIA_BLOB_DIR = "data/media_blobs"
+
+# 是否只写媒体清单：开启 ENABLE_GET_IMAGES 时爬虫不下载图片、视频，只把下载地址、帖子ID、媒体类型和保存路径
+# 追加到 {MEDIA_MANIFEST_DIR}/{平台}_{日期}.jsonl，之后用 python download_media.py 在其他机器上下载
+MEDIA_DOWNLOAD_MANIFEST_ONLY = False
+
+# 媒体清单目录
+MEDIA_MANIFEST_DIR = "data/media_manifest"
+
+# 小红书笔记图片的格式偏好：从图片的多个地址中按顺序选择第一个有的格式，avif、webp 通常比 jpg 小好几倍，
+# 都没有时使用默认地址；下载完成后按文件头识别真实格式，扩展名不对时自动改正
+XHS_IMAGE_FORMAT_PREFERENCE = ["avif", "webp", "jpg"]
+
 # 是否开启爬评论模式, 默认开启爬评论
 ENABLE_GET_COMMENTS = True
 
@@ -190,6 +299,9 @@ START_DAY = '2024-01-01'
 # 爬取结束的天数，仅支持 bilibili 关键字搜索，YYYY-MM-DD 格式，若为 None 则表示不设置时间范围，按照默认关键字最多返回 1000 条视频的结果处理
 END_DAY = '2024-01-01'
 
+# B站视频下载的清晰度 qn：16 (360P)、32 (480P)、64 (720P)、80 (1080P)，清晰度越低文件越小、下载越快
+BILI_VIDEO_QN = 80
+
 # 是否开启按每一天进行爬取的选项，仅支持 bilibili 关键字搜索
 # 若为 False，则忽略 START_DAY 与 END_DAY 设置的值
 # 若为 True，则按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下的所有视频
@@ -18,6 +18,9 @@ RELATION_DB_HOST = os.getenv("RELATION_DB_HOST", "localhost")
 RELATION_DB_PORT = os.getenv("RELATION_DB_PORT", 3306)
 RELATION_DB_NAME = os.getenv("RELATION_DB_NAME", "media_crawler")
 
+# sqlite config
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "data/sqlite/media_crawler.db")
+
 
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
@@ -22,6 +22,7 @@ import aiomysql
 
 import config
 from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
 from tools import utils
 from var import db_conn_pool_var, media_crawler_db_var
 
@@ -39,6 +40,7 @@ async def init_mediacrawler_db():
         password=config.RELATION_DB_PWD,
         db=config.RELATION_DB_NAME,
         autocommit=True,
+        local_infile=config.ENABLE_DB_BULK_LOAD,
     )
     async_db_obj = AsyncMysqlDB(pool)
 
@@ -47,6 +49,18 @@ async def init_mediacrawler_db():
     media_crawler_db_var.set(async_db_obj)
 
 
+async def init_sqlite_db():
+    """
+    初始化sqlite数据库，表不存在时按 schema/sqlite_tables.sql 自动创建，并将该对象塞给media_crawler_db_var上下文变量
+    Returns:
+
+    """
+    async_db_obj = AsyncSqliteDB(config.SQLITE_DB_PATH)
+    async with aiofiles.open("schema/sqlite_tables.sql", mode="r", encoding="utf-8") as f:
+        await async_db_obj.executescript(await f.read())
+    media_crawler_db_var.set(async_db_obj)
+
+
 async def init_db():
     """
     初始化db连接池
@@ -54,7 +68,10 @@ async def init_db():
 
     """
     utils.logger.info("[init_db] start init mediacrawler db connect object")
-    await init_mediacrawler_db()
+    if config.SAVE_DATA_OPTION == "sqlite":
+        await init_sqlite_db()
+    else:
+        await init_mediacrawler_db()
     utils.logger.info("[init_db] end init mediacrawler db connect object")
 
 
@@ -65,6 +82,9 @@ async def close():
 
     """
     utils.logger.info("[close] close mediacrawler db pool")
+    if config.SAVE_DATA_OPTION == "sqlite":
+        await media_crawler_db_var.get().close()
+        return
     db_pool: aiomysql.Pool = db_conn_pool_var.get()
     if db_pool is not None:
         db_pool.close()
@@ -0,0 +1,116 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/29 11:05
+# @Desc    : 独立的媒体下载命令：逐行读取爬虫在只写清单模式（MEDIA_DOWNLOAD_MANIFEST_ONLY）下写的媒体清单，
+#            用媒体下载池高并发下载，已经存在的文件直接跳过，结束时输出下载速度
+#            eg: python download_media.py data/media_manifest/xhs_2024-12-29.jsonl --workers 32
+import argparse
+import asyncio
+import glob
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+import config
+from tools import utils
+from tools.media_blob_store import close_media_blob_store
+from tools.media_download import (MediaDownloadPool, find_downloaded_file,
+                                  make_task_from_manifest_item)
+
+
+def iter_manifest_items(file_paths: List[str]) -> Iterator[Dict]:
+    """
+    逐行读取媒体清单，同一个保存路径只返回一次；爬虫崩溃时最后一行可能不完整，解析失败的行跳过
+    Args:
+        file_paths: 清单文件路径列表
+
+    Returns:
+        Iterator[Dict]: 清单中的每一行
+
+    """
+    seen_file_paths = set()
+    for file_path in file_paths:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    utils.logger.warning(f"[iter_manifest_items] skip invalid line in {file_path}: {line[:100]}")
+                    continue
+                if item.get("file_path") in seen_file_paths:
+                    continue
+                seen_file_paths.add(item.get("file_path"))
+                yield item
+
+
+async def download_manifests(file_paths: List[str], workers: int = 0, per_host_concurrency: int = 0,
+                             max_bytes_per_sec: Optional[int] = None, proxies: Optional[Dict] = None,
+                             timeout: Optional[float] = None) -> MediaDownloadPool:
+    """
+    下载媒体清单中的所有文件，保存路径上已经存在的文件（包括改过扩展名的图片）不再下载
+    Args:
+        file_paths: 清单文件路径列表
+        workers: 下载协程数量，默认使用配置 MEDIA_DOWNLOAD_WORKERS
+        per_host_concurrency: 同一个域名同时下载的最大数量，默认使用配置 MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY
+        max_bytes_per_sec: 带宽上限（字节/秒），为 None 时使用配置 MEDIA_DOWNLOAD_MAX_BYTES_PER_SEC
+        proxies: 下载使用的代理
+        timeout: 超时时间
+
+    Returns:
+        MediaDownloadPool: 下载完成的下载池，包含下载数量和字节数
+
+    """
+    pool = MediaDownloadPool(workers=workers, per_host_concurrency=per_host_concurrency,
+                             max_bytes_per_sec=max_bytes_per_sec)
+    skipped_count = 0
+    for item in iter_manifest_items(file_paths):
+        if find_downloaded_file(item["file_path"]):
+            skipped_count += 1
+            continue
+        await pool.submit(make_task_from_manifest_item(item, proxies=proxies, timeout=timeout))
+    await pool.close()
+    utils.logger.info(f"[download_manifests] skipped {skipped_count} files already exist")
+    return pool
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Download media files listed in media manifests.')
+    parser.add_argument('manifests', type=str, nargs='*',
+                        help=f'manifest files, default all manifests in {config.MEDIA_MANIFEST_DIR}')
+    parser.add_argument('--workers', type=int, help='concurrent downloads',
+                        default=config.MEDIA_DOWNLOAD_WORKERS)
+    parser.add_argument('--per-host', type=int, help='concurrent downloads per CDN host',
+                        default=config.MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY)
+    parser.add_argument('--max-bytes-per-sec', type=int, help='bandwidth limit, 0 means no limit',
+                        default=config.MEDIA_DOWNLOAD_MAX_BYTES_PER_SEC)
+    parser.add_argument('--proxy', type=str, help='proxy url, eg: http://127.0.0.1:7890', default='')
+    parser.add_argument('--timeout', type=float, help='request timeout seconds', default=60)
+    args = parser.parse_args()
+
+    file_paths = args.manifests or sorted(glob.glob(os.path.join(config.MEDIA_MANIFEST_DIR, "*.jsonl")))
+    if not file_paths:
+        utils.logger.info(f"[main] no manifest found in {config.MEDIA_MANIFEST_DIR}")
+        return
+    proxies = {"http://": args.proxy, "https://": args.proxy} if args.proxy else None
+    try:
+        await download_manifests(file_paths, args.workers, args.per_host, args.max_bytes_per_sec,
+                                 proxies=proxies, timeout=args.timeout)
+    finally:
+        await close_media_blob_store()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main())
@@ -0,0 +1,120 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/28 10:20
+# @Desc    : 把数据库（MySQL 或 SQLite）中一个平台的表流式导出成 jsonl 或 parquet 文件，内存占用和表大小无关
+#            eg: python export_data.py --platform xhs --source db --format parquet
+import argparse
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+import config
+import db
+from async_db import ITER_QUERY_BATCH_SIZE
+from tools import utils
+from tools.async_file_writer import AsyncJsonlWriter
+from var import media_crawler_db_var
+
+# 每个平台需要导出的表：帖子、评论、创作者
+PLATFORM_TABLES = {
+    "xhs": ["xhs_note", "xhs_note_comment", "xhs_creator"],
+    "dy": ["douyin_aweme", "douyin_aweme_comment", "dy_creator"],
+    "ks": ["kuaishou_video", "kuaishou_video_comment"],
+    "bili": ["bilibili_video", "bilibili_video_comment", "bilibili_up_info"],
+    "wb": ["weibo_note", "weibo_note_comment", "weibo_creator"],
+    "tieba": ["tieba_note", "tieba_comment", "tieba_creator"],
+    "zhihu": ["zhihu_content", "zhihu_comment", "zhihu_creator"],
+}
+
+
+async def export_table(table_name: str, file_path: str, export_format: str,
+                       batch_size: int = ITER_QUERY_BATCH_SIZE) -> int:
+    """
+    用流式游标按批读出一张表并写入文件，同一时间内存里只有一批数据和写入器的缓冲区
+    Args:
+        table_name: 表名
+        file_path: 导出文件路径（jsonl 开启压缩时写入器会追加 .gz/.zst 后缀）
+        export_format: jsonl | parquet
+        batch_size: 每批读取的行数
+
+    Returns:
+        int: 导出的行数
+
+    """
+    if export_format == "parquet":
+        from tools.async_parquet_writer import AsyncParquetWriter
+        writer = AsyncParquetWriter(file_path)
+    else:
+        writer = AsyncJsonlWriter(file_path)
+
+    row_count = 0
+    try:
+        async for rows in media_crawler_db_var.get().iter_query(f"SELECT * FROM {table_name} ORDER BY id",
+                                                                 batch_size=batch_size):
+            await writer.write_many(rows)
+            row_count += len(rows)
+    finally:
+        await writer.close()
+    return row_count
+
+
+async def export_platform(platform: str, export_format: str, output_dir: str,
+                          batch_size: int = ITER_QUERY_BATCH_SIZE, tables: Optional[List[str]] = None):
+    """
+    导出一个平台的所有表，数据库连接需要提前初始化
+    Args:
+        platform: 平台 xhs | dy | ks | bili | wb | tieba | zhihu
+        export_format: jsonl | parquet
+        output_dir: 导出目录，文件保存在 {output_dir}/{platform}/{table}_{时间}.{format}
+        batch_size: 每批读取的行数
+        tables: 只导出指定的表，为空时导出平台的所有表
+
+    Returns:
+
+    """
+    run_id = time.strftime("%Y%m%d%H%M%S")
+    for table_name in tables or PLATFORM_TABLES[platform]:
+        file_path = os.path.join(output_dir, platform, f"{table_name}_{run_id}.{export_format}")
+        start_time = time.monotonic()
+        row_count = await export_table(table_name, file_path, export_format, batch_size)
+        utils.logger.info(
+            f"[export_platform] export {row_count} rows of {table_name} to {file_path}, "
+            f"cost {time.monotonic() - start_time:.1f}s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Export crawled data from database to jsonl or parquet files.')
+    parser.add_argument('--platform', type=str, help='Media platform select (xhs | dy | ks | bili | wb | tieba | zhihu)',
+                        choices=list(PLATFORM_TABLES.keys()), default=config.PLATFORM)
+    parser.add_argument('--source', type=str, help='database to export from (db | sqlite)',
+                        choices=['db', 'sqlite'], default='db')
+    parser.add_argument('--format', type=str, help='export file format (jsonl | parquet)',
+                        choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--output-dir', type=str, help='export directory', default='data/export')
+    parser.add_argument('--batch-size', type=int, help='rows fetched per batch', default=ITER_QUERY_BATCH_SIZE)
+    parser.add_argument('--tables', type=str, help='comma separated table names, default all tables of the platform',
+                        default='')
+    args = parser.parse_args()
+
+    config.SAVE_DATA_OPTION = args.source
+    await db.init_db()
+    try:
+        tables = [table_name.strip() for table_name in args.tables.split(",") if table_name.strip()]
+        await export_platform(args.platform, args.format, args.output_dir, args.batch_size, tables)
+    finally:
+        await db.close()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main())
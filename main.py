@@ -11,6 +11,7 @@
 
 import asyncio
 import sys
+import time
 
 import cmd_arg
 import config
@@ -23,6 +24,14 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from tools.async_file_writer import close_all_writers
+from tools.async_store_queue import close_store_queue
+from tools.content_hash import change_detection_stats
+from tools.crawl_budget import CrawlBudget, run_crawler_within_budget
+from tools.media_blob_store import close_media_blob_store
+from tools.media_download import close_media_download_pool
+from tools.seen_index import SeenIdIndex
+from var import crawl_budget_var, seen_index_var
 
 
 class CrawlerFactory:
@@ -49,16 +58,47 @@ async def main():
     await cmd_arg.parse_cmd()
 
     # init db
-    if config.SAVE_DATA_OPTION == "db":
+    if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.init_db()
 
+    crawl_budget = CrawlBudget(
+        max_duration_sec=config.CRAWLER_MAX_DURATION_SEC,
+        max_requests=config.CRAWLER_MAX_REQUESTS,
+        drain_reserve_sec=config.CRAWLER_DRAIN_RESERVE_SEC,
+    )
+    crawl_budget_var.set(crawl_budget)
+
+    if config.ENABLE_SEEN_INDEX:
+        seen_index = SeenIdIndex(
+            platform=config.PLATFORM,
+            index_dir=config.SEEN_INDEX_DIR,
+            freshness_sec=int(config.SEEN_INDEX_FRESHNESS_HOURS * 3600),
+            bloom_capacity=config.SEEN_INDEX_BLOOM_CAPACITY,
+        )
+        seen_index.open()
+        seen_index_var.set(seen_index)
+
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    # 数据库初始化、加载已爬取ID索引不计入运行时长
+    crawl_budget.start()
+    try:
+        await run_crawler_within_budget(crawler, crawl_budget)
+    finally:
+        # 收尾也受运行时长限制：先把已经爬到的数据写入存储，剩下的时间留给媒体下载，没下载完的之后可以续传
+        drain_timeout = crawl_budget.drain_timeout(config.CRAWLER_DRAIN_GRACE_SEC)
+        drain_start_time = time.monotonic()
+        await close_store_queue(timeout=drain_timeout)
+        if drain_timeout is not None:
+            drain_timeout = max(drain_timeout - (time.monotonic() - drain_start_time), 0)
+        await close_media_download_pool(timeout=drain_timeout)
+        await close_media_blob_store()
+        await close_all_writers()
+        change_detection_stats.report()
+        seen_index_var.get().close()
+        if config.SAVE_DATA_OPTION in ("db", "sqlite"):
+            await db.close()
 
-    if config.SAVE_DATA_OPTION == "db":
-        await db.close()
 
-    
 
 if __name__ == '__main__':
     try:
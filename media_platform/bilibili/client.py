@@ -23,6 +23,8 @@ from playwright.async_api import BrowserContext, Page
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_download import submit_segmented_media_download
+from var import crawl_budget_var
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
@@ -47,6 +49,7 @@ class BilibiliClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
 
     async def request(self, method, url, **kwargs) -> Any:
+        crawl_budget_var.get().record_request()
         async with httpx.AsyncClient(proxies=self.proxies) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
@@ -170,11 +173,12 @@ class BilibiliClient(AbstractApiClient):
             params.update({"bvid": bvid})
         return await self.get(uri, params, enable_params_sign=False)
 
-    async def get_video_play_url(self, aid: int, cid: int) -> Dict:
+    async def get_video_play_url(self, aid: int, cid: int, qn: int = 80) -> Dict:
         """
         Bilibli web video play url api
         :param aid: 稿件avid
         :param cid: cid
+        :param qn: 清晰度 16 (360P)、32 (480P)、64 (720P)、80 (1080P)
         :return:
         """
         if not aid or not cid or aid <= 0 or cid <= 0:
@@ -183,7 +187,7 @@ class BilibiliClient(AbstractApiClient):
         params = {
             "avid": aid,
             "cid": cid,
-            "qn": 80,
+            "qn": qn,
             "fourk": 1,
             "fnval": 1,
             "platform": "pc",
@@ -191,14 +195,21 @@ class BilibiliClient(AbstractApiClient):
 
         return await self.get(uri, params, enable_params_sign=True)
 
-    async def get_video_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+    async def download_video_segments(self, segments: List[Dict], file_path: str,
+                                      media_key: Optional[str] = None, video_id: Optional[str] = None) -> None:
+        """
+        下载任务提交到媒体下载池后立即返回（未开启下载池时直接下载），多个分段同时下载后按顺序拼接到 file_path
+        Args:
+            segments: 同一个文件按字节范围切分的分段列表，每段包含 url，以及可选的 byte_range
+            file_path: 保存路径
+            media_key: 媒体ID，开启媒体文件库时用于跳过已经下载过的媒体
+            video_id: 视频ID，写入媒体清单
+
+        Returns:
+
+        """
+        await submit_segmented_media_download(segments, file_path, proxies=self.proxies, headers=self.headers,
+                                              timeout=self.timeout, media_key=media_key, content_id=video_id)
 
     async def get_video_comments(self,
                                  video_id: str,
@@ -239,6 +250,9 @@ class BilibiliClient(AbstractApiClient):
         is_end = False
         next_page = 0
         while not is_end and len(result) < max_count:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
             cursor_info: Dict = comments_res.get("cursor")
             comment_list: List[Dict] = comments_res.get("replies", [])
@@ -283,6 +297,9 @@ class BilibiliClient(AbstractApiClient):
 
         pn = 1
         while True:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             result = await self.get_video_level_two_comments(
                 video_id, level_one_comment_id, pn, ps, order_mode)
             comment_list: List[Dict] = result.get("replies", [])
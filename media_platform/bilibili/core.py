@@ -29,7 +29,10 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.media_download import make_byte_range_segments
+from tools.seen_index import SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS
+from var import (crawl_budget_var, crawler_type_var, seen_index_var,
+                 source_keyword_var)
 
 from .client import BilibiliClient
 from .exception import DataFetchError
@@ -90,6 +93,8 @@ class BilibiliCrawler(AbstractCrawler):
                 await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
             elif config.CRAWLER_TYPE == "creator":
                 for creator_id in config.BILI_CREATOR_ID_LIST:
+                    if crawl_budget_var.get().is_exhausted():
+                        break
                     await self.get_creator_videos(int(creator_id))
             else:
                 pass
@@ -136,13 +141,21 @@ class BilibiliCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
+        crawl_budget = crawl_budget_var.get()
+        keywords = config.KEYWORDS.split(",")
+        for keyword_index, keyword in enumerate(keywords):
+            if crawl_budget.is_exhausted():
+                break
+            crawl_budget.begin_slice(len(keywords) - keyword_index)
             source_keyword_var.set(keyword)
             utils.logger.info(f"[BilibiliCrawler.search] Current search keyword: {keyword}")
             # 每个关键词最多返回 1000 条数据
             if not config.ALL_DAY:
                 page = 1
                 while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                    if crawl_budget.is_slice_exhausted():
+                        utils.logger.info(f"[BilibiliCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at page: {page}")
+                        break
                     if page < start_page:
                         utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
                         page += 1
@@ -180,6 +193,9 @@ class BilibiliCrawler(AbstractCrawler):
             # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下的所有视频
             else:
                 for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
+                    if crawl_budget.is_slice_exhausted():
+                        utils.logger.info(f"[BilibiliCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at date: {day.ctime()}")
+                        break
                     # 按照每一天进行爬取的时间戳参数
                     pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
                     page = 1
@@ -234,6 +250,10 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info(
                 f"[BilibiliCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
+        if crawl_budget_var.get().is_exhausted():
+            utils.logger.info(
+                f"[BilibiliCrawler.batch_get_video_comments] Crawl budget is used up, skip comments of videos: {video_id_list}")
+            return
 
         utils.logger.info(
             f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
@@ -253,6 +273,12 @@ class BilibiliCrawler(AbstractCrawler):
         :return:
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT_COMMENTS, video_id):
+                utils.logger.info(
+                    f"[BilibiliCrawler.get_comments] comments of video_id: {video_id} were crawled recently, skip")
+                return
             try:
                 utils.logger.info(
                     f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
@@ -279,7 +305,7 @@ class BilibiliCrawler(AbstractCrawler):
         ps = 30
         pn = 1
         video_bvids_list = []
-        while True:
+        while not crawl_budget_var.get().is_exhausted():
             result = await self.bili_client.get_creator_videos(creator_id, pn, ps)
             for video in result["list"]["vlist"]:
                 video_bvids_list.append(video["bvid"])
@@ -321,6 +347,13 @@ class BilibiliCrawler(AbstractCrawler):
         :return:
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return None
+            # 按 bvid 指定的视频没有 aid，无法在抓取前判断
+            if aid and await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT, aid):
+                utils.logger.info(
+                    f"[BilibiliCrawler.get_video_info_task] video_id: {aid} was crawled recently, skip")
+                return None
             try:
                 result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
                 return result
@@ -343,7 +376,7 @@ class BilibiliCrawler(AbstractCrawler):
                 """
         async with semaphore:
             try:
-                result = await self.bili_client.get_video_play_url(aid=aid, cid=cid)
+                result = await self.bili_client.get_video_play_url(aid=aid, cid=cid, qn=config.BILI_VIDEO_QN)
                 return result
             except DataFetchError as ex:
                 utils.logger.error(
@@ -434,6 +467,11 @@ class BilibiliCrawler(AbstractCrawler):
             )
             return browser_context
 
+    async def close(self):
+        """Close browser context"""
+        await self.browser_context.close()
+        utils.logger.info("[BilibiliCrawler.close] Browser context closed ...")
+
     async def get_bilibili_video(self, video_item: Dict, semaphore: asyncio.Semaphore):
         """
         download bilibili video
@@ -451,21 +489,24 @@ class BilibiliCrawler(AbstractCrawler):
         if result is None:
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video play url failed")
             return
-        durl_list = result.get("durl")
-        max_size = -1
-        video_url = ""
-        for durl in durl_list:
-            size = durl.get("size")
-            if size > max_size:
-                max_size = size
-                video_url = durl.get("url")
-        if video_url == "":
+        durl_list = sorted(result.get("durl") or [], key=lambda durl: durl.get("order", 0))
+        if not durl_list or not all(durl.get("url") for durl in durl_list):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
-
-        content = await self.bili_client.get_video_media(video_url)
-        if content is None:
+        if len(durl_list) == 1:
+            # 只有一段时按字节范围切分后多连接下载，下载完按字节顺序拼接回原文件
+            durl = durl_list[0]
+            await self.bili_client.download_video_segments(
+                make_byte_range_segments(durl.get("url"), durl.get("size")),
+                bilibili_store.make_video_file_path(aid, "video.mp4"),
+                media_key=f"bili:{aid}:{cid}:{config.BILI_VIDEO_QN}", video_id=str(aid))
             return
-        extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+
+        # durl 有多段时每段都是一个独立的 FLV 文件（各自带文件头），直接拼接字节得到的不是合法视频，
+        # 按 order 顺序分别保存为 video_1.flv、video_2.flv ...，每段内部仍然按字节范围切分下载
+        for index, durl in enumerate(durl_list, start=1):
+            await self.bili_client.download_video_segments(
+                make_byte_range_segments(durl.get("url"), durl.get("size")),
+                bilibili_store.make_video_file_path(aid, f"video_{index}.flv"),
+                media_key=f"bili:{aid}:{cid}:{config.BILI_VIDEO_QN}:{index}", video_id=str(aid))
 
@@ -20,7 +20,7 @@ from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
-from var import request_keyword_var
+from var import crawl_budget_var, request_keyword_var
 
 from .exception import *
 from .field import *
@@ -139,6 +139,7 @@ class DOUYINClient(AbstractApiClient):
         异常:
             DataFetchError: 数据获取失败时抛出
         """
+        crawl_budget_var.get().record_request()
         response = None
         # 发送GET或POST请求
         if method == "GET":
@@ -401,6 +402,9 @@ class DOUYINClient(AbstractApiClient):
         
         # 获取主评论，直到没有更多或达到数量上限
         while comments_has_more and len(result) < max_count:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             # 获取一页主评论
             comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
             comments_has_more = comments_res.get("has_more", 0)
@@ -440,6 +444,9 @@ class DOUYINClient(AbstractApiClient):
 
                     # 获取所有子评论
                     while sub_comments_has_more:
+                        # 预算用完后不再请求下一页评论
+                        if crawl_budget_var.get().is_exhausted():
+                            break
                         sub_comments_res = await self.get_sub_comments(comment_id, sub_comments_cursor)
                         sub_comments_has_more = sub_comments_res.get("has_more", 0)
                         sub_comments_cursor = sub_comments_res.get("cursor", 0)
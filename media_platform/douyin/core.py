@@ -23,7 +23,10 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.seen_index import (SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS,
+                              SEEN_KIND_CREATOR)
+from var import (crawl_budget_var, crawler_type_var, seen_index_var,
+                 source_keyword_var)
 
 from .client import DOUYINClient
 from .exception import DataFetchError
@@ -142,8 +145,14 @@ class DouYinCrawler(AbstractCrawler):
         
         start_page = config.START_PAGE  # 起始页码
         
+        crawl_budget = crawl_budget_var.get()
+        keywords = config.KEYWORDS.split(",")
         # 遍历所有关键词（支持多关键词，用逗号分隔）
-        for keyword in config.KEYWORDS.split(","):
+        for keyword_index, keyword in enumerate(keywords):
+            if crawl_budget.is_exhausted():
+                break
+            # 剩余的运行预算平均分给剩下的关键词
+            crawl_budget.begin_slice(len(keywords) - keyword_index)
             source_keyword_var.set(keyword)  # 设置当前关键词到上下文
             utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
             
@@ -153,6 +162,10 @@ class DouYinCrawler(AbstractCrawler):
             
             # 循环获取数据，直到达到配置的最大数量
             while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                # 当前关键词的运行预算用完，不再翻页
+                if crawl_budget.is_slice_exhausted():
+                    utils.logger.info(f"[DouYinCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at page {page}")
+                    break
                 # 跳过起始页之前的页码
                 if page < start_page:
                     utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
@@ -237,6 +250,13 @@ class DouYinCrawler(AbstractCrawler):
         使用信号量控制并发，处理可能的异常情况
         """
         async with semaphore:  # 使用信号量控制并发
+            # 运行预算用完，不再开始新的详情请求
+            if crawl_budget_var.get().is_exhausted():
+                return None
+            # 新鲜期内已经爬过的视频直接跳过
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT, aweme_id):
+                utils.logger.info(f"[DouYinCrawler.get_aweme_detail] aweme_id: {aweme_id} was crawled recently, skip")
+                return None
             try:
                 # 添加请求延迟
                 await self.add_request_delay(f"获取视频详情 ID:{aweme_id}")
@@ -262,6 +282,10 @@ class DouYinCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             utils.logger.info(f"[DouYinCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
+        # 运行预算用完，不再开始新的评论任务
+        if crawl_budget_var.get().is_exhausted():
+            utils.logger.info(f"[DouYinCrawler.batch_get_note_comments] Crawl budget is used up, skip comments of awemes: {aweme_list}")
+            return
 
         task_list: List[Task] = []
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
@@ -281,6 +305,11 @@ class DouYinCrawler(AbstractCrawler):
             semaphore: 用于控制并发的信号量
         """
         async with semaphore:  # 使用信号量控制并发访问
+            if crawl_budget_var.get().is_exhausted():
+                return
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT_COMMENTS, aweme_id):
+                utils.logger.info(f"[DouYinCrawler.get_comments] Comments of aweme_id: {aweme_id} were crawled recently, skip")
+                return
             try:
                 # 将关键词列表传递给 get_aweme_all_comments 方法
                 await self.dy_client.get_aweme_all_comments(
@@ -305,13 +334,19 @@ class DouYinCrawler(AbstractCrawler):
         4. 获取所有视频的评论
         """
         utils.logger.info("[DouYinCrawler.get_creators_and_videos] Begin get douyin creators")
+        crawl_budget = crawl_budget_var.get()
         for user_id in config.DY_CREATOR_ID_LIST:
-            
-            # 获取创作者信息
-            creator_info: Dict = await self.dy_client.get_user_info(user_id)
-            if creator_info:
-                # 保存创作者信息到数据库
-                await douyin_store.save_creator(user_id, creator=creator_info)
+            if crawl_budget.is_exhausted():
+                break
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CREATOR, user_id):
+                utils.logger.info(
+                    f"[DouYinCrawler.get_creators_and_videos] Creator info of user_id: {user_id} was crawled recently, skip")
+            else:
+                # 获取创作者信息
+                creator_info: Dict = await self.dy_client.get_user_info(user_id)
+                if creator_info:
+                    # 保存创作者信息到数据库
+                    await douyin_store.save_creator(user_id, creator=creator_info)
 
             # 添加请求延迟
             await self.add_request_delay(f"获取创作者所有视频 ID:{user_id}")
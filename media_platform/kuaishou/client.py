@@ -21,6 +21,7 @@ from playwright.async_api import BrowserContext, Page
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from var import crawl_budget_var
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
@@ -45,6 +46,7 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
+        crawl_budget_var.get().record_request()
         async with httpx.AsyncClient(proxies=self.proxies) as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
         data: Dict = response.json()
@@ -197,6 +199,9 @@ class KuaiShouClient(AbstractApiClient):
         pcursor = ""
 
         while pcursor != "no_more" and len(result) < max_count:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             comments_res = await self.get_video_comments(photo_id, pcursor)
             vision_commen_list = comments_res.get("visionCommentList", {})
             pcursor = vision_commen_list.get("pcursor", "")
@@ -250,6 +255,9 @@ class KuaiShouClient(AbstractApiClient):
             sub_comment_pcursor = ""
 
             while sub_comment_pcursor != "no_more":
+                # 预算用完后不再请求下一页评论
+                if crawl_budget_var.get().is_exhausted():
+                    break
                 comments_res = await self.get_video_sub_comments(
                     photo_id, root_comment_id, sub_comment_pcursor
                 )
@@ -23,7 +23,10 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
-from var import comment_tasks_var, crawler_type_var, source_keyword_var
+from tools.seen_index import (SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS,
+                              SEEN_KIND_CREATOR)
+from var import (comment_tasks_var, crawl_budget_var, crawler_type_var,
+                 seen_index_var, source_keyword_var)
 
 from .client import KuaiShouClient
 from .exception import DataFetchError
@@ -97,7 +100,12 @@ class KuaishouCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        crawl_budget = crawl_budget_var.get()
+        keywords = config.KEYWORDS.split(",")
+        for keyword_index, keyword in enumerate(keywords):
+            if crawl_budget.is_exhausted():
+                break
+            crawl_budget.begin_slice(len(keywords) - keyword_index)
             search_session_id = ""
             source_keyword_var.set(keyword)
             utils.logger.info(
@@ -107,6 +115,11 @@ class KuaishouCrawler(AbstractCrawler):
             while (
                 page - start_page + 1
             ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                if crawl_budget.is_slice_exhausted():
+                    utils.logger.info(
+                        f"[KuaishouCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at page {page}"
+                    )
+                    break
                 if page < start_page:
                     utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
                     page += 1
@@ -159,6 +172,13 @@ class KuaishouCrawler(AbstractCrawler):
     ) -> Optional[Dict]:
         """Get video detail task"""
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return None
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT, video_id):
+                utils.logger.info(
+                    f"[KuaishouCrawler.get_video_info_task] video_id: {video_id} was crawled recently, skip"
+                )
+                return None
             try:
                 result = await self.ks_client.get_video_info(video_id)
                 utils.logger.info(
@@ -187,6 +207,11 @@ class KuaishouCrawler(AbstractCrawler):
                 f"[KuaishouCrawler.batch_get_video_comments] Crawling comment mode is not enabled"
             )
             return
+        if crawl_budget_var.get().is_exhausted():
+            utils.logger.info(
+                f"[KuaishouCrawler.batch_get_video_comments] Crawl budget is used up, skip comments of videos: {video_id_list}"
+            )
+            return
 
         utils.logger.info(
             f"[KuaishouCrawler.batch_get_video_comments] video ids:{video_id_list}"
@@ -210,6 +235,13 @@ class KuaishouCrawler(AbstractCrawler):
         :return:
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT_COMMENTS, video_id):
+                utils.logger.info(
+                    f"[KuaishouCrawler.get_comments] comments of video_id: {video_id} were crawled recently, skip"
+                )
+                return
             try:
                 utils.logger.info(
                     f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
@@ -312,11 +344,18 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             "[KuaiShouCrawler.get_creators_and_videos] Begin get kuaishou creators"
         )
+        crawl_budget = crawl_budget_var.get()
         for user_id in config.KS_CREATOR_ID_LIST:
-            # get creator detail info from web html content
-            createor_info: Dict = await self.ks_client.get_creator_info(user_id=user_id)
-            if createor_info:
-                await kuaishou_store.save_creator(user_id, creator=createor_info)
+            if crawl_budget.is_exhausted():
+                break
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CREATOR, user_id):
+                utils.logger.info(
+                    f"[KuaiShouCrawler.get_creators_and_videos] Creator info of user_id: {user_id} was crawled recently, skip")
+            else:
+                # get creator detail info from web html content
+                createor_info: Dict = await self.ks_client.get_creator_info(user_id=user_id)
+                if createor_info:
+                    await kuaishou_store.save_creator(user_id, creator=createor_info)
 
             # Get all video information of the creator
             all_video_list = await self.ks_client.get_all_videos_by_creator(
@@ -23,6 +23,7 @@ from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from var import crawl_budget_var
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -59,6 +60,7 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
+        crawl_budget_var.get().record_request()
         actual_proxies = proxies if proxies else self.default_ip_proxy
         async with httpx.AsyncClient(proxies=actual_proxies) as client:
             response = await client.request(
@@ -221,6 +223,9 @@ class BaiduTieBaClient(AbstractApiClient):
         result: List[TiebaComment] = []
         current_page = 1
         while note_detail.total_replay_page >= current_page and len(result) < max_count:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             params = {
                 "pn": current_page
             }
@@ -268,6 +273,9 @@ class BaiduTieBaClient(AbstractApiClient):
             current_page = 1
             max_sub_page_num = parment_comment.sub_comment_count // 10 + 1
             while max_sub_page_num >= current_page:
+                # 预算用完后不再请求下一页评论
+                if crawl_budget_var.get().is_exhausted():
+                    break
                 params = {
                     "tid": parment_comment.note_id,  # 帖子ID
                     "pid": parment_comment.comment_id,  # 父级评论ID
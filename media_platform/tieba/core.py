@@ -25,7 +25,9 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
 from tools.crawler_util import format_proxy_info
-from var import crawler_type_var, source_keyword_var
+from tools.seen_index import SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS
+from var import (crawl_budget_var, crawler_type_var, seen_index_var,
+                 source_keyword_var)
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
@@ -89,11 +91,19 @@ class TieBaCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        crawl_budget = crawl_budget_var.get()
+        keywords = config.KEYWORDS.split(",")
+        for keyword_index, keyword in enumerate(keywords):
+            if crawl_budget.is_exhausted():
+                break
+            crawl_budget.begin_slice(len(keywords) - keyword_index)
             source_keyword_var.set(keyword)
             utils.logger.info(f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}")
             page = 1
             while (page - start_page + 1) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                if crawl_budget.is_slice_exhausted():
+                    utils.logger.info(f"[BaiduTieBaCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at page {page}")
+                    break
                 if page < start_page:
                     utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
                     page += 1
@@ -127,11 +137,19 @@ class TieBaCrawler(AbstractCrawler):
         tieba_limit_count = 50
         if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
-        for tieba_name in config.TIEBA_NAME_LIST:
+        crawl_budget = crawl_budget_var.get()
+        for tieba_index, tieba_name in enumerate(config.TIEBA_NAME_LIST):
+            if crawl_budget.is_exhausted():
+                break
+            crawl_budget.begin_slice(len(config.TIEBA_NAME_LIST) - tieba_index)
             utils.logger.info(
                 f"[BaiduTieBaCrawler.get_specified_tieba_notes] Begin get tieba name: {tieba_name}")
             page_number = 0
             while page_number <= config.CRAWLER_MAX_NOTES_COUNT:
+                if crawl_budget.is_slice_exhausted():
+                    utils.logger.info(
+                        f"[BaiduTieBaCrawler.get_specified_tieba_notes] Crawl budget for tieba name: {tieba_name} is used up")
+                    break
                 note_list: List[TiebaNote] = await self.tieba_client.get_notes_by_tieba_name(
                     tieba_name=tieba_name,
                     page_num=page_number
@@ -178,6 +196,11 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return None
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT, note_id):
+                utils.logger.info(f"[BaiduTieBaCrawler.get_note_detail] note_id: {note_id} was crawled recently, skip")
+                return None
             try:
                 utils.logger.info(f"[BaiduTieBaCrawler.get_note_detail] Begin get note detail, note_id: {note_id}")
                 note_detail: TiebaNote = await self.tieba_client.get_note_by_id(note_id)
@@ -205,6 +228,9 @@ class TieBaCrawler(AbstractCrawler):
         """
         if not config.ENABLE_GET_COMMENTS:
             return
+        if crawl_budget_var.get().is_exhausted():
+            utils.logger.info("[BaiduTieBaCrawler.batch_get_note_comments] Crawl budget is used up, skip comments")
+            return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
@@ -224,6 +250,12 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT_COMMENTS, note_detail.note_id):
+                utils.logger.info(
+                    f"[BaiduTieBaCrawler.get_comments] Comments of note_id: {note_detail.note_id} were crawled recently, skip")
+                return
             utils.logger.info(f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}")
             await self.tieba_client.get_note_all_comments(
                 note_detail=note_detail,
@@ -239,7 +271,10 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
+        crawl_budget = crawl_budget_var.get()
         for creator_url in config.TIEBA_CREATOR_URL_LIST:
+            if crawl_budget.is_exhausted():
+                break
             creator_page_html_content = await self.tieba_client.get_creator_info_by_url(creator_url=creator_url)
             creator_info: TiebaCreator = self._page_extractor.extract_creator_info(creator_page_html_content)
             if creator_info:
@@ -311,5 +346,8 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        # 贴吧只用 httpx 请求，没有启动浏览器
+        if getattr(self, "browser_context", None) is None:
+            return
         await self.browser_context.close()
         utils.logger.info("[BaiduTieBaCrawler.close] Browser context closed ...")
@@ -13,10 +13,11 @@
 import html
 import json
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import parse_qs, unquote
 
-from parsel import Selector
+from lxml import etree
+from lxml import html as lxml_html
 
 from constant import baidu_tieba as const
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
@@ -25,13 +26,116 @@ from tools import utils
 GENDER_MALE = "sex_male"
 GENDER_FEMALE = "sex_female"
 
+# 预编译的 XPath 表达式，所有页面、所有提取方法共享，不再每次调用时重新编译
+XPATH_SEARCH_POST = etree.XPath("//div[@class='s_post']")
+XPATH_SEARCH_POST_ID = etree.XPath(".//span[@class='p_title']/a/@data-tid")
+XPATH_SEARCH_POST_TITLE = etree.XPath(".//span[@class='p_title']/a/text()")
+XPATH_SEARCH_POST_DESC = etree.XPath(".//div[@class='p_content']/text()")
+XPATH_SEARCH_POST_HREF = etree.XPath(".//span[@class='p_title']/a/@href")
+XPATH_SEARCH_POST_USER_NAME = etree.XPath(".//a[starts-with(@href, '/home/main')]/font/text()")
+XPATH_SEARCH_POST_USER_LINK = etree.XPath(".//a[starts-with(@href, '/home/main')]/@href")
+XPATH_SEARCH_POST_FORUM_NAME = etree.XPath(".//a[@class='p_forum']/font/text()")
+XPATH_SEARCH_POST_FORUM_LINK = etree.XPath(".//a[@class='p_forum']/@href")
+XPATH_SEARCH_POST_TIME = etree.XPath(".//font[@class='p_green p_date']/text()")
+
+XPATH_TIEBA_NAME = etree.XPath("//a[@class='card_title_fname']/text()")
+XPATH_TIEBA_LINK = etree.XPath("//a[@class='card_title_fname']/@href")
+
+XPATH_THREAD_LIST_POST = etree.XPath("//ul[@id='thread_list']/li")
+XPATH_THREAD_LIST_TITLE = etree.XPath(".//a[@class='j_th_tit ']/text()")
+XPATH_THREAD_LIST_DESC = etree.XPath(".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()")
+XPATH_THREAD_LIST_USER_LINK = etree.XPath(".//a[@class='frs-author-name j_user_card ']/@href")
+
+XPATH_FIRST_FLOOR = etree.XPath("//div[@class='p_postlist'][1]")
+XPATH_ONLY_VIEW_AUTHOR_LINK = etree.XPath("//*[@id='lzonly_cntn']/@href")
+XPATH_THREAD_NUM_INFO = etree.XPath("//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+XPATH_POST_TAIL = etree.XPath(".//div[@class='post-tail-wrap']")
+XPATH_POST_TAIL_INFO = etree.XPath(".//span[@class='tail-info']/text()")
+XPATH_POST_TAIL_IP = etree.XPath(".//span[starts-with(text(), 'IP属地:')]/text()")
+XPATH_TITLE = etree.XPath("//title/text()")
+XPATH_DESCRIPTION = etree.XPath("//meta[@name='description']/@content")
+XPATH_AUTHOR_LINK = etree.XPath(".//a[@class='p_author_face ']/@href")
+XPATH_AUTHOR_NAME = etree.XPath(".//a[@class='p_author_name j_user_card']/text()")
+XPATH_AUTHOR_AVATAR = etree.XPath(".//a[@class='p_author_face ']/img/@src")
+XPATH_TEXT = etree.XPath("./text()")
+
+XPATH_COMMENT = etree.XPath("//div[@class='l_post l_post_bright j_l_post clearfix  ']")
+
+XPATH_SUB_COMMENT_FIRST = etree.XPath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
+XPATH_SUB_COMMENT = etree.XPath("//li[@class='lzl_single_post j_lzl_s_p ']")
+XPATH_SUB_COMMENT_USER = etree.XPath("./a[@class='j_user_card lzl_p_p']")
+XPATH_SUB_COMMENT_CONTENT = etree.XPath(".//span[@class='lzl_content_main']")
+XPATH_SUB_COMMENT_TIME = etree.XPath(".//span[@class='lzl_time']/text()")
+XPATH_HREF = etree.XPath("./@href")
+XPATH_IMG_SRC = etree.XPath("./img/@src")
+
+XPATH_CREATOR_LINK = etree.XPath("//p[@class='space']/a/@href")
+XPATH_CREATOR_USERDATA = etree.XPath("//div[@class='userinfo_userdata']")
+XPATH_CREATOR_CONCERN_NUM = etree.XPath("//span[@class='concern_num']")
+XPATH_CREATOR_CONCERN_COUNT = etree.XPath("./a/text()")
+XPATH_CREATOR_NICKNAME = etree.XPath(".//span[@class='userinfo_username ']/text()")
+XPATH_CREATOR_AVATAR = etree.XPath(".//div[@class='userinfo_left_head']//img/@src")
+XPATH_CREATOR_THREAD_URL = etree.XPath("//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href")
+
+PUB_TIME_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}")
+
+
+class TiebaDocument:
+    """
+    解析一次的贴吧页面，提取方法都在同一棵 lxml 树上执行预编译的 XPath，解析参数和 parsel.Selector 一致
+    """
+
+    def __init__(self, page_content: str):
+        """
+        Args:
+            page_content: 页面内容的HTML字符串
+        """
+        self.page_content = page_content
+        body = page_content.strip().replace("\x00", "").encode("utf-8") or b"<html/>"
+        parser = lxml_html.HTMLParser(recover=True, encoding="utf-8", huge_tree=True)
+        root = etree.fromstring(body, parser=parser)
+        if root is None:
+            root = etree.fromstring(b"<html/>", parser=parser)
+        self.root = root
+
+    def xpath(self, xpath: etree.XPath, node=None) -> List:
+        return xpath(self.root if node is None else node)
+
+    def first(self, xpath: etree.XPath, node=None, default: str = "") -> str:
+        """
+        返回第一个匹配的文本或者属性值，没有时返回 default
+        """
+        result = self.xpath(xpath, node)
+        return str(result[0]) if result else default
+
+    @staticmethod
+    def to_html(node) -> str:
+        """
+        节点序列化成HTML，和 parsel.Selector.get() 的结果一致
+        """
+        if node is None:
+            return ""
+        return etree.tostring(node, method="html", encoding="unicode", with_tail=False)
+
 
 class TieBaExtractor:
     def __init__(self):
-        pass
+        self._last_document: Optional[TiebaDocument] = None
 
-    @staticmethod
-    def extract_search_note_list(page_content: str) -> List[TiebaNote]:
+    def parse(self, page_content: str) -> TiebaDocument:
+        """
+        解析页面，同一个页面连续调用多个提取方法时只解析一次
+        Args:
+            page_content: 页面内容的HTML字符串
+
+        Returns:
+            TiebaDocument
+        """
+        if self._last_document is None or self._last_document.page_content != page_content:
+            self._last_document = TiebaDocument(page_content)
+        return self._last_document
+
+    def extract_search_note_list(self, page_content: str) -> List[TiebaNote]:
         """
         提取贴吧帖子列表，这里提取的关键词搜索结果页的数据，还缺少帖子的回复数和回复页等数据
         Args:
@@ -40,23 +144,18 @@ class TieBaExtractor:
         Returns:
             包含帖子信息的字典列表
         """
-        xpath_selector = "//div[@class='s_post']"
-        post_list = Selector(text=page_content).xpath(xpath_selector)
+        document = self.parse(page_content)
         result: List[TiebaNote] = []
-        for post in post_list:
-            tieba_note = TiebaNote(note_id=post.xpath(".//span[@class='p_title']/a/@data-tid").get(default='').strip(),
-                                   title=post.xpath(".//span[@class='p_title']/a/text()").get(default='').strip(),
-                                   desc=post.xpath(".//div[@class='p_content']/text()").get(default='').strip(),
-                                   note_url=const.TIEBA_URL + post.xpath(".//span[@class='p_title']/a/@href").get(
-                                       default=''),
-                                   user_nickname=post.xpath(".//a[starts-with(@href, '/home/main')]/font/text()").get(
-                                       default='').strip(), user_link=const.TIEBA_URL + post.xpath(
-                    ".//a[starts-with(@href, '/home/main')]/@href").get(default=''),
-                                   tieba_name=post.xpath(".//a[@class='p_forum']/font/text()").get(default='').strip(),
-                                   tieba_link=const.TIEBA_URL + post.xpath(".//a[@class='p_forum']/@href").get(
-                                       default=''),
-                                   publish_time=post.xpath(".//font[@class='p_green p_date']/text()").get(
-                                       default='').strip(), )
+        for post in document.xpath(XPATH_SEARCH_POST):
+            tieba_note = TiebaNote(note_id=document.first(XPATH_SEARCH_POST_ID, post).strip(),
+                                   title=document.first(XPATH_SEARCH_POST_TITLE, post).strip(),
+                                   desc=document.first(XPATH_SEARCH_POST_DESC, post).strip(),
+                                   note_url=const.TIEBA_URL + document.first(XPATH_SEARCH_POST_HREF, post),
+                                   user_nickname=document.first(XPATH_SEARCH_POST_USER_NAME, post).strip(),
+                                   user_link=const.TIEBA_URL + document.first(XPATH_SEARCH_POST_USER_LINK, post),
+                                   tieba_name=document.first(XPATH_SEARCH_POST_FORUM_NAME, post).strip(),
+                                   tieba_link=const.TIEBA_URL + document.first(XPATH_SEARCH_POST_FORUM_LINK, post),
+                                   publish_time=document.first(XPATH_SEARCH_POST_TIME, post).strip(), )
             result.append(tieba_note)
         return result
 
@@ -70,27 +169,24 @@ class TieBaExtractor:
 
         """
         page_content = page_content.replace('<!--', "")
-        content_selector = Selector(text=page_content)
-        xpath_selector = "//ul[@id='thread_list']/li"
-        post_list = content_selector.xpath(xpath_selector)
+        document = self.parse(page_content)
+        post_list = document.xpath(XPATH_THREAD_LIST_POST)
+        # 整页共用的贴吧名称和链接只查一次
+        tieba_name = document.first(XPATH_TIEBA_NAME).strip()
+        tieba_link = const.TIEBA_URL + document.first(XPATH_TIEBA_LINK)
         result: List[TiebaNote] = []
-        for post_selector in post_list:
-            post_field_value: Dict = self.extract_data_field_value(post_selector)
+        for post, post_field_value in zip(post_list, self.extract_data_field_values(post_list)):
             if not post_field_value:
                 continue
             note_id = str(post_field_value.get("id"))
             tieba_note = TiebaNote(note_id=note_id,
-                                   title=post_selector.xpath(".//a[@class='j_th_tit ']/text()").get(default='').strip(),
-                                   desc=post_selector.xpath(
-                                       ".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()").get(
-                                       default='').strip(), note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                   user_link=const.TIEBA_URL + post_selector.xpath(
-                                       ".//a[@class='frs-author-name j_user_card ']/@href").get(default='').strip(),
+                                   title=document.first(XPATH_THREAD_LIST_TITLE, post).strip(),
+                                   desc=document.first(XPATH_THREAD_LIST_DESC, post).strip(),
+                                   note_url=const.TIEBA_URL + f"/p/{note_id}",
+                                   user_link=const.TIEBA_URL + document.first(XPATH_THREAD_LIST_USER_LINK, post).strip(),
                                    user_nickname=post_field_value.get("authoer_nickname") or post_field_value.get(
                                        "author_name"),
-                                   tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                                       default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                    "//a[@class='card_title_fname']/@href").get(default=''),
+                                   tieba_name=tieba_name, tieba_link=tieba_link,
                                    total_replay_num=post_field_value.get("reply_num", 0))
             result.append(tieba_note)
         return result
@@ -104,31 +200,26 @@ class TieBaExtractor:
         Returns:
 
         """
-        content_selector = Selector(text=page_content)
-        first_floor_selector = content_selector.xpath("//div[@class='p_postlist'][1]")
-        only_view_author_link = content_selector.xpath("//*[@id='lzonly_cntn']/@href").get(default='').strip()
+        document = self.parse(page_content)
+        first_floor_list = document.xpath(XPATH_FIRST_FLOOR)
+        first_floor = first_floor_list[0] if first_floor_list else None
+        only_view_author_link = document.first(XPATH_ONLY_VIEW_AUTHOR_LINK).strip()
         note_id = only_view_author_link.split("?")[0].split("/")[-1]
         # 帖子回复数、回复页数
-        thread_num_infos = content_selector.xpath(
-            "//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+        thread_num_infos = document.xpath(XPATH_THREAD_NUM_INFO)
         # IP地理位置、发表时间
-        other_info_content = content_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
-        ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-        note = TiebaNote(note_id=note_id, title=content_selector.xpath("//title/text()").get(default='').strip(),
-                         desc=content_selector.xpath("//meta[@name='description']/@content").get(default='').strip(),
+        ip_location, publish_time = self.extract_ip_and_pub_time_from_node(document, document.root)
+        note = TiebaNote(note_id=note_id, title=document.first(XPATH_TITLE).strip(),
+                         desc=document.first(XPATH_DESCRIPTION).strip(),
                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                         user_link=const.TIEBA_URL + first_floor_selector.xpath(
-                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                         user_nickname=first_floor_selector.xpath(
-                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                         user_avatar=first_floor_selector.xpath(".//a[@class='p_author_face ']/img/@src").get(
-                             default='').strip(),
-                         tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                             default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                "//a[@class='card_title_fname']/@href").get(default=''), ip_location=ip_location,
+                         user_link=const.TIEBA_URL + self._first_in_node(document, XPATH_AUTHOR_LINK, first_floor),
+                         user_nickname=self._first_in_node(document, XPATH_AUTHOR_NAME, first_floor),
+                         user_avatar=self._first_in_node(document, XPATH_AUTHOR_AVATAR, first_floor),
+                         tieba_name=document.first(XPATH_TIEBA_NAME).strip(),
+                         tieba_link=const.TIEBA_URL + document.first(XPATH_TIEBA_LINK), ip_location=ip_location,
                          publish_time=publish_time,
-                         total_replay_num=thread_num_infos[0].xpath("./text()").get(default='').strip(),
-                         total_replay_page=thread_num_infos[1].xpath("./text()").get(default='').strip(), )
+                         total_replay_num=document.first(XPATH_TEXT, thread_num_infos[0]).strip(),
+                         total_replay_page=document.first(XPATH_TEXT, thread_num_infos[1]).strip(), )
         note.title = note.title.replace(f"【{note.tieba_name}】_百度贴吧", "")
         return note
 
@@ -142,27 +233,22 @@ class TieBaExtractor:
         Returns:
 
         """
-        xpath_selector = "//div[@class='l_post l_post_bright j_l_post clearfix  ']"
-        comment_list = Selector(text=page_content).xpath(xpath_selector)
+        document = self.parse(page_content)
+        comment_list = document.xpath(XPATH_COMMENT)
+        tieba_name = document.first(XPATH_TIEBA_NAME).strip()
         result: List[TiebaComment] = []
-        for comment_selector in comment_list:
-            comment_field_value: Dict = self.extract_data_field_value(comment_selector)
+        for comment, comment_field_value in zip(comment_list, self.extract_data_field_values(comment_list)):
             if not comment_field_value:
                 continue
-            tieba_name = comment_selector.xpath("//a[@class='card_title_fname']/text()").get(default='').strip()
-            other_info_content = comment_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
-            ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
+            ip_location, publish_time = self.extract_ip_and_pub_time_from_node(document, comment)
             tieba_comment = TiebaComment(comment_id=str(comment_field_value.get("content").get("post_id")),
                                          sub_comment_count=comment_field_value.get("content").get("comment_num"),
                                          content=utils.extract_text_from_html(
                                              comment_field_value.get("content").get("content")),
                                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                         user_link=const.TIEBA_URL + comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                                         user_nickname=comment_selector.xpath(
-                                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                                         user_avatar=comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/img/@src").get(default='').strip(),
+                                         user_link=const.TIEBA_URL + document.first(XPATH_AUTHOR_LINK, comment).strip(),
+                                         user_nickname=document.first(XPATH_AUTHOR_NAME, comment).strip(),
+                                         user_avatar=document.first(XPATH_AUTHOR_AVATAR, comment).strip(),
                                          tieba_id=str(comment_field_value.get("content").get("forum_id", "")),
                                          tieba_name=tieba_name, tieba_link=f"https://tieba.baidu.com/f?kw={tieba_name}",
                                          ip_location=ip_location, publish_time=publish_time, note_id=note_id, )
@@ -179,23 +265,21 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(page_content)
+        document = self.parse(page_content)
         comments = []
-        comment_ele_list = selector.xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
-        comment_ele_list.extend(selector.xpath("//li[@class='lzl_single_post j_lzl_s_p ']"))
-        for comment_ele in comment_ele_list:
-            comment_value = self.extract_data_field_value(comment_ele)
+        comment_ele_list = document.xpath(XPATH_SUB_COMMENT_FIRST) + document.xpath(XPATH_SUB_COMMENT)
+        for comment_ele, comment_value in zip(comment_ele_list, self.extract_data_field_values(comment_ele_list)):
             if not comment_value:
                 continue
-            comment_user_a_selector = comment_ele.xpath("./a[@class='j_user_card lzl_p_p']")[0]
-            content = utils.extract_text_from_html(
-                comment_ele.xpath(".//span[@class='lzl_content_main']").get(default=""))
+            comment_user_a = document.xpath(XPATH_SUB_COMMENT_USER, comment_ele)[0]
+            content_list = document.xpath(XPATH_SUB_COMMENT_CONTENT, comment_ele)
+            content = utils.extract_text_from_html(document.to_html(content_list[0] if content_list else None))
             comment = TiebaComment(
                 comment_id=str(comment_value.get("spid")), content=content,
-                user_link=comment_user_a_selector.xpath("./@href").get(default=""),
+                user_link=document.first(XPATH_HREF, comment_user_a),
                 user_nickname=comment_value.get("showname"),
-                user_avatar=comment_user_a_selector.xpath("./img/@src").get(default=""),
-                publish_time=comment_ele.xpath(".//span[@class='lzl_time']/text()").get(default="").strip(),
+                user_avatar=document.first(XPATH_IMG_SRC, comment_user_a),
+                publish_time=document.first(XPATH_SUB_COMMENT_TIME, comment_ele).strip(),
                 parent_comment_id=parent_comment.comment_id,
                 note_id=parent_comment.note_id, note_url=parent_comment.note_url,
                 tieba_id=parent_comment.tieba_id, tieba_name=parent_comment.tieba_name,
@@ -213,23 +297,20 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(text=html_content)
-        user_link_selector = selector.xpath("//p[@class='space']/a")
-        user_link: str = user_link_selector.xpath("./@href").get(default='')
+        document = self.parse(html_content)
+        user_link: str = document.first(XPATH_CREATOR_LINK)
         user_link_params: Dict = parse_qs(unquote(user_link.split("?")[-1]))
         user_name = user_link_params.get("un")[0] if user_link_params.get("un") else ""
         user_id = user_link_params.get("id")[0] if user_link_params.get("id") else ""
-        userinfo_userdata_selector = selector.xpath("//div[@class='userinfo_userdata']")
-        follow_fans_selector = selector.xpath("//span[@class='concern_num']")
+        userinfo_userdata_list = document.xpath(XPATH_CREATOR_USERDATA)
+        follow_fans_list = document.xpath(XPATH_CREATOR_CONCERN_NUM)
         follows, fans = 0, 0
-        if len(follow_fans_selector) == 2:
-            follows, fans = self.extract_follow_and_fans(follow_fans_selector)
-        user_content = userinfo_userdata_selector.get(default='')
+        if len(follow_fans_list) == 2:
+            follows, fans = self.extract_follow_and_fans(document, follow_fans_list)
+        user_content = document.to_html(userinfo_userdata_list[0] if userinfo_userdata_list else None)
         return TiebaCreator(user_id=user_id, user_name=user_name,
-                            nickname=selector.xpath(".//span[@class='userinfo_username ']/text()").get(
-                                default='').strip(),
-                            avatar=selector.xpath(".//div[@class='userinfo_left_head']//img/@src").get(
-                                default='').strip(),
+                            nickname=document.first(XPATH_CREATOR_NICKNAME).strip(),
+                            avatar=document.first(XPATH_CREATOR_AVATAR).strip(),
                             gender=self.extract_gender(user_content),
                             ip_location=self.extract_ip(user_content),
                             follows=follows,
@@ -237,9 +318,8 @@ class TieBaExtractor:
                             registration_duration=self.extract_registration_duration(user_content)
                             )
 
-    @staticmethod
     def extract_tieba_thread_id_list_from_creator_page(
-        html_content: str
+        self, html_content: str
     ) -> List[str]:
         """
         提取贴吧创作者主页的帖子列表
@@ -249,30 +329,43 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(text=html_content)
+        document = self.parse(html_content)
         thread_id_list = []
-        xpath_selector = (
-            "//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href"
-        )
-        thread_url_list = selector.xpath(xpath_selector).getall()
-        for thread_url in thread_url_list:
+        for thread_url in document.xpath(XPATH_CREATOR_THREAD_URL):
             thread_id = thread_url.split("?")[0].split("/")[-1]
             thread_id_list.append(thread_id)
         return thread_id_list
 
-    def extract_ip_and_pub_time(self, html_content: str) -> Tuple[str, str]:
+    @staticmethod
+    def _first_in_node(document: TiebaDocument, xpath: etree.XPath, node) -> str:
         """
-        提取IP位置和发布时间
+        在可能不存在的节点中查找第一个匹配的值
+        """
+        if node is None:
+            return ""
+        return document.first(xpath, node).strip()
+
+    @staticmethod
+    def extract_ip_and_pub_time_from_node(document: TiebaDocument, node) -> Tuple[str, str]:
+        """
+        从节点下的第一个 post-tail-wrap 中提取IP位置和发布时间，直接查询节点，不再序列化成HTML后跑正则
         Args:
-            html_content:
+            document: 页面
+            node: 楼层节点或者页面根节点
 
         Returns:
 
         """
-        pattern_pub_time = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
-        time_match = pattern_pub_time.search(html_content)
-        pub_time = time_match.group(1) if time_match else ""
-        return self.extract_ip(html_content), pub_time
+        tail_list = document.xpath(XPATH_POST_TAIL, node)
+        if not tail_list:
+            return "", ""
+        ip = document.first(XPATH_POST_TAIL_IP, tail_list[0])[len("IP属地:"):].strip()
+        pub_time = ""
+        for tail_info in document.xpath(XPATH_POST_TAIL_INFO, tail_list[0]):
+            if PUB_TIME_PATTERN.fullmatch(tail_info):
+                pub_time = str(tail_info)
+                break
+        return ip, pub_time
 
     @staticmethod
     def extract_ip(html_content: str) -> str:
@@ -306,21 +399,19 @@ class TieBaExtractor:
         return '未知'
 
     @staticmethod
-    def extract_follow_and_fans(selectors: List[Selector]) -> Tuple[str, str]:
+    def extract_follow_and_fans(document: TiebaDocument, nodes: List) -> Tuple[str, str]:
         """
         提取关注数和粉丝数
         Args:
-            selectors:
+            document: 页面
+            nodes: 关注数、粉丝数的 concern_num 节点
 
         Returns:
 
         """
-        pattern = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
-        follow_match = pattern.findall(selectors[0].get())
-        fans_match = pattern.findall(selectors[1].get())
-        follows = follow_match[0] if follow_match else 0
-        fans = fans_match[0] if fans_match else 0
-        return follows, fans
+        follows = document.first(XPATH_CREATOR_CONCERN_COUNT, nodes[0]).strip()
+        fans = document.first(XPATH_CREATOR_CONCERN_COUNT, nodes[1]).strip()
+        return follows if follows.isdigit() else 0, fans if fans.isdigit() else 0
 
     @staticmethod
     def extract_registration_duration(html_content: str) -> str:
@@ -334,20 +425,41 @@ class TieBaExtractor:
         return match.group(1) if match else ""
 
     @staticmethod
-    def extract_data_field_value(selector: Selector) -> Dict:
+    def extract_data_field_values(nodes: List) -> List[Dict]:
         """
-        提取data-field的值
+        批量提取多个节点的 data-field 值：拼成一个 JSON 数组只解码一次，解码失败时再逐个解码
         Args:
-            selector:
+            nodes: 节点列表
 
         Returns:
+            List[Dict]: 和节点一一对应，没有 data-field 的节点对应空字典
 
         """
-        data_field_value = selector.xpath("./@data-field").get(default='').strip()
-        if not data_field_value or data_field_value == "{}":
-            return {}
+        raw_values = [(node.get("data-field") or "").strip() for node in nodes]
+        indexes = [index for index, raw_value in enumerate(raw_values) if raw_value and raw_value != "{}"]
+        values: List[Dict] = [{} for _ in nodes]
+        if not indexes:
+            return values
         try:
             # 先使用 html.unescape 处理转义字符 再json.loads 将 JSON 字符串转换为 Python 字典
+            decoded = json.loads(html.unescape("[" + ",".join(raw_values[index] for index in indexes) + "]"))
+        except Exception:
+            decoded = [TieBaExtractor.decode_data_field_value(raw_values[index]) for index in indexes]
+        for index, value in zip(indexes, decoded):
+            values[index] = value
+        return values
+
+    @staticmethod
+    def decode_data_field_value(data_field_value: str) -> Dict:
+        """
+        解码一个 data-field 的值
+        Args:
+            data_field_value: data-field 属性值
+
+        Returns:
+
+        """
+        try:
             unescaped_json_str = html.unescape(data_field_value)
             data_field_dict_value = json.loads(unescaped_json_str)
         except Exception as ex:
@@ -355,7 +467,6 @@ class TieBaExtractor:
             data_field_dict_value = {}
         return data_field_dict_value
 
-
 def test_extract_search_note_list():
     with open("test_data/search_keyword_notes.html", "r", encoding="utf-8") as f:
         content = f.read()
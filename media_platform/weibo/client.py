@@ -27,6 +27,8 @@ from playwright.async_api import BrowserContext, Page
 
 import config
 from tools import utils
+from tools.media_download import submit_media_download
+from var import crawl_budget_var
 
 from .exception import DataFetchError
 from .field import SearchType
@@ -52,6 +54,7 @@ class WeiboClient:
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
+        crawl_budget_var.get().record_request()
         async with httpx.AsyncClient(proxies=self.proxies) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
@@ -171,6 +174,9 @@ class WeiboClient:
         max_id = -1
         max_id_type = 0
         while not is_end and len(result) < max_count:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
             max_id: int = comments_res.get("max_id")
             max_id_type: int = comments_res.get("max_id_type")
@@ -238,7 +244,7 @@ class WeiboClient:
                 utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
                 return dict()
 
-    async def get_note_image(self, image_url: str) -> bytes:
+    def _make_note_image_url(self, image_url: str) -> str:
         image_url = image_url[8:]  # 去掉 https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -251,14 +257,24 @@ class WeiboClient:
                 image_url += sub_url[i] + "/"
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
-        final_uri = (f"{self._image_agent_host}" f"{image_url}")
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", final_uri, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        return f"{self._image_agent_host}" f"{image_url}"
+
+    async def download_note_image(self, image_url: str, file_path: str, media_key: Optional[str] = None,
+                                  note_id: Optional[str] = None) -> None:
+        """
+        下载任务提交到媒体下载池后立即返回（未开启下载池时直接下载），流式下载微博图片的高清大图到 file_path，分块写入临时文件后原子重命名
+        Args:
+            image_url: 图片地址
+            file_path: 保存路径
+            media_key: 媒体ID，开启媒体文件库时用于跳过已经下载过的媒体
+            note_id: 微博ID，写入媒体清单
+
+        Returns:
+
+        """
+        await submit_media_download(self._make_note_image_url(image_url), file_path,
+                                    proxies=self.proxies, timeout=self.timeout, media_key=media_key,
+                                    content_id=note_id)
 
 
 
@@ -29,7 +29,9 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.seen_index import SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS
+from var import (crawl_budget_var, crawler_type_var, seen_index_var,
+                 source_keyword_var)
 
 from .client import WeiboClient
 from .exception import DataFetchError
@@ -112,11 +114,19 @@ class WeiboCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        crawl_budget = crawl_budget_var.get()
+        keywords = config.KEYWORDS.split(",")
+        for keyword_index, keyword in enumerate(keywords):
+            if crawl_budget.is_exhausted():
+                break
+            crawl_budget.begin_slice(len(keywords) - keyword_index)
             source_keyword_var.set(keyword)
             utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
             page = 1
             while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                if crawl_budget.is_slice_exhausted():
+                    utils.logger.info(f"[WeiboCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at page: {page}")
+                    break
                 if page < start_page:
                     utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
                     page += 1
@@ -164,6 +174,11 @@ class WeiboCrawler(AbstractCrawler):
         :return:
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return None
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT, note_id):
+                utils.logger.info(f"[WeiboCrawler.get_note_info_task] note_id: {note_id} was crawled recently, skip")
+                return None
             try:
                 result = await self.wb_client.get_note_info_by_id(note_id)
                 return result
@@ -184,6 +199,9 @@ class WeiboCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             utils.logger.info(f"[WeiboCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
+        if crawl_budget_var.get().is_exhausted():
+            utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] Crawl budget is used up, skip comments of notes: {note_id_list}")
+            return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
@@ -201,6 +219,11 @@ class WeiboCrawler(AbstractCrawler):
         :return:
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT_COMMENTS, note_id):
+                utils.logger.info(f"[WeiboCrawler.get_note_comments] comments of note_id: {note_id} were crawled recently, skip")
+                return
             try:
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
                 await self.wb_client.get_note_all_comments(
@@ -231,10 +254,10 @@ class WeiboCrawler(AbstractCrawler):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.wb_client.get_note_image(url)
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(pic["pid"], content, extension_file_name)
+            extension_file_name = url.split(".")[-1]
+            await self.wb_client.download_note_image(
+                url, weibo_store.make_weibo_note_image_file_path(pic["pid"], extension_file_name),
+                media_key=f"wb:{pic['pid']}", note_id=str(mblog.get("id")))
 
 
     async def get_creators_and_notes(self) -> None:
@@ -244,7 +267,10 @@ class WeiboCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
+        crawl_budget = crawl_budget_var.get()
         for user_id in config.WEIBO_CREATOR_ID_LIST:
+            if crawl_budget.is_exhausted():
+                break
             createor_info_res: Dict = await self.wb_client.get_creator_info_by_id(creator_id=user_id)
             if createor_info_res:
                 createor_info: Dict = createor_info_res.get("userInfo", {})
@@ -330,3 +356,8 @@ class WeiboCrawler(AbstractCrawler):
                 user_agent=user_agent
             )
             return browser_context
+
+    async def close(self):
+        """Close browser context"""
+        await self.browser_context.close()
+        utils.logger.info("[WeiboCrawler.close] Browser context closed ...")
@@ -11,7 +11,6 @@
 
 import asyncio
 import json
-import re
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
@@ -22,11 +21,14 @@ from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_download import submit_media_download
+from var import crawl_budget_var
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
-from .help import get_search_id, sign
+from .help import (extract_initial_state, get_search_id, sign,
+                   transform_json_keys)
 
 
 class XiaoHongShuClient(AbstractApiClient):
@@ -96,6 +98,7 @@ class XiaoHongShuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop("return_response", False)
 
+        crawl_budget_var.get().record_request()
         async with httpx.AsyncClient(proxies=self.proxies) as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
@@ -155,16 +158,21 @@ class XiaoHongShuClient(AbstractApiClient):
             **kwargs,
         )
 
-    async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                )
-                return None
-            else:
-                return response.content
+    async def download_note_media(self, url: str, file_path: str, media_key: Optional[str] = None,
+                                  note_id: Optional[str] = None) -> None:
+        """
+        下载任务提交到媒体下载池后立即返回（未开启下载池时直接下载），流式下载笔记图片、视频到 file_path，分块写入临时文件后原子重命名，不会把整个文件读进内存
+        Args:
+            url: 图片、视频地址
+            file_path: 保存路径
+            media_key: 媒体ID，开启媒体文件库时用于跳过已经下载过的媒体
+            note_id: 笔记ID，写入媒体清单
+
+        Returns:
+
+        """
+        await submit_media_download(url, file_path, proxies=self.proxies, timeout=self.timeout, media_key=media_key,
+                                    content_id=note_id)
 
     async def pong(self) -> bool:
         """
@@ -343,6 +351,9 @@ class XiaoHongShuClient(AbstractApiClient):
         comments_has_more = True
         comments_cursor = ""
         while comments_has_more and len(result) < max_count:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             comments_res = await self.get_note_comments(
                 note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
             )
@@ -408,6 +419,9 @@ class XiaoHongShuClient(AbstractApiClient):
             sub_comment_cursor = comment.get("sub_comment_cursor")
 
             while sub_comment_has_more:
+                # 预算用完后不再请求下一页评论
+                if crawl_budget_var.get().is_exhausted():
+                    break
                 comments_res = await self.get_note_sub_comments(
                     note_id=note_id,
                     root_comment_id=root_comment_id,
@@ -445,17 +459,7 @@ class XiaoHongShuClient(AbstractApiClient):
         html_content = await self.request(
             "GET", self._domain + uri, return_response=True, headers=self.headers
         )
-        match = re.search(
-            r"<script>window.__INITIAL_STATE__=(.+)<\/script>", html_content, re.M
-        )
-
-        if match is None:
-            return {}
-
-        info = json.loads(match.group(1).replace(":undefined", ":null"), strict=False)
-        if info is None:
-            return {}
-        return info.get("user").get("userPageData")
+        return extract_initial_state(html_content, ["user", "userPageData"]) or {}
 
     async def get_notes_by_creator(
         self, creator: str, cursor: str, page_size: int = 30
@@ -558,32 +562,6 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-
-        def camel_to_underscore(key):
-            return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
-
-        def transform_json_keys(json_data):
-            data_dict = json.loads(json_data)
-            dict_new = {}
-            for key, value in data_dict.items():
-                new_key = camel_to_underscore(key)
-                if not value:
-                    dict_new[new_key] = value
-                elif isinstance(value, dict):
-                    dict_new[new_key] = transform_json_keys(json.dumps(value))
-                elif isinstance(value, list):
-                    dict_new[new_key] = [
-                        (
-                            transform_json_keys(json.dumps(item))
-                            if (item and isinstance(item, dict))
-                            else item
-                        )
-                        for item in value
-                    ]
-                else:
-                    dict_new[new_key] = value
-            return dict_new
-
         url = (
             "https://www.xiaohongshu.com/explore/"
             + note_id
@@ -598,14 +576,11 @@ class XiaoHongShuClient(AbstractApiClient):
         )
 
         def get_note_dict(html):
-            state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[
-                0
-            ].replace("undefined", '""')
-
-            if state != "{}":
-                note_dict = transform_json_keys(state)
-                return note_dict["note"]["note_detail_map"][note_id]["note"]
-            return {}
+            # 只解码这篇笔记的详情子对象，undefined 仍然替换成空字符串，和之前的字段值保持一致
+            note = extract_initial_state(html, ["note", "noteDetailMap", note_id, "note"], undefined_value='""')
+            if note is None:
+                return None
+            return transform_json_keys(note)
 
         try:
             return get_note_dict(html)
@@ -26,7 +26,11 @@ from model.m_xiaohongshu import NoteUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.media_blob_store import make_url_media_key
+from tools.seen_index import (SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS,
+                              SEEN_KIND_CREATOR)
+from var import (crawl_budget_var, crawler_type_var, seen_index_var,
+                 source_keyword_var)
 
 from .client import XiaoHongShuClient
 from .exception import DataFetchError
@@ -117,7 +121,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        crawl_budget = crawl_budget_var.get()
+        keywords = config.KEYWORDS.split(",")
+        for keyword_index, keyword in enumerate(keywords):
+            if crawl_budget.is_exhausted():
+                break
+            crawl_budget.begin_slice(len(keywords) - keyword_index)
             source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
@@ -127,6 +136,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
             while (
                 page - start_page + 1
             ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                if crawl_budget.is_slice_exhausted():
+                    utils.logger.info(
+                        f"[XiaoHongShuCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at page {page}"
+                    )
+                    break
                 if page < start_page:
                     utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
                     page += 1
@@ -188,13 +202,21 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info(
             "[XiaoHongShuCrawler.get_creators_and_notes] Begin get xiaohongshu creators"
         )
+        crawl_budget = crawl_budget_var.get()
         for user_id in config.XHS_CREATOR_ID_LIST:
-            # get creator detail info from web html content
-            createor_info: Dict = await self.xhs_client.get_creator_info(
-                user_id=user_id
-            )
-            if createor_info:
-                await xhs_store.save_creator(user_id, creator=createor_info)
+            if crawl_budget.is_exhausted():
+                break
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CREATOR, user_id):
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.get_creators_and_notes] Creator info of user_id: {user_id} was crawled recently, skip"
+                )
+            else:
+                # get creator detail info from web html content
+                createor_info: Dict = await self.xhs_client.get_creator_info(
+                    user_id=user_id
+                )
+                if createor_info:
+                    await xhs_store.save_creator(user_id, creator=createor_info)
 
             # When proxy is not enabled, increase the crawling interval
             if config.ENABLE_IP_PROXY:
@@ -286,6 +308,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
         """
         note_detail_from_html, note_detail_from_api = None, None
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return None
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT, note_id):
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.get_note_detail_async_task] note_id: {note_id} was crawled recently, skip"
+                )
+                return None
             # When proxy is not enabled, increase the crawling interval
             if config.ENABLE_IP_PROXY:
                 crawl_interval = random.random()
@@ -342,6 +371,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 f"[XiaoHongShuCrawler.batch_get_note_comments] Crawling comment mode is not enabled"
             )
             return
+        if crawl_budget_var.get().is_exhausted():
+            utils.logger.info(
+                f"[XiaoHongShuCrawler.batch_get_note_comments] Crawl budget is used up, skip comments of notes: {note_list}"
+            )
+            return
 
         utils.logger.info(
             f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}"
@@ -363,6 +397,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
     ):
         """Get note comments with keyword filtering and quantity limitation"""
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT_COMMENTS, note_id):
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.get_comments] Comments of note_id: {note_id} were crawled recently, skip"
+                )
+                return
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}"
             )
@@ -474,23 +515,19 @@ class XiaoHongShuCrawler(AbstractCrawler):
         note_id = note_item.get("note_id")
         image_list: List[Dict] = note_item.get("image_list", [])
 
-        for img in image_list:
-            if img.get("url_default") != "":
-                img.update({"url": img.get("url_default")})
-
         if not image_list:
             return
         picNum = 0
         for pic in image_list:
-            url = pic.get("url")
+            # 按 XHS_IMAGE_FORMAT_PREFERENCE 选择格式，同一张图片不同格式的文件分开保存
+            url, image_format = xhs_store.get_preferred_image_url(pic)
             if not url:
                 continue
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
-            extension_file_name = f"{picNum}.jpg"
+            extension_file_name = f"{picNum}.{image_format}"
             picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            await self.xhs_client.download_note_media(
+                url, xhs_store.make_xhs_note_media_file_path(note_id, extension_file_name),
+                media_key=f"{make_url_media_key('xhs', url)}:{image_format}", note_id=note_id)
 
     async def get_notice_video(self, note_item: Dict):
         """
@@ -508,9 +545,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
             return
         videoNum = 0
         for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
             extension_file_name = f"{videoNum}.mp4"
             videoNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            await self.xhs_client.download_note_media(
+                url, xhs_store.make_xhs_note_media_file_path(note_id, extension_file_name),
+                media_key=make_url_media_key("xhs", url), note_id=note_id)
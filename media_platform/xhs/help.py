@@ -10,10 +10,13 @@
 
 
 import ctypes
+import functools
 import json
 import random
+import re
 import time
 import urllib.parse
+from typing import Any, List, Optional, Tuple
 
 from model.m_xiaohongshu import NoteUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
@@ -306,6 +309,149 @@ def parse_note_info_from_note_url(url: str) -> NoteUrlInfo:
     return NoteUrlInfo(note_id=note_id, xsec_token=xsec_token, xsec_source=xsec_source)
 
 
+CAMEL_CASE_BOUNDARY_PATTERN = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+@functools.lru_cache(maxsize=4096)
+def camel_to_underscore(key: str) -> str:
+    """
+    驼峰转下划线，eg: noteDetailMap -> note_detail_map
+    页面状态里的字段名是有限的几百个，结果缓存起来，同一个字段名只做一次正则替换
+    """
+    return CAMEL_CASE_BOUNDARY_PATTERN.sub("_", key).lower()
+
+
+def transform_json_keys(data: Any) -> Any:
+    """
+    把已经解析好的 JSON 对象中所有字典的键（包括嵌套的字典、列表中的字典）从驼峰转成下划线，只遍历一次
+    Args:
+        data: json.loads 的结果
+
+    Returns:
+        Any: 转换后的新对象
+
+    """
+    if isinstance(data, dict):
+        return {camel_to_underscore(key): transform_json_keys(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [transform_json_keys(item) for item in data]
+    return data
+
+
+INITIAL_STATE_PREFIX = "window.__INITIAL_STATE__="
+JS_UNDEFINED = "undefined"
+JSON_ESCAPE_PATTERN = re.compile(r"\\.", re.S)
+JSON_WHITESPACE_PATTERN = re.compile(r"\s*")
+
+
+def find_initial_state(html: str) -> Optional[str]:
+    """
+    按位置定位页面中 window.__INITIAL_STATE__ 的赋值语句，不再用 ({.*}) 正则匹配整个页面
+    Args:
+        html: 网页
+
+    Returns:
+        Optional[str]: 页面状态的 JS 对象字面量，没有时为 None
+
+    """
+    start = html.find(INITIAL_STATE_PREFIX)
+    if start < 0:
+        return None
+    start += len(INITIAL_STATE_PREFIX)
+    # 脚本中的字符串不可能包含 </script>，否则浏览器也会在这里结束脚本
+    end = html.find("</script>", start)
+    state = html[start:end if end >= 0 else len(html)].strip().rstrip(";")
+    return state if state.startswith("{") else None
+
+
+def js_to_json(text: str, undefined_value: str = "null") -> str:
+    """
+    把 JS 字面量 undefined 替换成 JSON 的值，字符串里的 "undefined" 文本保持不变。
+    按 undefined 切分后，根据前面未转义的引号个数的奇偶判断每一处是否在字符串里，全部是 C 实现的字符串操作
+    Args:
+        text: JS 对象字面量
+        undefined_value: 替换成的 JSON 值
+
+    Returns:
+        str: JSON 文本
+
+    """
+    if JS_UNDEFINED not in text:
+        return text
+    parts = text.split(JS_UNDEFINED)
+    output = [parts[0]]
+    in_string = False
+    for index in range(1, len(parts)):
+        # undefined 里没有引号和反斜杠，转义序列不会被切开
+        if JSON_ESCAPE_PATTERN.sub("", parts[index - 1]).count('"') % 2:
+            in_string = not in_string
+        output.append(JS_UNDEFINED if in_string else undefined_value)
+        output.append(parts[index])
+    return "".join(output)
+
+
+def decode_state_subtree(state: str, path: List[str], undefined_value: str = "null") -> Optional[Tuple[Any, List[str]]]:
+    """
+    只解码 path 上某个键对应的子对象，不解码整个页面状态。
+    从 path 最后一个键往前找在页面状态中只出现一次、并且 path 上前面的键都出现在它之前的键，
+    从这个键的值开始用 raw_decode 解码，解码完这个值就停止，undefined 的替换也只处理这个键之后的文本
+    Args:
+        state: 页面状态文本
+        path: 子对象的键路径
+        undefined_value: JS 字面量 undefined 替换成的 JSON 值
+
+    Returns:
+        Optional[Tuple[Any, List[str]]]: (子对象, 剩余的键路径)，找不到可以单独解码的键时为 None
+
+    """
+    for index in range(len(path) - 1, -1, -1):
+        pattern = json.dumps(path[index], ensure_ascii=False) + ":"
+        if state.count(pattern) != 1:
+            continue
+        start = state.index(pattern)
+        if start > 0 and state[start - 1] == "\\":
+            # 出现在字符串里（转义的引号），不是键
+            continue
+        if any(state.rfind(json.dumps(key, ensure_ascii=False) + ":", 0, start) < 0 for key in path[:index]):
+            continue
+        # 从键的起始引号开始切分，undefined 替换时的引号奇偶判断不受前面文本影响
+        text = js_to_json(state[start:], undefined_value)
+        value_start = JSON_WHITESPACE_PATTERN.match(text, len(pattern)).end()
+        try:
+            data, _ = json.JSONDecoder(strict=False).raw_decode(text, value_start)
+        except ValueError:
+            return None
+        return data, path[index + 1:]
+    return None
+
+
+def extract_initial_state(html: str, path: List[str], undefined_value: str = "null") -> Optional[Any]:
+    """
+    从网页中取出 window.__INITIAL_STATE__ 里 path 对应的子对象，
+    path 上有只出现一次的键时只解码这个键对应的子对象，否则解码整个页面状态
+    Args:
+        html: 网页
+        path: 子对象的键路径（页面状态中的原始键名），eg: ["note", "noteDetailMap", note_id, "note"]
+        undefined_value: JS 字面量 undefined 替换成的 JSON 值
+
+    Returns:
+        Optional[Any]: 子对象，页面中没有页面状态或者没有这个路径时为 None
+
+    """
+    state = find_initial_state(html)
+    if state is None:
+        return None
+    subtree = decode_state_subtree(state, path, undefined_value)
+    if subtree is not None:
+        data, path = subtree
+    else:
+        data = json.loads(js_to_json(state, undefined_value), strict=False)
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
 if __name__ == '__main__':
     _img_url = "https://sns-img-bd.xhscdn.com/7a3abfaf-90c1-a828-5de7-022c80b92aa3"
     # 获取一个图片地址在多个cdn下的url地址
@@ -25,6 +25,7 @@ from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
+from var import crawl_budget_var
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
@@ -79,6 +80,7 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
+        crawl_budget_var.get().record_request()
         async with httpx.AsyncClient(proxies=self.proxies, ) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
@@ -276,6 +278,9 @@ class ZhiHuClient(AbstractApiClient):
         offset: str = ""
         limit: int = 10
         while not is_end:
+            # 预算用完后不再请求下一页评论
+            if crawl_budget_var.get().is_exhausted():
+                break
             root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
             if not root_comment_res:
                 break
@@ -320,6 +325,9 @@ class ZhiHuClient(AbstractApiClient):
             offset: str = ""
             limit: int = 10
             while not is_end:
+                # 预算用完后不再请求下一页评论
+                if crawl_budget_var.get().is_exhausted():
+                    break
                 child_comment_res = await self.get_child_comments(parment_comment.comment_id, offset, limit)
                 if not child_comment_res:
                     break
@@ -26,7 +26,9 @@ from model.m_zhihu import ZhihuContent, ZhihuCreator
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.seen_index import SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS
+from var import (crawl_budget_var, crawler_type_var, seen_index_var,
+                 source_keyword_var)
 
 from .client import ZhiHuClient
 from .exception import DataFetchError
@@ -113,11 +115,19 @@ class ZhihuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < zhihu_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = zhihu_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        crawl_budget = crawl_budget_var.get()
+        keywords = config.KEYWORDS.split(",")
+        for keyword_index, keyword in enumerate(keywords):
+            if crawl_budget.is_exhausted():
+                break
+            crawl_budget.begin_slice(len(keywords) - keyword_index)
             source_keyword_var.set(keyword)
             utils.logger.info(f"[ZhihuCrawler.search] Current search keyword: {keyword}")
             page = 1
             while (page - start_page + 1) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                if crawl_budget.is_slice_exhausted():
+                    utils.logger.info(f"[ZhihuCrawler.search] Crawl budget for keyword: {keyword} is used up, stop at page {page}")
+                    break
                 if page < start_page:
                     utils.logger.info(f"[ZhihuCrawler.search] Skip page {page}")
                     page += 1
@@ -155,6 +165,9 @@ class ZhihuCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled")
             return
+        if crawl_budget_var.get().is_exhausted():
+            utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawl budget is used up, skip comments")
+            return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
@@ -174,6 +187,12 @@ class ZhihuCrawler(AbstractCrawler):
 
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT_COMMENTS, content_item.content_id):
+                utils.logger.info(
+                    f"[ZhihuCrawler.get_comments] Comments of content_id: {content_item.content_id} were crawled recently, skip")
+                return
             utils.logger.info(f"[ZhihuCrawler.get_comments] Begin get note id comments {content_item.content_id}")
             await self.zhihu_client.get_note_all_comments(
                 content=content_item,
@@ -188,7 +207,10 @@ class ZhihuCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[ZhihuCrawler.get_creators_and_notes] Begin get xiaohongshu creators")
+        crawl_budget = crawl_budget_var.get()
         for user_link in config.ZHIHU_CREATOR_URL_LIST:
+            if crawl_budget.is_exhausted():
+                break
             utils.logger.info(f"[ZhihuCrawler.get_creators_and_notes] Begin get creator {user_link}")
             user_url_token = user_link.split("/")[-1]
             # get creator detail info from web html content
@@ -240,6 +262,14 @@ class ZhihuCrawler(AbstractCrawler):
 
         """
         async with semaphore:
+            if crawl_budget_var.get().is_exhausted():
+                return None
+            # 回答、文章、视频链接的最后一段都是内容ID
+            if await seen_index_var.get().is_fresh(SEEN_KIND_CONTENT, full_note_url.split("/")[-1]):
+                utils.logger.info(
+                    f"[ZhihuCrawler.get_specified_notes] Note {full_note_url} was crawled recently, skip"
+                )
+                return None
             utils.logger.info(
                 f"[ZhihuCrawler.get_specified_notes] Begin get specified note {full_note_url}"
             )
@@ -0,0 +1,97 @@
+-- ----------------------------
+-- 为已有的表增加自然主键(帖子ID、评论ID、用户ID)上的唯一索引, 入库改为 INSERT ... ON DUPLICATE KEY UPDATE 批量写入
+-- 适用于使用旧版本 schema/tables.sql 建表的数据库, 新建库直接执行 schema/tables.sql 即可
+-- 执行前请先备份数据, 重复的记录只保留自增ID最大(最后写入)的那一条
+-- 执行方式: mysql -u root -p media_crawler < schema/migrations/001_unique_natural_keys.sql
+-- ----------------------------
+
+DELETE t1 FROM `bilibili_video` t1 INNER JOIN `bilibili_video` t2 ON t1.`video_id` = t2.`video_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `bilibili_video`
+    DROP INDEX `idx_bilibili_vi_video_i_31c36e`,
+    ADD UNIQUE KEY `idx_bilibili_vi_video_i_31c36e` (`video_id`);
+
+DELETE t1 FROM `bilibili_video_comment` t1 INNER JOIN `bilibili_video_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `bilibili_video_comment`
+    DROP INDEX `idx_bilibili_vi_comment_41c34e`,
+    ADD UNIQUE KEY `idx_bilibili_vi_comment_41c34e` (`comment_id`);
+
+DELETE t1 FROM `bilibili_up_info` t1 INNER JOIN `bilibili_up_info` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `bilibili_up_info`
+    DROP INDEX `idx_bilibili_vi_user_123456`,
+    ADD UNIQUE KEY `idx_bilibili_vi_user_123456` (`user_id`);
+
+DELETE t1 FROM `douyin_aweme` t1 INNER JOIN `douyin_aweme` t2 ON t1.`aweme_id` = t2.`aweme_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `douyin_aweme`
+    DROP INDEX `idx_douyin_awem_aweme_i_6f7bc6`,
+    ADD UNIQUE KEY `idx_douyin_awem_aweme_i_6f7bc6` (`aweme_id`);
+
+DELETE t1 FROM `douyin_aweme_comment` t1 INNER JOIN `douyin_aweme_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `douyin_aweme_comment`
+    DROP INDEX `idx_douyin_awem_comment_fcd7e4`,
+    ADD UNIQUE KEY `idx_douyin_awem_comment_fcd7e4` (`comment_id`);
+
+DELETE t1 FROM `dy_creator` t1 INNER JOIN `dy_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `dy_creator`
+    ADD UNIQUE KEY `idx_dy_creator_user_id` (`user_id`);
+
+DELETE t1 FROM `kuaishou_video` t1 INNER JOIN `kuaishou_video` t2 ON t1.`video_id` = t2.`video_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `kuaishou_video`
+    DROP INDEX `idx_kuaishou_vi_video_i_c5c6a6`,
+    ADD UNIQUE KEY `idx_kuaishou_vi_video_i_c5c6a6` (`video_id`);
+
+DELETE t1 FROM `kuaishou_video_comment` t1 INNER JOIN `kuaishou_video_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `kuaishou_video_comment`
+    DROP INDEX `idx_kuaishou_vi_comment_ed48fa`,
+    ADD UNIQUE KEY `idx_kuaishou_vi_comment_ed48fa` (`comment_id`);
+
+DELETE t1 FROM `weibo_note` t1 INNER JOIN `weibo_note` t2 ON t1.`note_id` = t2.`note_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `weibo_note`
+    DROP INDEX `idx_weibo_note_note_id_f95b1a`,
+    ADD UNIQUE KEY `idx_weibo_note_note_id_f95b1a` (`note_id`);
+
+DELETE t1 FROM `weibo_note_comment` t1 INNER JOIN `weibo_note_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `weibo_note_comment`
+    DROP INDEX `idx_weibo_note__comment_c7611c`,
+    ADD UNIQUE KEY `idx_weibo_note__comment_c7611c` (`comment_id`);
+
+DELETE t1 FROM `weibo_creator` t1 INNER JOIN `weibo_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `weibo_creator`
+    ADD UNIQUE KEY `idx_weibo_creator_user_id` (`user_id`);
+
+DELETE t1 FROM `xhs_note` t1 INNER JOIN `xhs_note` t2 ON t1.`note_id` = t2.`note_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `xhs_note`
+    DROP INDEX `idx_xhs_note_note_id_209457`,
+    ADD UNIQUE KEY `idx_xhs_note_note_id_209457` (`note_id`);
+
+DELETE t1 FROM `xhs_note_comment` t1 INNER JOIN `xhs_note_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `xhs_note_comment`
+    DROP INDEX `idx_xhs_note_co_comment_8e8349`,
+    ADD UNIQUE KEY `idx_xhs_note_co_comment_8e8349` (`comment_id`);
+
+DELETE t1 FROM `xhs_creator` t1 INNER JOIN `xhs_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `xhs_creator`
+    ADD UNIQUE KEY `idx_xhs_creator_user_id` (`user_id`);
+
+DELETE t1 FROM `tieba_note` t1 INNER JOIN `tieba_note` t2 ON t1.`note_id` = t2.`note_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `tieba_note`
+    DROP INDEX `idx_tieba_note_note_id`,
+    ADD UNIQUE KEY `idx_tieba_note_note_id` (`note_id`);
+
+DELETE t1 FROM `tieba_comment` t1 INNER JOIN `tieba_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `tieba_comment`
+    DROP INDEX `idx_tieba_comment_comment_id`,
+    ADD UNIQUE KEY `idx_tieba_comment_comment_id` (`comment_id`);
+
+DELETE t1 FROM `tieba_creator` t1 INNER JOIN `tieba_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `tieba_creator`
+    ADD UNIQUE KEY `idx_tieba_creator_user_id` (`user_id`);
+
+DELETE t1 FROM `zhihu_content` t1 INNER JOIN `zhihu_content` t2 ON t1.`content_id` = t2.`content_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `zhihu_content`
+    DROP INDEX `idx_zhihu_content_content_id`,
+    ADD UNIQUE KEY `idx_zhihu_content_content_id` (`content_id`);
+
+DELETE t1 FROM `zhihu_comment` t1 INNER JOIN `zhihu_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` < t2.`id`;
+ALTER TABLE `zhihu_comment`
+    DROP INDEX `idx_zhihu_comment_comment_id`,
+    ADD UNIQUE KEY `idx_zhihu_comment_comment_id` (`comment_id`);
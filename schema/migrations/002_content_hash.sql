@@ -0,0 +1,26 @@
+-- ----------------------------
+-- 为帖子、评论、创作者表增加 content_hash 字段, 入库前先用 WHERE id IN (...) 批量查询ID和内容哈希
+-- 适用于使用旧版本 schema/tables.sql 建表的数据库, 新建库直接执行 schema/tables.sql 即可
+-- 执行方式: mysql -u root -p media_crawler < schema/migrations/002_content_hash.sql
+-- ----------------------------
+
+alter table `bilibili_video` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `bilibili_video_comment` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `bilibili_up_info` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `douyin_aweme` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `douyin_aweme_comment` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `dy_creator` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `kuaishou_video` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `kuaishou_video_comment` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `weibo_note` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `weibo_note_comment` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `weibo_creator` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `xhs_creator` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `xhs_note` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `xhs_note_comment` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `tieba_note` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `tieba_comment` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `tieba_creator` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `zhihu_content` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `zhihu_comment` add column `content_hash` char(32) default null comment '记录内容哈希';
+alter table `zhihu_creator` add column `content_hash` char(32) default null comment '记录内容哈希';
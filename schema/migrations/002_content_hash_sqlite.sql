@@ -0,0 +1,26 @@
+-- ----------------------------
+-- 为 SQLite 库中的帖子、评论、创作者表增加 content_hash 字段
+-- 适用于使用旧版本 schema/sqlite_tables.sql 建表的数据库, 新建库会自动按 schema/sqlite_tables.sql 建表
+-- 执行方式: sqlite3 data/sqlite/media_crawler.db < schema/migrations/002_content_hash_sqlite.sql
+-- ----------------------------
+
+ALTER TABLE `bilibili_video` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `bilibili_video_comment` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `bilibili_up_info` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `douyin_aweme` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `douyin_aweme_comment` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `dy_creator` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `kuaishou_video` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `kuaishou_video_comment` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `weibo_note` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `weibo_note_comment` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `weibo_creator` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `xhs_creator` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `xhs_note` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `xhs_note_comment` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `tieba_note` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `tieba_comment` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `tieba_creator` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `zhihu_content` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `zhihu_comment` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
+ALTER TABLE `zhihu_creator` ADD COLUMN `content_hash` TEXT DEFAULT NULL;
@@ -0,0 +1,23 @@
+-- ----------------------------
+-- 增加帖子互动数据快照表 content_engagement_snapshot（ENABLE_ENGAGEMENT_SNAPSHOT = True 时写入）
+-- 适用于使用旧版本 schema/tables.sql 建表的数据库, 新建库直接执行 schema/tables.sql 即可; SQLite 库启动时会自动建表
+-- 执行方式: mysql -u root -p media_crawler < schema/migrations/003_content_engagement_snapshot.sql
+-- ----------------------------
+
+-- ----------------------------
+-- Table structure for content_engagement_snapshot（各平台帖子互动数据快照，只追加不更新）
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `content_engagement_snapshot`
+(
+    `id`              bigint      NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `platform`        varchar(16) NOT NULL COMMENT '平台名称',
+    `content_id`      varchar(64) NOT NULL COMMENT '帖子ID',
+    `snapshot_ts`     bigint      NOT NULL COMMENT '快照时间戳',
+    `liked_count`     bigint DEFAULT NULL COMMENT '点赞数',
+    `collected_count` bigint DEFAULT NULL COMMENT '收藏数',
+    `comment_count`   bigint DEFAULT NULL COMMENT '评论数',
+    `share_count`     bigint DEFAULT NULL COMMENT '分享数',
+    `view_count`      bigint DEFAULT NULL COMMENT '播放/浏览数',
+    PRIMARY KEY (`id`),
+    KEY `idx_content_engagement_snapshot_content` (`platform`, `content_id`, `snapshot_ts`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='帖子互动数据快照';
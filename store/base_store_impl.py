@@ -0,0 +1,432 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 各平台共用的存储实现基类，平台子类只声明存储路径、表的ID字段、易变字段和互动计数字段
+import asyncio
+import json
+import os
+import pathlib
+from abc import abstractmethod
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiofiles
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils, words
+from tools.async_file_writer import AsyncCsvWriter, AsyncJsonlWriter
+from tools.content_hash import filter_changed_items
+from tools.engagement_snapshot import make_snapshot_items
+from var import crawler_type_var
+
+
+def calculate_number_of_files(file_store_path: str) -> int:
+    """计算数据保存文件的前部分排序数字，支持每次运行代码不写到同一个文件中
+    Args:
+        file_store_path;
+    Returns:
+        file nums
+    """
+    if not os.path.exists(file_store_path):
+        return 1
+    try:
+        return max([int(file_name.split("_")[0]) for file_name in os.listdir(file_store_path)]) + 1
+    except ValueError:
+        return 1
+
+
+class BaseFileStoreImplement(AbstractStore):
+    # 创作者数据的存储类型，文件名中使用，部分平台历史上使用 creators
+    creator_store_type: str = "creator"
+
+    @abstractmethod
+    async def save_data(self, save_items: List[Dict], store_type: str):
+        """
+        Save a batch of items of the same store type
+        Args:
+            save_items: save content dict list
+            store_type: Save type contains content and comments（contents | comments | creator）
+
+        Returns:
+
+        """
+        pass
+
+    async def store_content(self, content_item: Dict):
+        """
+        content storage implementation
+        Args:
+            content_item: content item dict
+
+        Returns:
+
+        """
+        await self.save_data(save_items=[content_item], store_type="contents")
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        contents storage implementation, the whole batch is written at once
+        Args:
+            content_items: content item dict list
+
+        Returns:
+
+        """
+        await self.save_data(save_items=content_items, store_type="contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        await self.save_data(save_items=[comment_item], store_type="comments")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comments storage implementation, the whole batch is written at once
+        Args:
+            comment_items: comment item dict list
+
+        Returns:
+
+        """
+        await self.save_data(save_items=comment_items, store_type="comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator storage implementation
+        Args:
+            creator: creator item dict
+
+        Returns:
+
+        """
+        await self.save_data(save_items=[creator], store_type=self.creator_store_type)
+
+    async def store_creators(self, creators: List[Dict]):
+        """
+        creators storage implementation, the whole batch is written at once
+        Args:
+            creators: creator item dict list
+
+        Returns:
+
+        """
+        await self.save_data(save_items=creators, store_type=self.creator_store_type)
+
+
+class BaseCsvStoreImplement(BaseFileStoreImplement):
+    csv_store_path: str = "data"
+    file_count: int = 1
+
+    def make_save_file_name(self, store_type: str) -> str:
+        """
+        make save file name by store type
+        Args:
+            store_type: contents or comments
+
+        Returns: eg: data/xhs/1_search_comments_20240114.csv ...
+
+        """
+        return f"{self.csv_store_path}/{self.file_count}_{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.csv"
+
+    async def save_data(self, save_items: List[Dict], store_type: str):
+        """
+        Buffered CSV writing, the file handle is kept open for the whole run and the header is written once.
+        Args:
+            save_items: save content dict list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: no returns
+
+        """
+        save_file_name = self.make_save_file_name(store_type=store_type)
+        await AsyncCsvWriter.get_writer(save_file_name).write_many(save_items)
+
+
+class BaseJsonStoreImplement(BaseFileStoreImplement):
+    json_store_path: str = "data/json"
+    words_store_path: str = "data/words"
+    # 为 None 时写成紧凑的一行
+    json_indent: Optional[int] = None
+    lock = asyncio.Lock()
+    WordCloud = words.AsyncWordCloudGenerator()
+
+    def make_save_file_name(self, store_type: str) -> Tuple[str, str]:
+        """
+        make save file name by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        return (
+            f"{self.json_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.json",
+            f"{self.words_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}"
+        )
+
+    async def save_data(self, save_items: List[Dict], store_type: str):
+        """
+        Below is a simple way to save it in json format.
+        Args:
+            save_items: save content dict list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        pathlib.Path(self.json_store_path).mkdir(parents=True, exist_ok=True)
+        pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
+        save_file_name, words_file_name_prefix = self.make_save_file_name(store_type=store_type)
+        save_data = []
+
+        async with self.lock:
+            if os.path.exists(save_file_name):
+                async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
+                    save_data = json.loads(await file.read())
+
+            save_data.extend(save_items)
+            async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
+                await file.write(json.dumps(save_data, ensure_ascii=False, indent=self.json_indent))
+
+            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+                try:
+                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
+                except:
+                    pass
+
+
+class BaseJsonlStoreImplement(BaseFileStoreImplement):
+    jsonl_store_path: str = "data/jsonl"
+
+    def make_save_file_name(self, store_type: str) -> str:
+        """
+        make save file name by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: eg: data/xhs/jsonl/search_comments_20240114.jsonl ...
+
+        """
+        return f"{self.jsonl_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.jsonl"
+
+    async def save_data(self, save_items: List[Dict], store_type: str):
+        """
+        Append one compact json line per item, the file is never rewritten
+        Args:
+            save_items: save content dict list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        writer = AsyncJsonlWriter.get_writer(self.make_save_file_name(store_type=store_type))
+        await writer.write_many(save_items)
+
+
+class BaseParquetStoreImplement(BaseFileStoreImplement):
+    parquet_store_path: str = "data/parquet"
+    # 分区目录中的平台名，eg: platform=xhs
+    platform: str = ""
+
+    def make_save_file_name(self, store_type: str) -> str:
+        """
+        make save file name by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: eg: data/parquet/platform=xhs/type=comments/date=2024-12-24/search_20241224163000.parquet ...
+
+        """
+        from tools.async_parquet_writer import make_partition_file_name
+        return make_partition_file_name(self.parquet_store_path, self.platform, store_type, crawler_type_var.get())
+
+    async def save_data(self, save_items: List[Dict], store_type: str):
+        """
+        Buffer the items by column, a row group is written every PARQUET_ROW_GROUP_SIZE items
+        Args:
+            save_items: save content dict list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        from tools.async_parquet_writer import AsyncParquetWriter
+        await AsyncParquetWriter.get_writer(self.make_save_file_name(store_type=store_type)).write_many(save_items)
+
+
+class BaseDbStoreImplement(AbstractStore):
+    # 内容表的ID字段，eg: note_id、aweme_id、video_id
+    content_id_field: str = "note_id"
+    # 不参与内容哈希的字段（签名链接、头像等每次请求都会变化），变化时不改写记录
+    content_volatile_fields: Tuple[str, ...] = ()
+    comment_volatile_fields: Tuple[str, ...] = ()
+    creator_volatile_fields: Tuple[str, ...] = ()
+    # 各表的互动计数字段，已存在的记录内容哈希变化时只改写这些字段（以及 last_modify_ts、content_hash），
+    # 标题、正文等字段保留首次入库的值
+    content_counter_fields: Tuple[str, ...] = ()
+    comment_counter_fields: Tuple[str, ...] = ()
+    creator_counter_fields: Tuple[str, ...] = ()
+    # 快照表中的平台名，eg: xhs、dy、bili
+    snapshot_platform: str = ""
+    # 互动数据快照字段 -> 内容记录字段
+    snapshot_counter_fields: Dict[str, str] = {}
+
+    @abstractmethod
+    def get_store_sql(self) -> ModuleType:
+        """
+        Platform store sql module, imported lazily so the csv/json stores don't load the db driver
+        Returns:
+            ModuleType: module with the batch query / upsert functions
+        """
+        pass
+
+    def filter_save_contents(self, content_items: List[Dict], existing_hashes: Dict[str, Optional[str]]) -> List[Dict]:
+        """
+        Filter the contents before they are written, all contents are written by default
+        Args:
+            content_items: content item dict list
+            existing_hashes: ID -> content hash of the records already in the table
+
+        Returns:
+            List[Dict]: contents to write
+        """
+        return content_items
+
+    async def store_content(self, content_item: Dict):
+        """
+        content DB storage implementation
+        Args:
+            content_item: content item dict
+
+        Returns:
+
+        """
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        contents DB storage implementation, unchanged records are skipped by content hash and the rest of the batch is upserted in one statement
+        Args:
+            content_items: content item dict list
+
+        Returns:
+
+        """
+        store_sql = self.get_store_sql()
+        # 一次 IN 查询拿到已存在记录的ID和内容哈希，区分新增和更新
+        content_ids = [str(content_item.get(self.content_id_field)) for content_item in content_items]
+        existing_hashes = await store_sql.query_content_hashes_by_content_ids(content_ids)
+        save_items = self.filter_save_contents(content_items, existing_hashes)
+        volatile_fields = self.content_volatile_fields
+        if config.ENABLE_ENGAGEMENT_SNAPSHOT and self.snapshot_counter_fields:
+            # 互动计数追加到快照表，只有计数变化的内容不再改写宽表
+            await store_sql.batch_add_content_snapshots(
+                make_snapshot_items(self.snapshot_platform, save_items, self.content_id_field,
+                                    self.snapshot_counter_fields))
+            volatile_fields += tuple(self.snapshot_counter_fields.values())
+        await self._store_changed_items(save_items, self.content_id_field, existing_hashes, "content",
+                                        volatile_fields, self.content_counter_fields,
+                                        store_sql.batch_add_or_update_contents)
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment DB storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comments DB storage implementation, unchanged records are skipped by content hash and the rest of the batch is upserted in one statement
+        Args:
+            comment_items: comment item dict list
+
+        Returns:
+
+        """
+        store_sql = self.get_store_sql()
+        comment_ids = [str(comment_item.get("comment_id")) for comment_item in comment_items]
+        existing_hashes = await store_sql.query_comment_hashes_by_comment_ids(comment_ids)
+        await self._store_changed_items(comment_items, "comment_id", existing_hashes, "comment",
+                                        self.comment_volatile_fields, self.comment_counter_fields,
+                                        store_sql.batch_add_or_update_comments)
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator DB storage implementation
+        Args:
+            creator: creator item dict
+
+        Returns:
+
+        """
+        await self.store_creators([creator])
+
+    async def store_creators(self, creators: List[Dict]):
+        """
+        creators DB storage implementation, unchanged records are skipped by content hash and the rest of the batch is upserted in one statement
+        Args:
+            creators: creator item dict list
+
+        Returns:
+
+        """
+        store_sql = self.get_store_sql()
+        creator_ids = [str(creator.get("user_id")) for creator in creators]
+        existing_hashes = await store_sql.query_creator_hashes_by_user_ids(creator_ids)
+        await self._store_changed_items(creators, "user_id", existing_hashes, "creator",
+                                        self.creator_volatile_fields, self.creator_counter_fields,
+                                        store_sql.batch_add_or_update_creators)
+
+    async def _store_changed_items(self, items: List[Dict], key_field: str,
+                                   existing_hashes: Dict[str, Optional[str]], store_type: str,
+                                   volatile_fields: Tuple[str, ...], counter_fields: Tuple[str, ...],
+                                   batch_add_or_update: Callable):
+        """
+        Skip the records whose content hash is unchanged and upsert the rest in one statement,
+        existing records only get their counters rewritten
+        Args:
+            items: record dict list
+            key_field: ID field of the table
+            existing_hashes: ID -> content hash of the records already in the table
+            store_type: content | comment | creator
+            volatile_fields: fields excluded from the content hash
+            counter_fields: engagement counter fields updated on existing records
+            batch_add_or_update: platform batch upsert function
+
+        Returns:
+
+        """
+        # 内容哈希没有变化的记录不再写入
+        changed_items = filter_changed_items(items, key_field, existing_hashes, store_type,
+                                             volatile_fields=volatile_fields)
+        add_ts = utils.get_current_timestamp()
+        for item in changed_items:
+            item["add_ts"] = add_ts
+        await batch_add_or_update(changed_items,
+                                  update_fields=list(counter_fields) + ["last_modify_ts", "content_hash"])
+        new_count = sum(str(item.get(key_field)) not in existing_hashes for item in changed_items)
+        utils.logger.info(
+            f"[{self.__class__.__name__}.store_{store_type}s] new: {new_count}, "
+            f"updated: {len(changed_items) - new_count}, unchanged skipped: {len(items) - len(changed_items)}")
+
@@ -14,9 +14,14 @@
 # @Time    : 2024/1/14 19:34
 # @Desc    :
 
-from typing import List
+from typing import Dict, List
 
 import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, put_store_item,
+                                      put_store_items)
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
@@ -27,7 +32,10 @@ class BiliStoreFactory:
     STORES = {
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
-        "json": BiliJsonStoreImplement
+        "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonlStoreImplement,
+        "sqlite": BiliSqliteStoreImplement,
+        "parquet": BiliParquetStoreImplement,
     }
 
     @staticmethod
@@ -35,7 +43,7 @@ class BiliStoreFactory:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
         return store_class()
 
 
@@ -64,7 +72,7 @@ async def update_bilibili_video(video_item: Dict):
     }
     utils.logger.info(
         f"[store.bilibili.update_bilibili_video] bilibili video id:{video_id}, title:{save_content_item.get('title')}")
-    await BiliStoreFactory.create_store().store_content(content_item=save_content_item)
+    await put_store_item(BiliStoreFactory.create_store(), STORE_TYPE_CONTENT, save_content_item)
 
 
 async def update_up_info(video_item: Dict):  
@@ -82,17 +90,10 @@ async def update_up_info(video_item: Dict):
     }
     utils.logger.info(
         f"[store.bilibili.update_up_info] bilibili user_id:{video_item_card.get('mid')}")
-    await BiliStoreFactory.create_store().store_creator(creator=saver_up_info)
+    await put_store_item(BiliStoreFactory.create_store(), STORE_TYPE_CREATOR, saver_up_info)
     
 
-async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
-    if not comments:
-        return
-    for comment_item in comments:
-        await update_bilibili_video_comment(video_id, comment_item)
-
-
-async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+def _make_bilibili_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
     comment_id = str(comment_item.get("rpid"))
     parent_comment_id = str(comment_item.get("parent", 0))
     content: Dict = comment_item.get("content")
@@ -111,16 +112,26 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
+
+
+async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
+    if not comments:
+        return
+    save_comment_items = [_make_bilibili_video_comment_item(video_id, comment_item) for comment_item in comments]
+    await put_store_items(BiliStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_items)
+
+
+async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _make_bilibili_video_comment_item(video_id, comment_item)
+    await put_store_item(BiliStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_item)
 
 
-async def store_video(aid, video_content, extension_file_name):
+def make_video_file_path(aid, extension_file_name) -> str:
     """
-    video video storage implementation
+    video local path, used by streaming downloads writing straight to disk
     Args:
         aid:
-        video_content:
         extension_file_name:
     """
-    await BilibiliVideo().store_video(
-        {"aid": aid, "video_content": video_content, "extension_file_name": extension_file_name})
+    return BilibiliVideo().make_save_file_name(str(aid), extension_file_name)
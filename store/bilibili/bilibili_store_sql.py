@@ -14,147 +14,118 @@
 # @Time    : 2024/4/6 15:30
 # @Desc    : sql接口集合
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+import config
 from db import AsyncMysqlDB
 from var import media_crawler_db_var
 
 
-async def query_content_by_content_id(content_id: str) -> Dict:
+async def batch_add_or_update_contents(items: List[Dict], update_fields: Optional[List[str]] = None) -> int:
     """
-    查询一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
+    批量新增或更新内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...），按唯一键冲突更新，一批记录只需一次数据库往返
     Args:
-        content_id:
+        items:
+        update_fields: 已存在的记录只更新这些字段，None 表示更新全部字段
 
     Returns:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video where video_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
-
-
-async def add_new_content(content_item: Dict) -> int:
-    """
-    新增一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
-    Args:
-        content_item:
-
-    Returns:
-
-    """
-    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_video", content_item)
-    return last_row_id
-
-
-async def update_content_by_content_id(content_id: str, content_item: Dict) -> int:
-    """
-    更新一条记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
-    Args:
-        content_id:
-        content_item:
-
-    Returns:
-
-    """
-    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_video", content_item, "video_id", content_id)
+    effect_row: int = await async_db_conn.batch_insert_or_update("bilibili_video", items, update_fields=update_fields)
     return effect_row
 
 
-
-async def query_comment_by_comment_id(comment_id: str) -> Dict:
+async def batch_add_or_update_comments(items: List[Dict], update_fields: Optional[List[str]] = None) -> int:
     """
-    查询一条评论内容
+    批量新增或更新评论记录，按唯一键冲突更新，一批记录只需一次数据库往返，
+    开启批量导入模式时经暂存文件 LOAD DATA 导入后合并
     Args:
-        comment_id:
+        items:
+        update_fields: 已存在的记录只更新这些字段，None 表示更新全部字段
 
     Returns:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    if config.ENABLE_DB_BULK_LOAD:
+        return await async_db_conn.bulk_load_or_update("bilibili_video_comment", items, staging_dir=config.DB_BULK_LOAD_DIR or None,
+                                                      update_fields=update_fields)
+    effect_row: int = await async_db_conn.batch_insert_or_update("bilibili_video_comment", items, update_fields=update_fields)
+    return effect_row
 
 
-async def add_new_comment(comment_item: Dict) -> int:
+async def batch_add_or_update_creators(items: List[Dict], update_fields: Optional[List[str]] = None) -> int:
     """
-    新增一条评论记录
+    批量新增或更新创作者信息，按唯一键冲突更新，一批记录只需一次数据库往返
     Args:
-        comment_item:
+        items:
+        update_fields: 已存在的记录只更新这些字段，None 表示更新全部字段
 
     Returns:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_video_comment", comment_item)
-    return last_row_id
+    effect_row: int = await async_db_conn.batch_insert_or_update("bilibili_up_info", items, update_fields=update_fields)
+    return effect_row
 
 
-async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> int:
+async def query_content_hashes_by_content_ids(content_ids: List[str]) -> Dict[str, Optional[str]]:
     """
-    更新增一条评论记录
+    批量查询内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）是否已经存在，参数化的 IN 查询只返回ID和内容哈希，一批ID只需一次数据库往返
     Args:
-        comment_id:
-        comment_item:
+        content_ids:
 
     Returns:
+        Dict: ID -> 内容哈希，不存在的记录不在结果中
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_video_comment", comment_item, "comment_id", comment_id)
-    return effect_row
+    rows: List[Dict] = await async_db_conn.query_by_keys("bilibili_video", "video_id", content_ids, ("video_id", "content_hash"))
+    return {str(row["video_id"]): row["content_hash"] for row in rows}
 
 
-async def query_creator_by_creator_id(creator_id: str) -> Dict:
+async def query_comment_hashes_by_comment_ids(comment_ids: List[str]) -> Dict[str, Optional[str]]:
     """
-    查询up主信息
+    批量查询评论记录是否已经存在，参数化的 IN 查询只返回ID和内容哈希，一批ID只需一次数据库往返
     Args:
-        creator_id:
+        comment_ids:
 
     Returns:
+        Dict: ID -> 内容哈希，不存在的记录不在结果中
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_up_info where user_id = '{creator_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    rows: List[Dict] = await async_db_conn.query_by_keys("bilibili_video_comment", "comment_id", comment_ids, ("comment_id", "content_hash"))
+    return {str(row["comment_id"]): row["content_hash"] for row in rows}
 
 
-async def add_new_creator(creator_item: Dict) -> int:
+async def query_creator_hashes_by_user_ids(user_ids: List[str]) -> Dict[str, Optional[str]]:
     """
-    新增up主信息
+    批量查询创作者记录是否已经存在，参数化的 IN 查询只返回ID和内容哈希，一批ID只需一次数据库往返
     Args:
-        creator_item:
+        user_ids:
 
     Returns:
+        Dict: ID -> 内容哈希，不存在的记录不在结果中
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_up_info", creator_item)
-    return last_row_id
+    rows: List[Dict] = await async_db_conn.query_by_keys("bilibili_up_info", "user_id", user_ids, ("user_id", "content_hash"))
+    return {str(row["user_id"]): row["content_hash"] for row in rows}
 
 
-async def update_creator_by_creator_id(creator_id: str, creator_item: Dict) -> int:
+async def batch_add_content_snapshots(snapshot_items: List[Dict]) -> int:
     """
-    更新up主信息
+    批量追加视频互动数据快照，只插入快照表的窄行，不改写视频表
     Args:
-        creator_id:
-        creator_item:
+        snapshot_items:
 
     Returns:
 
     """
+    if not snapshot_items:
+        return 0
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_up_info", creator_item, "user_id", creator_id)
+    effect_row: int = await async_db_conn.batch_insert("content_engagement_snapshot", snapshot_items)
     return effect_row
-
@@ -13,9 +13,14 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import Dict, List, Optional
 
 import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, put_store_item,
+                                      put_store_items)
 from var import source_keyword_var
 
 from .douyin_store_impl import *
@@ -26,6 +31,9 @@ class DouyinStoreFactory:
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonlStoreImplement,
+        "sqlite": DouyinSqliteStoreImplement,
+        "parquet": DouyinParquetStoreImplement,
     }
 
     @staticmethod
@@ -33,7 +41,7 @@ class DouyinStoreFactory:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
+                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ..."
             )
         return store_class()
 
@@ -91,25 +99,16 @@ async def update_douyin_aweme(aweme_item: Dict):
     utils.logger.info(
         f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}"
     )
-    await DouyinStoreFactory.create_store().store_content(
-        content_item=save_content_item
-    )
-
+    await put_store_item(DouyinStoreFactory.create_store(), STORE_TYPE_CONTENT, save_content_item)
 
-async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
-    if not comments:
-        return
-    for comment_item in comments:
-        await update_dy_aweme_comment(aweme_id, comment_item)
 
-
-async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+def _make_dy_aweme_comment_item(aweme_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_aweme_id = comment_item.get("aweme_id")
     if aweme_id != comment_aweme_id:
         utils.logger.error(
             f"[store.douyin.update_dy_aweme_comment] comment_aweme_id: {comment_aweme_id} != aweme_id: {aweme_id}"
         )
-        return
+        return None
     user_info = comment_item.get("user", {})
     comment_id = comment_item.get("cid")
     parent_comment_id = comment_item.get("reply_id", "0")
@@ -144,10 +143,21 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
     utils.logger.info(
         f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}"
     )
+    return save_comment_item
 
-    await DouyinStoreFactory.create_store().store_comment(
-        comment_item=save_comment_item
-    )
+
+async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
+    if not comments:
+        return
+    save_comment_items = [_make_dy_aweme_comment_item(aweme_id, comment_item) for comment_item in comments]
+    await put_store_items(DouyinStoreFactory.create_store(), STORE_TYPE_COMMENT, [item for item in save_comment_items if item])
+
+
+async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+    save_comment_item = _make_dy_aweme_comment_item(aweme_id, comment_item)
+    if not save_comment_item:
+        return
+    await put_store_item(DouyinStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -169,4 +179,4 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.douyin.save_creator] creator:{local_db_item}")
-    await DouyinStoreFactory.create_store().store_creator(local_db_item)
+    await put_store_item(DouyinStoreFactory.create_store(), STORE_TYPE_CREATOR, local_db_item)
@@ -13,9 +13,14 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 20:03
 # @Desc    :
-from typing import List
+from typing import Dict, List
 
 import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, put_store_item,
+                                      put_store_items)
 from var import source_keyword_var
 
 from .kuaishou_store_impl import *
@@ -25,7 +30,10 @@ class KuaishouStoreFactory:
     STORES = {
         "csv": KuaishouCsvStoreImplement,
         "db": KuaishouDbStoreImplement,
-        "json": KuaishouJsonStoreImplement
+        "json": KuaishouJsonStoreImplement,
+        "jsonl": KuaishouJsonlStoreImplement,
+        "sqlite": KuaishouSqliteStoreImplement,
+        "parquet": KuaishouParquetStoreImplement,
     }
 
     @staticmethod
@@ -33,7 +41,7 @@ class KuaishouStoreFactory:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
         return store_class()
 
 
@@ -62,18 +70,10 @@ async def update_kuaishou_video(video_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_kuaishou_video] Kuaishou video id:{video_id}, title:{save_content_item.get('title')}")
-    await KuaishouStoreFactory.create_store().store_content(content_item=save_content_item)
+    await put_store_item(KuaishouStoreFactory.create_store(), STORE_TYPE_CONTENT, save_content_item)
 
 
-async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
-    utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
-    if not comments:
-        return
-    for comment_item in comments:
-        await update_ks_video_comment(video_id, comment_item)
-
-
-async def update_ks_video_comment(video_id: str, comment_item: Dict):
+def _make_ks_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
     comment_id = comment_item.get("commentId")
     save_comment_item = {
         "comment_id": comment_id,
@@ -88,7 +88,20 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
+
+
+async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
+    utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
+    if not comments:
+        return
+    save_comment_items = [_make_ks_video_comment_item(video_id, comment_item) for comment_item in comments]
+    await put_store_items(KuaishouStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_items)
+
+
+async def update_ks_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _make_ks_video_comment_item(video_id, comment_item)
+    await put_store_item(KuaishouStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_item)
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
@@ -107,4 +120,4 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.kuaishou.save_creator] creator:{local_db_item}")
-    await KuaishouStoreFactory.create_store().store_creator(local_db_item)
\ No newline at end of file
+    await put_store_item(KuaishouStoreFactory.create_store(), STORE_TYPE_CREATOR, local_db_item)
\ No newline at end of file
@@ -10,9 +10,15 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Dict, List
 
+import config
+from base.base_crawler import AbstractStore
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from tools import utils
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, put_store_item,
+                                      put_store_items)
 from var import source_keyword_var
 
 from . import tieba_store_impl
@@ -23,7 +29,10 @@ class TieBaStoreFactory:
     STORES = {
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
-        "json": TieBaJsonStoreImplement
+        "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonlStoreImplement,
+        "sqlite": TieBaSqliteStoreImplement,
+        "parquet": TieBaParquetStoreImplement,
     }
 
     @staticmethod
@@ -31,10 +40,18 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
         return store_class()
 
 
+def _make_tieba_note_item(note_item: TiebaNote) -> Dict:
+    note_item.source_keyword = source_keyword_var.get()
+    save_note_item = note_item.model_dump()
+    save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
+    return save_note_item
+
+
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
     Batch update tieba notes
@@ -46,8 +63,8 @@ async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_tieba_note(note_item)
+    save_content_items = [_make_tieba_note_item(note_item) for note_item in note_list]
+    await put_store_items(TieBaStoreFactory.create_store(), STORE_TYPE_CONTENT, save_content_items)
 
 
 async def update_tieba_note(note_item: TiebaNote):
@@ -59,12 +76,15 @@ async def update_tieba_note(note_item: TiebaNote):
     Returns:
 
     """
-    note_item.source_keyword = source_keyword_var.get()
-    save_note_item = note_item.model_dump()
-    save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
+    save_note_item = _make_tieba_note_item(note_item)
+    await put_store_item(TieBaStoreFactory.create_store(), STORE_TYPE_CONTENT, save_note_item)
+
 
-    await TieBaStoreFactory.create_store().store_content(save_note_item)
+def _make_tieba_note_comment_item(note_id: str, comment_item: TiebaComment) -> Dict:
+    save_comment_item = comment_item.model_dump()
+    save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
+    return save_comment_item
 
 
 async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
@@ -79,8 +99,8 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_tieba_note_comment(note_id, comment_item)
+    save_comment_items = [_make_tieba_note_comment_item(note_id, comment_item) for comment_item in comments]
+    await put_store_items(TieBaStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_items)
 
 
 async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
@@ -93,10 +113,8 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     Returns:
 
     """
-    save_comment_item = comment_item.model_dump()
-    save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
-    await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    save_comment_item = _make_tieba_note_comment_item(note_id, comment_item)
+    await put_store_item(TieBaStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_item)
 
 
 async def save_creator(user_info: TiebaCreator):
@@ -111,4 +129,4 @@ async def save_creator(user_info: TiebaCreator):
     local_db_item = user_info.model_dump()
     local_db_item["last_modify_ts"] = utils.get_current_timestamp()
     utils.logger.info(f"[store.tieba.save_creator] creator:{local_db_item}")
-    await TieBaStoreFactory.create_store().store_creator(local_db_item)
+    await put_store_item(TieBaStoreFactory.create_store(), STORE_TYPE_CREATOR, local_db_item)
@@ -15,8 +15,14 @@
 # @Desc    :
 
 import re
-from typing import List
-
+from typing import Dict, List, Optional
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, put_store_item,
+                                      put_store_items)
 from var import source_keyword_var
 
 from .weibo_store_image import *
@@ -28,6 +34,9 @@ class WeibostoreFactory:
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonlStoreImplement,
+        "sqlite": WeiboSqliteStoreImplement,
+        "parquet": WeiboParquetStoreImplement,
     }
 
     @staticmethod
@@ -35,37 +44,13 @@ class WeibostoreFactory:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
         return store_class()
 
 
-async def batch_update_weibo_notes(note_list: List[Dict]):
-    """
-    Batch update weibo notes
-    Args:
-        note_list:
-
-    Returns:
-
-    """
-    if not note_list:
-        return
-    for note_item in note_list:
-        await update_weibo_note(note_item)
-
-
-async def update_weibo_note(note_item: Dict):
-    """
-    Update weibo note
-    Args:
-        note_item:
-
-    Returns:
-
-    """
+def _make_weibo_note_item(note_item: Dict) -> Optional[Dict]:
     if not note_item:
-        return
-
+        return None
     mblog: Dict = note_item.get("mblog")
     user_info: Dict = mblog.get("user")
     note_id = mblog.get("id")
@@ -95,37 +80,42 @@ async def update_weibo_note(note_item: Dict):
     }
     utils.logger.info(
         f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
-    await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    return save_content_item
 
 
-async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
+async def batch_update_weibo_notes(note_list: List[Dict]):
     """
-    Batch update weibo note comments
+    Batch update weibo notes
     Args:
-        note_id:
-        comments:
+        note_list:
 
     Returns:
 
     """
-    if not comments:
+    if not note_list:
         return
-    for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
+    save_content_items = [_make_weibo_note_item(note_item) for note_item in note_list]
+    await put_store_items(WeibostoreFactory.create_store(), STORE_TYPE_CONTENT, [item for item in save_content_items if item])
 
 
-async def update_weibo_note_comment(note_id: str, comment_item: Dict):
+async def update_weibo_note(note_item: Dict):
     """
-    Update weibo note comment
+    Update weibo note
     Args:
-        note_id: weibo note id
-        comment_item: weibo comment item
+        note_item:
 
     Returns:
 
     """
-    if not comment_item or not note_id:
+    save_content_item = _make_weibo_note_item(note_item)
+    if not save_content_item:
         return
+    await put_store_item(WeibostoreFactory.create_store(), STORE_TYPE_CONTENT, save_content_item)
+
+
+def _make_weibo_note_comment_item(note_id: str, comment_item: Dict) -> Optional[Dict]:
+    if not comment_item or not note_id:
+        return None
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
@@ -151,22 +141,52 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
+
+
+async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
+    """
+    Batch update weibo note comments
+    Args:
+        note_id:
+        comments:
+
+    Returns:
+
+    """
+    if not comments:
+        return
+    save_comment_items = [_make_weibo_note_comment_item(note_id, comment_item) for comment_item in comments]
+    await put_store_items(WeibostoreFactory.create_store(), STORE_TYPE_COMMENT, [item for item in save_comment_items if item])
+
+
+async def update_weibo_note_comment(note_id: str, comment_item: Dict):
+    """
+    Update weibo note comment
+    Args:
+        note_id: weibo note id
+        comment_item: weibo comment item
+
+    Returns:
+
+    """
+    save_comment_item = _make_weibo_note_comment_item(note_id, comment_item)
+    if not save_comment_item:
+        return
+    await put_store_item(WeibostoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_item)
 
 
-async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
+def make_weibo_note_image_file_path(picid: str, extension_file_name: str) -> str:
     """
-    Save weibo note image to local
+    Get the local path of a weibo note image, used by streaming downloads writing straight to disk
     Args:
         picid:
-        pic_content:
         extension_file_name:
 
     Returns:
 
     """
-    await WeiboStoreImage().store_image(
-        {"pic_id": picid, "pic_content": pic_content, "extension_file_name": extension_file_name})
+    return WeiboStoreImage().make_save_file_name(picid, extension_file_name)
 
 
 async def save_creator(user_id: str, user_info: Dict):
@@ -192,4 +212,4 @@ async def save_creator(user_id: str, user_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.weibo.save_creator] creator:{local_db_item}")
-    await WeibostoreFactory.create_store().store_creator(local_db_item)
+    await put_store_item(WeibostoreFactory.create_store(), STORE_TYPE_CREATOR, local_db_item)
@@ -13,9 +13,16 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 17:34
 # @Desc    :
-from typing import List
+import json
+import re
+from typing import Dict, List, Optional, Tuple
 
 import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, put_store_item,
+                                      put_store_items)
 from var import source_keyword_var
 
 from . import xhs_store_impl
@@ -27,14 +34,17 @@ class XhsStoreFactory:
     STORES = {
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
-        "json": XhsJsonStoreImplement
+        "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonlStoreImplement,
+        "sqlite": XhsSqliteStoreImplement,
+        "parquet": XhsParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
         return store_class()
 
 
@@ -65,6 +75,54 @@ def get_video_url_arr(note_item: Dict) -> List:
     return videoArr
 
 
+# 小红书图片地址 ! 后面的样式后缀里带有图片格式，eg: ...!nd_dft_wlteh_webp_3
+XHS_IMAGE_FORMAT_PATTERN = re.compile(r"!\w*?_(avif|webp|jpe?g|png|heic)_\d+$")
+
+
+def get_image_url_format(url: str) -> Optional[str]:
+    """
+    从图片地址的样式后缀中获取图片格式
+    Args:
+        url: 图片地址
+
+    Returns:
+        Optional[str]: avif、webp、jpg 等，识别不出时为 None
+
+    """
+    match = XHS_IMAGE_FORMAT_PATTERN.search(url.split("?")[0])
+    if not match:
+        return None
+    return "jpg" if match.group(1) == "jpeg" else match.group(1)
+
+
+def get_preferred_image_url(image: Dict) -> Tuple[str, str]:
+    """
+    从图片的默认地址和 info_list 中的各个地址（不包括预览图）里，按 XHS_IMAGE_FORMAT_PREFERENCE 选择图片地址
+    Args:
+        image: image_list 中的一张图片
+
+    Returns:
+        Tuple[str, str]: (图片地址, 图片格式)，没有地址时为 ("", "")
+
+    """
+    candidates = []
+    if image.get("url_default"):
+        candidates.append(image["url_default"])
+    for info in image.get("info_list") or []:
+        if info.get("url") and "PRV" not in (info.get("image_scene") or "").upper():
+            candidates.append(info["url"])
+    if not candidates:
+        return "", ""
+
+    format_urls = {}
+    for url in candidates:
+        format_urls.setdefault(get_image_url_format(url), url)
+    for image_format in config.XHS_IMAGE_FORMAT_PREFERENCE:
+        if image_format in format_urls:
+            return format_urls[image_format], image_format
+    return candidates[0], get_image_url_format(candidates[0]) or "jpg"
+
+
 async def update_xhs_note(note_item: Dict):
     """
     更新小红书笔记
@@ -110,7 +168,31 @@ async def update_xhs_note(note_item: Dict):
         "xsec_token": note_item.get("xsec_token"), # xsec_token
     }
     utils.logger.info(f"[store.xhs.update_xhs_note] xhs note: {local_db_item}")
-    await XhsStoreFactory.create_store().store_content(local_db_item)
+    await put_store_item(XhsStoreFactory.create_store(), STORE_TYPE_CONTENT, local_db_item)
+
+
+def _make_xhs_note_comment_item(note_id: str, comment_item: Dict) -> Dict:
+    user_info = comment_item.get("user_info", {})
+    comment_id = comment_item.get("id")
+    comment_pictures = [item.get("url_default", "") for item in comment_item.get("pictures", [])]
+    target_comment = comment_item.get("target_comment", {})
+    local_db_item = {
+        "comment_id": comment_id, # 评论id
+        "create_time": comment_item.get("create_time"), # 评论时间
+        "ip_location": comment_item.get("ip_location"), # ip地址
+        "note_id": note_id, # 帖子id
+        "content": comment_item.get("content"), # 评论内容
+        "user_id": user_info.get("user_id"), # 用户id
+        "nickname": user_info.get("nickname"), # 用户昵称
+        "avatar": user_info.get("image"), # 用户头像
+        "sub_comment_count": comment_item.get("sub_comment_count", 0), # 子评论数
+        "pictures": ",".join(comment_pictures), # 评论图片
+        "parent_comment_id": target_comment.get("id", 0), # 父评论id
+        "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
+        "like_count": comment_item.get("like_count", 0),
+    }
+    utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
+    return local_db_item
 
 
 async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
@@ -125,8 +207,8 @@ async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_xhs_note_comment(note_id, comment_item)
+    save_comment_items = [_make_xhs_note_comment_item(note_id, comment_item) for comment_item in comments]
+    await put_store_items(XhsStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_items)
 
 
 async def update_xhs_note_comment(note_id: str, comment_item: Dict):
@@ -139,27 +221,8 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
     Returns:
 
     """
-    user_info = comment_item.get("user_info", {})
-    comment_id = comment_item.get("id")
-    comment_pictures = [item.get("url_default", "") for item in comment_item.get("pictures", [])]
-    target_comment = comment_item.get("target_comment", {})
-    local_db_item = {
-        "comment_id": comment_id, # 评论id
-        "create_time": comment_item.get("create_time"), # 评论时间
-        "ip_location": comment_item.get("ip_location"), # ip地址
-        "note_id": note_id, # 帖子id
-        "content": comment_item.get("content"), # 评论内容
-        "user_id": user_info.get("user_id"), # 用户id
-        "nickname": user_info.get("nickname"), # 用户昵称
-        "avatar": user_info.get("image"), # 用户头像
-        "sub_comment_count": comment_item.get("sub_comment_count", 0), # 子评论数
-        "pictures": ",".join(comment_pictures), # 评论图片
-        "parent_comment_id": target_comment.get("id", 0), # 父评论id
-        "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
-        "like_count": comment_item.get("like_count", 0),
-    }
-    utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
-    await XhsStoreFactory.create_store().store_comment(local_db_item)
+    local_db_item = _make_xhs_note_comment_item(note_id, comment_item)
+    await put_store_item(XhsStoreFactory.create_store(), STORE_TYPE_COMMENT, local_db_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -208,20 +271,17 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
     }
     utils.logger.info(f"[store.xhs.save_creator] creator:{local_db_item}")
-    await XhsStoreFactory.create_store().store_creator(local_db_item)
+    await put_store_item(XhsStoreFactory.create_store(), STORE_TYPE_CREATOR, local_db_item)
 
 
-async def update_xhs_note_image(note_id, pic_content, extension_file_name):
+def make_xhs_note_media_file_path(note_id: str, extension_file_name: str) -> str:
     """
-    更新小红书笔
+    获取小红书笔记图片、视频的保存路径，用于流式下载直接写入磁盘
     Args:
         note_id:
-        pic_content:
         extension_file_name:
 
     Returns:
 
     """
-
-    await XiaoHongShuImage().store_image(
-        {"notice_id": note_id, "pic_content": pic_content, "extension_file_name": extension_file_name})
+    return XiaoHongShuImage().make_save_file_name(note_id, extension_file_name)
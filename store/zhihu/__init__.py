@@ -10,15 +10,21 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Dict, List
 
 import config
 from base.base_crawler import AbstractStore
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from store.zhihu.zhihu_store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
-                                          ZhihuJsonStoreImplement)
+                                          ZhihuJsonlStoreImplement,
+                                          ZhihuJsonStoreImplement,
+                                          ZhihuParquetStoreImplement,
+                                          ZhihuSqliteStoreImplement)
 from tools import utils
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, put_store_item,
+                                      put_store_items)
 from var import source_keyword_var
 
 
@@ -26,16 +32,27 @@ class ZhihuStoreFactory:
     STORES = {
         "csv": ZhihuCsvStoreImplement,
         "db": ZhihuDbStoreImplement,
-        "json": ZhihuJsonStoreImplement
+        "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonlStoreImplement,
+        "sqlite": ZhihuSqliteStoreImplement,
+        "parquet": ZhihuParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
         return store_class()
 
+def _make_zhihu_content_item(content_item: ZhihuContent) -> Dict:
+    content_item.source_keyword = source_keyword_var.get()
+    local_db_item = content_item.model_dump()
+    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
+    return local_db_item
+
+
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
     批量更新知乎内容
@@ -48,8 +65,8 @@ async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     if not contents:
         return
 
-    for content_item in contents:
-        await update_zhihu_content(content_item)
+    save_content_items = [_make_zhihu_content_item(content_item) for content_item in contents]
+    await put_store_items(ZhihuStoreFactory.create_store(), STORE_TYPE_CONTENT, save_content_items)
 
 async def update_zhihu_content(content_item: ZhihuContent):
     """
@@ -60,13 +77,17 @@ async def update_zhihu_content(content_item: ZhihuContent):
     Returns:
 
     """
-    content_item.source_keyword = source_keyword_var.get()
-    local_db_item = content_item.model_dump()
-    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
-    await ZhihuStoreFactory.create_store().store_content(local_db_item)
+    local_db_item = _make_zhihu_content_item(content_item)
+    await put_store_item(ZhihuStoreFactory.create_store(), STORE_TYPE_CONTENT, local_db_item)
+
 
 
+def _make_zhihu_content_comment_item(comment_item: ZhihuComment) -> Dict:
+    local_db_item = comment_item.model_dump()
+    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
+    return local_db_item
+
 
 async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     """
@@ -80,8 +101,8 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     if not comments:
         return
     
-    for comment_item in comments:
-        await update_zhihu_content_comment(comment_item)
+    save_comment_items = [_make_zhihu_content_comment_item(comment_item) for comment_item in comments]
+    await put_store_items(ZhihuStoreFactory.create_store(), STORE_TYPE_COMMENT, save_comment_items)
 
 
 async def update_zhihu_content_comment(comment_item: ZhihuComment):
@@ -93,10 +114,8 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     Returns:
 
     """
-    local_db_item = comment_item.model_dump()
-    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
-    await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    local_db_item = _make_zhihu_content_comment_item(comment_item)
+    await put_store_item(ZhihuStoreFactory.create_store(), STORE_TYPE_COMMENT, local_db_item)
 
 
 async def save_creator(creator: ZhihuCreator):
@@ -112,4 +131,4 @@ async def save_creator(creator: ZhihuCreator):
         return
     local_db_item = creator.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    await ZhihuStoreFactory.create_store().store_creator(local_db_item)
\ No newline at end of file
+    await put_store_item(ZhihuStoreFactory.create_store(), STORE_TYPE_CREATOR, local_db_item)
\ No newline at end of file
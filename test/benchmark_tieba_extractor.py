@@ -0,0 +1,55 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 贴吧页面解析的性能测试，使用 media_platform/tieba/test_data 下保存的页面，
+#            python -m test.benchmark_tieba_extractor [轮数]
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from media_platform.tieba.help import TiebaDocument, TieBaExtractor
+from test.tieba_test_data import FAKE_PARENT_COMMENT, load_page
+
+# (页面文件, 提取方法)
+BENCHMARK_CASES: List[Tuple[str, Callable]] = [
+    ("search_keyword_notes.html", lambda extractor, page: extractor.extract_search_note_list(page)),
+    ("tieba_note_list.html", lambda extractor, page: extractor.extract_tieba_note_list(page)),
+    ("note_detail.html", lambda extractor, page: extractor.extract_note_detail(page)),
+    ("note_comments.html", lambda extractor, page: extractor.extract_tieba_note_parment_comments(page, "123456")),
+    ("note_sub_comments.html", lambda extractor, page: extractor.extract_tieba_note_sub_comments(
+        page, FAKE_PARENT_COMMENT)),
+]
+
+
+def timeit(func: Callable, rounds: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start_time) / rounds * 1000
+
+
+def main(rounds: int = 20) -> Dict[str, float]:
+    print(f"{'page':<26} {'size':>8} {'parse':>10} {'extract':>10}")
+    costs = {}
+    for file_name, extract in BENCHMARK_CASES:
+        page = load_page(file_name)
+        # 贴吧列表页的帖子在 HTML 注释里，提取前会去掉注释开始标记
+        parse_page = page.replace("<!--", "") if file_name == "tieba_note_list.html" else page
+        parse_cost = timeit(lambda: TiebaDocument(parse_page), rounds)
+        # 每轮使用新的提取器，包含解析页面的时间
+        costs[file_name] = timeit(lambda: extract(TieBaExtractor(), page), rounds)
+        print(f"{file_name:<26} {len(page) // 1024:>6}KB {parse_cost:>8.2f}ms {costs[file_name]:>8.2f}ms")
+    return costs
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
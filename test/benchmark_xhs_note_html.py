@@ -0,0 +1,153 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书网页 HTML 解析的性能测试，python -m test.benchmark_xhs_note_html [保存的笔记详情页 HTML ...]
+#            不传文件时使用按真实页面结构生成的笔记详情页
+import json
+import re
+import sys
+import time
+from typing import Callable, Dict, List
+
+from media_platform.xhs.help import extract_initial_state, transform_json_keys
+
+BENCHMARK_NOTE_ID = "6766d1a0000000000b00e3a1"
+
+
+def make_note_html(note_id: str = BENCHMARK_NOTE_ID, image_count: int = 9, feed_count: int = 40) -> str:
+    """
+    生成一个笔记详情页，window.__INITIAL_STATE__ 的结构和真实页面一致：除了笔记详情外还有首页推荐流、用户等数据，
+    其中的 undefined 是 JS 字面量
+    """
+    def make_image(index: int) -> Dict:
+        url = f"http://sns-webpic-qc.xhscdn.com/202412281040/a1b2c3/1040g2sg31bmb2ujq3o{index:04d}"
+        return {
+            "urlDefault": f"{url}!nd_dft_wlteh_webp_3", "urlPre": f"{url}!nd_prv_wlteh_webp_3",
+            "infoList": [{"imageScene": "WB_PRV", "url": f"{url}!nd_prv_wlteh_webp_3"},
+                         {"imageScene": "WB_DFT", "url": f"{url}!nd_dft_wlteh_webp_3"}],
+            "width": 1080, "height": 1440, "livePhoto": False, "fileId": "", "traceId": "", "stream": {},
+        }
+
+    def make_user(index: int) -> Dict:
+        return {"userId": f"5f1e{index:020d}", "nickname": f"用户{index}", "avatar": "https://sns-avatar-qc.xhscdn.com/avatar/1",
+                "xsecToken": "ABxyz"}
+
+    note = {
+        "noteId": note_id, "type": "normal", "title": "周末去哪儿", "desc": "今天天气很好 #旅行[话题]# " * 20,
+        "user": make_user(0), "imageList": [make_image(index) for index in range(image_count)],
+        "tagList": [{"id": f"tag{index}", "name": f"话题{index}", "type": "topic"} for index in range(8)],
+        "atUserList": [], "interactInfo": {"liked": False, "likedCount": "1.2万", "collected": False,
+                                           "collectedCount": "3456", "commentCount": "789", "shareCount": "12",
+                                           "followed": False, "relation": "none"},
+        "time": 1735358400000, "lastUpdateTime": 1735358400000, "ipLocation": "上海", "xsecToken": "ABxyz",
+    }
+    feeds = [{
+        "id": f"feed{index}", "modelType": "note", "xsecToken": "ABxyz",
+        "noteCard": {"type": "normal", "displayTitle": f"推荐笔记{index}", "user": make_user(index),
+                     "interactInfo": {"liked": False, "likedCount": str(index)},
+                     "cover": make_image(index)},
+    } for index in range(feed_count)]
+    state = {
+        "global": {"appSettings": {"notificationInterval": 30, "prohibitVideoNoteUpload": False}, "serverTime": 1735358400000},
+        "user": {"loggedIn": False, "userInfo": {"user_id": "PLACEHOLDER"}, "userPageData": {}},
+        "feed": {"feeds": feeds, "currentChannel": "homefeed_recommend"},
+        "note": {"noteDetailMap": {note_id: {"comments": {"list": [], "cursor": "", "hasMore": True},
+                                             "currentTime": 1735358400000, "note": note}},
+                 "serverRequestInfo": {"state": "success", "errorCode": 0}},
+    }
+    state_text = json.dumps(state, ensure_ascii=False)
+    # 页面中部分字段的值是 JS 的 undefined
+    state_text = state_text.replace('"user_id": "PLACEHOLDER"', '"user_id": undefined')
+    state_text = state_text.replace('"stream": {}', '"stream": undefined')
+    return (f"<html><head><title>小红书</title></head><body><div id=\"app\"></div>"
+            f"<script>window.__INITIAL_STATE__={state_text}</script>"
+            f"<script src=\"https://fe-static.xhscdn.com/formula-static/xhs-pc-web/public/resource/js/index.js\"></script>"
+            f"</body></html>")
+
+
+def legacy_transform_json_keys(json_data: str) -> Dict:
+    """
+    改造前的实现：每个嵌套字典都重新 json.dumps/json.loads 一次，每个键都跑一次正则
+    """
+    data_dict = json.loads(json_data)
+    dict_new = {}
+    for key, value in data_dict.items():
+        new_key = re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+        if not value:
+            dict_new[new_key] = value
+        elif isinstance(value, dict):
+            dict_new[new_key] = legacy_transform_json_keys(json.dumps(value))
+        elif isinstance(value, list):
+            dict_new[new_key] = [
+                legacy_transform_json_keys(json.dumps(item)) if (item and isinstance(item, dict)) else item
+                for item in value
+            ]
+        else:
+            dict_new[new_key] = value
+    return dict_new
+
+
+def extract_state_text(html: str) -> str:
+    return re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+
+
+def legacy_get_note_dict(html: str, note_id: str) -> Dict:
+    """
+    改造前的笔记详情提取：正则匹配整个页面，替换所有 undefined 文本，解码整个页面状态
+    """
+    state = extract_state_text(html)
+    return legacy_transform_json_keys(state)["note"]["note_detail_map"][note_id]["note"]
+
+
+def get_note_dict(html: str, note_id: str) -> Dict:
+    note = extract_initial_state(html, ["note", "noteDetailMap", note_id, "note"], undefined_value='""')
+    return transform_json_keys(note)
+
+
+def get_note_id(html: str) -> str:
+    return next(iter(extract_initial_state(html, ["note", "noteDetailMap"])))
+
+
+def run_benchmark(name: str, func: Callable, pages: List[str], rounds: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            func(page)
+    cost = time.perf_counter() - start_time
+    print(f"{name:<32} {cost / rounds / len(pages) * 1000:8.3f} ms/page")
+    return cost
+
+
+def main(file_paths: List[str], rounds: int = 50):
+    if file_paths:
+        pages = []
+        for file_path in file_paths:
+            with open(file_path, encoding="utf-8") as f:
+                pages.append(f.read())
+    else:
+        pages = [make_note_html()]
+    print(f"{len(pages)} pages, {sum(len(page) for page in pages) / len(pages) / 1024:.0f}KB per page, {rounds} rounds")
+
+    states = [extract_state_text(page) for page in pages]
+    legacy_cost = run_benchmark("legacy transform_json_keys", legacy_transform_json_keys, states, rounds)
+    cost = run_benchmark("transform_json_keys", lambda state: transform_json_keys(json.loads(state)), states, rounds)
+    print(f"speedup: {legacy_cost / cost:.1f}x")
+
+    note_ids = [get_note_id(page) for page in pages]
+    legacy_cost = run_benchmark("legacy get_note_dict", lambda item: legacy_get_note_dict(*item),
+                                list(zip(pages, note_ids)), rounds)
+    cost = run_benchmark("extract_initial_state", lambda item: get_note_dict(*item), list(zip(pages, note_ids)), rounds)
+    print(f"speedup: {legacy_cost / cost:.1f}x")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,154 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+from unittest import IsolatedAsyncioTestCase
+
+import async_db
+from async_db import AsyncMysqlDB, to_load_data_value
+
+
+class FakeCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def executemany(self, sql, args):
+        self.statements.append((sql, list(args)))
+        return len(args)
+
+    async def execute(self, sql, args=None):
+        if sql.startswith("LOAD DATA"):
+            # 暂存文件在合并后会被删除，这里记录文件内容
+            with open(args[0], encoding="utf-8") as f:
+                self.statements.append((sql, [f.read()]))
+            return 0
+        self.statements.append((sql, list(args or [])))
+        self._rows = [{"note_id": key, "content_hash": None} for key in args or [] if key != "missing"]
+        return len(self._rows)
+
+    async def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def cursor(self, *args):
+        return FakeCursor(self.statements)
+
+
+class FakePool:
+    def __init__(self):
+        self.statements = []
+
+    def acquire(self):
+        return FakeConnection(self.statements)
+
+
+class TestBatchInsertOrUpdate(IsolatedAsyncioTestCase):
+
+    async def test_one_statement_per_field_set(self):
+        pool = FakePool()
+        db = AsyncMysqlDB(pool)
+        items = [
+            {"comment_id": "1", "content": "a", "add_ts": 1},
+            {"comment_id": "2", "content": "b", "add_ts": 1},
+            {"comment_id": "3", "add_ts": 1},
+        ]
+        rows = await db.batch_insert_or_update("xhs_note_comment", items)
+        self.assertEqual(rows, 3)
+        self.assertEqual(len(pool.statements), 2)
+
+        sql, values = pool.statements[0]
+        self.assertTrue(sql.startswith("INSERT INTO xhs_note_comment (`comment_id`,`content`,`add_ts`) VALUES (%s,%s,%s)"))
+        self.assertIn("ON DUPLICATE KEY UPDATE `comment_id`=VALUES(`comment_id`),`content`=VALUES(`content`)", sql)
+        self.assertNotIn("`add_ts`=VALUES", sql)
+        self.assertEqual(values, [["1", "a", 1], ["2", "b", 1]])
+
+    async def test_update_fields(self):
+        pool = FakePool()
+        items = [{"note_id": "1", "title": "t", "liked_count": "5", "last_modify_ts": 2, "add_ts": 1}]
+        await AsyncMysqlDB(pool).batch_insert_or_update("xhs_note", items,
+                                                        update_fields=["liked_count", "last_modify_ts"])
+        sql, _ = pool.statements[0]
+        self.assertTrue(sql.endswith(
+            "ON DUPLICATE KEY UPDATE `liked_count`=VALUES(`liked_count`),`last_modify_ts`=VALUES(`last_modify_ts`)"))
+
+    async def test_empty_items(self):
+        pool = FakePool()
+        self.assertEqual(await AsyncMysqlDB(pool).batch_insert_or_update("xhs_note", []), 0)
+        self.assertEqual(pool.statements, [])
+
+
+class TestQueryByKeys(IsolatedAsyncioTestCase):
+
+    async def test_parameterized_in_query_in_chunks(self):
+        pool = FakePool()
+        db = AsyncMysqlDB(pool)
+        chunk_size = async_db.QUERY_BY_KEYS_CHUNK_SIZE
+        keys = [str(i) for i in range(chunk_size + 1)] + ["missing", 1, "1"]
+        rows = await db.query_by_keys("xhs_note", "note_id", keys, ("note_id", "content_hash"))
+
+        self.assertEqual(len(pool.statements), 2)
+        sql, values = pool.statements[0]
+        self.assertTrue(sql.startswith("SELECT `note_id`,`content_hash` FROM xhs_note WHERE `note_id` IN (%s,%s"))
+        self.assertEqual(len(values), chunk_size)
+        # 重复的ID只查一次，数字ID转换成字符串
+        self.assertEqual(pool.statements[1][1], [str(chunk_size), "missing"])
+        self.assertEqual(len(rows), chunk_size + 1)
+
+    async def test_empty_keys(self):
+        pool = FakePool()
+        self.assertEqual(await AsyncMysqlDB(pool).query_by_keys("xhs_note", "note_id", []), [])
+        self.assertEqual(pool.statements, [])
+
+
+class TestBulkLoadOrUpdate(IsolatedAsyncioTestCase):
+
+    def test_load_data_value(self):
+        self.assertEqual(to_load_data_value(None), "\\N")
+        self.assertEqual(to_load_data_value(12), "12")
+        self.assertEqual(to_load_data_value("a\tb\nc\\d"), "a\\tb\\nc\\\\d")
+
+    async def test_stage_load_and_merge(self):
+        pool = FakePool()
+        db = AsyncMysqlDB(pool)
+        items = [
+            {"comment_id": "1", "content": "a\tb", "add_ts": 1},
+            {"comment_id": "2", "content": None, "add_ts": 1},
+        ]
+        await db.bulk_load_or_update("xhs_note_comment", items)
+
+        sqls = [sql for sql, _ in pool.statements]
+        self.assertEqual(sqls[0], "CREATE TEMPORARY TABLE IF NOT EXISTS xhs_note_comment_staging LIKE xhs_note_comment")
+        self.assertEqual(sqls[1], "TRUNCATE TABLE xhs_note_comment_staging")
+        self.assertTrue(sqls[2].startswith("LOAD DATA LOCAL INFILE %s INTO TABLE xhs_note_comment_staging"))
+        # 倒序写入，同一批里重复的ID保留最后一条
+        self.assertEqual(pool.statements[2][1], ["2\t\\N\t1\n1\ta\\tb\t1\n"])
+        self.assertEqual(
+            sqls[3],
+            "INSERT INTO xhs_note_comment (`comment_id`,`content`,`add_ts`) SELECT `comment_id`,`content`,`add_ts` "
+            "FROM xhs_note_comment_staging ON DUPLICATE KEY UPDATE `comment_id`=VALUES(`comment_id`),`content`=VALUES(`content`)"
+        )
+        self.assertEqual(sqls[4], "DROP TEMPORARY TABLE IF EXISTS xhs_note_comment_staging")
@@ -0,0 +1,218 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import csv
+import gzip
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from tools.async_file_writer import (AsyncCsvWriter, AsyncJsonlWriter,
+                                     make_compressor, recover_partial_frame,
+                                     recover_partial_line)
+
+
+class TestAsyncJsonlWriter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "jsonl", "search_comments_2024-01-01.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_write_and_close(self):
+        writer = AsyncJsonlWriter(self.file_path, flush_items=2, flush_interval_sec=60, fsync_interval_sec=60)
+        await writer.write({"comment_id": "1", "content": "你好"})
+        await writer.write_many([{"comment_id": "2"}, {"comment_id": "3"}])
+        await writer.close()
+
+        with open(self.file_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line)["comment_id"] for line in lines], ["1", "2", "3"])
+        self.assertEqual(lines[0], '{"comment_id":"1","content":"你好"}')
+
+    async def test_flush_without_new_writes(self):
+        writer = AsyncJsonlWriter(self.file_path, flush_items=100, flush_interval_sec=0.05, fsync_interval_sec=60)
+        await writer.write({"comment_id": "1"})
+        self.assertFalse(os.path.exists(self.file_path))
+        # 没有新的写入，定时刷新协程也会把缓冲区写入文件
+        await asyncio.sleep(0.2)
+        with open(self.file_path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), '{"comment_id":"1"}\n')
+        await writer.close()
+        self.assertIsNone(writer._flush_task)
+
+    async def test_append_after_partial_line(self):
+        os.makedirs(os.path.dirname(self.file_path))
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            f.write('{"comment_id":"1"}\n{"comment_id":"2","con')
+
+        writer = AsyncJsonlWriter(self.file_path)
+        await writer.write({"comment_id": "3"})
+        await writer.close()
+
+        with open(self.file_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line)["comment_id"] for line in lines], ["1", "3"])
+
+    def test_recover_partial_line(self):
+        os.makedirs(os.path.dirname(self.file_path))
+        with open(self.file_path, "wb") as f:
+            f.write(b'{"a":1')
+        self.assertEqual(recover_partial_line(self.file_path), 6)
+        self.assertEqual(os.path.getsize(self.file_path), 0)
+        self.assertEqual(recover_partial_line(self.file_path), 0)
+
+
+class TestAsyncCsvWriter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "1_search_comments_2024-01-01.csv")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_header_written_once(self):
+        writer = AsyncCsvWriter(self.file_path, flush_items=1)
+        await writer.write({"comment_id": "1", "content": "a,b"})
+        await writer.write({"comment_id": "2", "content": "c"})
+        await writer.close()
+
+        # 第二次运行追加到同一个文件，不会重复写表头
+        writer = AsyncCsvWriter(self.file_path)
+        await writer.write({"comment_id": "3", "content": "d"})
+        await writer.close()
+
+        with open(self.file_path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows, [["comment_id", "content"], ["1", "a,b"], ["2", "c"], ["3", "d"]])
+
+
+class TestCompressedRotatedWriter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "1_search_comments_2024-01-01.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_gzip_append_across_runs(self):
+        for comment_id in ("1", "2"):
+            writer = AsyncJsonlWriter(self.file_path, flush_items=1, compression="gzip",
+                                      rotate_max_bytes=0, rotate_max_items=0)
+            await writer.write({"comment_id": comment_id})
+            await writer.close()
+
+        # 每次写入都是独立的 gzip member，拼接后仍然可以整体解压
+        with gzip.open(self.file_path + ".gz", "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line)["comment_id"] for line in lines], ["1", "2"])
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "1_search_comments_2024-01-01.manifest.json")))
+
+    async def test_append_after_partial_gzip_member(self):
+        for comment_id in ("1", "2"):
+            writer = AsyncJsonlWriter(self.file_path, flush_items=1, compression="gzip",
+                                      rotate_max_bytes=0, rotate_max_items=0)
+            await writer.write({"comment_id": comment_id})
+            await writer.close()
+        # 模拟第二次运行写最后一个 member 时进程崩溃
+        gzip_path = self.file_path + ".gz"
+        with open(gzip_path, "rb+") as f:
+            f.truncate(os.path.getsize(gzip_path) - 5)
+
+        writer = AsyncJsonlWriter(self.file_path, flush_items=1, compression="gzip",
+                                  rotate_max_bytes=0, rotate_max_items=0)
+        await writer.write({"comment_id": "3"})
+        await writer.close()
+
+        with gzip.open(gzip_path, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line)["comment_id"] for line in lines], ["1", "3"])
+
+    def test_recover_partial_frame(self):
+        # 第二段大于读取的块大小，需要跨块解压
+        segments = [b'{"a":1}\n', os.urandom(200 * 1024), b'{"a":3}\n']
+        for compression in ("gzip", "zstd"):
+            compress = make_compressor(compression)
+            payloads = [compress(segment) for segment in segments]
+            file_path = os.path.join(self.temp_dir.name, f"partial.{compression}")
+            with open(file_path, "wb") as f:
+                f.write(b"".join(payloads))
+            self.assertEqual(recover_partial_frame(file_path, compression), 0)
+
+            with open(file_path, "ab") as f:
+                f.write(payloads[0][:len(payloads[0]) // 2])
+            self.assertEqual(recover_partial_frame(file_path, compression), len(payloads[0]) // 2)
+            self.assertEqual(os.path.getsize(file_path), sum(len(payload) for payload in payloads))
+
+            with open(file_path, "rb+") as f:
+                f.truncate(len(payloads[0]) + len(payloads[1]) - 10)
+                f.seek(0, os.SEEK_END)
+                f.write(b"\x00" * 100)
+            self.assertEqual(recover_partial_frame(file_path, compression), len(payloads[1]) + 90)
+            self.assertEqual(os.path.getsize(file_path), len(payloads[0]))
+
+    async def test_rotate_by_items_with_manifest(self):
+        writer = AsyncJsonlWriter(self.file_path, flush_items=2, compression="",
+                                  rotate_max_bytes=0, rotate_max_items=2)
+        await writer.write_many([{"comment_id": str(i)} for i in range(5)])
+        await writer.close()
+
+        manifest_path = os.path.join(self.temp_dir.name, "1_search_comments_2024-01-01.manifest.json")
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual([segment["file"] for segment in manifest["segments"]],
+                         ["1_search_comments_2024-01-01.00001.jsonl"])
+        self.assertEqual(manifest["segments"][0]["items"], 5)
+
+        # 第二次运行：上一个分段已经超过上限，写入新的分段
+        writer = AsyncJsonlWriter(self.file_path, flush_items=1, compression="",
+                                  rotate_max_bytes=0, rotate_max_items=2)
+        await writer.write_many([{"comment_id": "5"}, {"comment_id": "6"}])
+        await writer.write({"comment_id": "7"})
+        await writer.close()
+
+        with open(manifest_path, encoding="utf-8") as f:
+            segments = json.load(f)["segments"]
+        self.assertEqual([(segment["file"], segment["items"], segment["closed"]) for segment in segments], [
+            ("1_search_comments_2024-01-01.00001.jsonl", 5, True),
+            ("1_search_comments_2024-01-01.00002.jsonl", 2, True),
+            ("1_search_comments_2024-01-01.00003.jsonl", 1, False),
+        ])
+        comment_ids = []
+        for segment in segments:
+            with open(os.path.join(self.temp_dir.name, segment["file"]), encoding="utf-8") as f:
+                comment_ids.extend(json.loads(line)["comment_id"] for line in f.read().splitlines())
+        self.assertEqual(comment_ids, [str(i) for i in range(8)])
+
+    async def test_csv_header_in_every_segment(self):
+        file_path = os.path.join(self.temp_dir.name, "1_search_comments_2024-01-01.csv")
+        writer = AsyncCsvWriter(file_path, flush_items=1, compression="gzip",
+                                rotate_max_bytes=1, rotate_max_items=0)
+        await writer.write({"comment_id": "1"})
+        await writer.write({"comment_id": "2"})
+        await writer.close()
+
+        for index, comment_id in ((1, "1"), (2, "2")):
+            with gzip.open(writer.segment_path(index), "rt", encoding="utf-8-sig", newline="") as f:
+                self.assertEqual(list(csv.reader(f)), [["comment_id"], [comment_id]])
+
+    def test_make_compressor(self):
+        self.assertEqual(make_compressor("")(b"abc"), b"abc")
+        self.assertEqual(gzip.decompress(make_compressor("gzip")(b"abc")), b"abc")
+        with self.assertRaises(ValueError):
+            make_compressor("lz4")
@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+import pyarrow.parquet as pq
+
+from tools.async_file_writer import close_all_writers
+from tools.async_parquet_writer import (AsyncParquetWriter,
+                                        make_partition_file_name)
+
+
+class TestAsyncParquetWriter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = make_partition_file_name(self.temp_dir.name, "xhs", "comments", "search")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_row_groups_and_types(self):
+        writer = AsyncParquetWriter(self.file_path, row_group_size=2, compression="zstd")
+        await writer.write_many([
+            {"comment_id": "1", "like_count": 3, "content": "a"},
+            {"comment_id": "2", "like_count": None, "content": "b"},
+            {"comment_id": "3", "like_count": "7", "content": None, "extra": 1},
+        ])
+        await writer.close()
+
+        parquet_file = pq.ParquetFile(self.file_path)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        table = parquet_file.read()
+        self.assertEqual(table.column_names, ["comment_id", "like_count", "content"])
+        self.assertEqual(table.column("like_count").to_pylist(), [3, None, 7])
+        self.assertEqual(table.column("content").to_pylist(), ["a", "b", None])
+
+    async def test_widen_column_to_string(self):
+        writer = AsyncParquetWriter(self.file_path, row_group_size=2, compression="zstd")
+        await writer.write_many([
+            {"comment_id": "1", "like_count": 3},
+            {"comment_id": "2", "like_count": 5},
+            {"comment_id": "3", "like_count": "1.2万"},
+            {"comment_id": "4", "like_count": 2.5},
+        ])
+        await writer.close()
+
+        # 已经写入的文件保持整数类型，不能转换的值写入新文件，整列放宽成字符串，不会变成空值
+        self.assertEqual(pq.read_table(self.file_path).column("like_count").to_pylist(), [3, 5])
+        root, ext = os.path.splitext(self.file_path)
+        table = pq.read_table(f"{root}.00002{ext}")
+        self.assertEqual(table.schema.field("like_count").type, "string")
+        self.assertEqual(table.column("like_count").to_pylist(), ["1.2万", "2.5"])
+
+    async def test_partitioned_path_and_close_all(self):
+        self.assertIn(os.path.join("platform=xhs", "type=comments", "date="), self.file_path)
+        await AsyncParquetWriter.get_writer(self.file_path).write({"note_id": "n1"})
+        await close_all_writers()
+        self.assertEqual(pq.read_table(self.file_path).num_rows, 1)
@@ -0,0 +1,82 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from async_sqlite_db import AsyncSqliteDB
+
+
+class TestAsyncSqliteDB(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.temp_dir.name, "sqlite", "media_crawler.db"))
+        with open("schema/sqlite_tables.sql", encoding="utf-8") as f:
+            await self.db.executescript(f.read())
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def make_comment(comment_id: str, content: str, add_ts: int) -> dict:
+        return {
+            "comment_id": comment_id,
+            "create_time": 1,
+            "note_id": "n1",
+            "user_id": "u1",
+            "sub_comment_count": 0,
+            "content": content,
+            "add_ts": add_ts,
+            "last_modify_ts": add_ts,
+        }
+
+    async def test_batch_upsert_keeps_add_ts(self):
+        items = [self.make_comment(str(i), "first", 100) for i in range(3)]
+        await self.db.batch_insert_or_update("xhs_note_comment", items)
+        await self.db.batch_insert_or_update("xhs_note_comment", [self.make_comment("1", "second", 200)])
+
+        rows = await self.db.query("select * from xhs_note_comment order by comment_id")
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]["content"], "second")
+        self.assertEqual(rows[1]["add_ts"], 100)
+        self.assertEqual(rows[1]["last_modify_ts"], 200)
+
+    async def test_query_by_keys(self):
+        await self.db.batch_insert_or_update("xhs_note_comment", [self.make_comment(str(i), "c", 100) for i in range(3)])
+        await self.db.execute("update xhs_note_comment set content_hash = 'h1' where comment_id = '1'")
+
+        rows = await self.db.query_by_keys("xhs_note_comment", "comment_id", ["1", 2, "9"], ("comment_id", "content_hash"))
+        self.assertEqual(sorted((row["comment_id"], row["content_hash"]) for row in rows), [("1", "h1"), ("2", None)])
+        rows = await self.db.query_by_keys("xhs_note_comment", "comment_id", ["0"])
+        self.assertEqual(rows[0]["content"], "c")
+
+    async def test_wal_mode_and_update_table(self):
+        row_id = await self.db.item_to_table("xhs_creator", {
+            "user_id": "u1", "nickname": "a", "add_ts": 1, "last_modify_ts": 1
+        })
+        self.assertEqual(row_id, 1)
+        await self.db.update_table("xhs_creator", {"nickname": "b"}, "user_id", "u1")
+        creator = await self.db.get_first("select * from xhs_creator where user_id = ?", "u1")
+        self.assertEqual(creator["nickname"], "b")
+        journal_mode = await self.db.get_first("PRAGMA journal_mode")
+        self.assertEqual(journal_mode["journal_mode"], "wal")
+
+    async def test_iter_query(self):
+        await self.db.batch_insert_or_update("xhs_note_comment", [self.make_comment(str(i), "c", 100) for i in range(5)])
+
+        batches = [batch async for batch in self.db.iter_query(
+            "select comment_id from xhs_note_comment where content = ? order by comment_id", "c", batch_size=2)]
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[2], [{"comment_id": "4"}])
@@ -0,0 +1,166 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+
+from base.base_crawler import AbstractStore
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                     AsyncStoreQueue, put_store_items)
+from tools.async_file_writer import close_all_writers
+
+
+class MemoryStore(AbstractStore):
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.contents = []
+        self.comments = []
+        self.comment_batches = []
+
+    async def store_content(self, content_item):
+        await asyncio.sleep(self.delay)
+        self.contents.append(content_item)
+
+    async def store_comment(self, comment_item):
+        await asyncio.sleep(self.delay)
+        self.comments.append(comment_item)
+
+    async def store_comments(self, comment_items):
+        self.comment_batches.append(len(comment_items))
+        await super().store_comments(comment_items)
+
+    async def store_creator(self, creator):
+        pass
+
+
+class FlakyStore(MemoryStore):
+    """前 failures 次写入失败，之后正常写入"""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    async def store_contents(self, content_items):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise IOError("db gone away")
+        await super().store_contents(content_items)
+
+
+class TestAsyncStoreQueue(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        await close_all_writers()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_queue(self, **kwargs) -> AsyncStoreQueue:
+        kwargs.setdefault("retry_backoff_sec", 0)
+        return AsyncStoreQueue(recovery_dir=self.temp_dir.name, **kwargs)
+
+    def read_recovery_file(self, store_queue: AsyncStoreQueue):
+        if not os.path.exists(store_queue.recovery_file_path()):
+            return []
+        with open(store_queue.recovery_file_path(), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    async def test_close_flushes_everything(self):
+        store_queue = self.make_queue(max_size=10, batch_size=4, workers=1)
+        store = MemoryStore()
+        for i in range(25):
+            await store_queue.put(store, STORE_TYPE_COMMENT, {"comment_id": i})
+        await store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": 1})
+        await store_queue.close()
+        self.assertEqual([item["comment_id"] for item in store.comments], list(range(25)))
+        self.assertEqual(store.contents, [{"note_id": 1}])
+        self.assertTrue(all(size <= 4 for size in store.comment_batches))
+        self.assertLess(len(store.comment_batches), 25)
+
+    async def test_close_timeout_spills_remaining_items(self):
+        store_queue = self.make_queue(max_size=10, batch_size=1, workers=1)
+        store = MemoryStore(delay=0.05)
+        for i in range(10):
+            await store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": i})
+        await store_queue.close(timeout=0.12)
+        self.assertLess(len(store.contents), 10)
+        self.assertIsNone(store_queue._queue)
+        await close_all_writers()
+        records = self.read_recovery_file(store_queue)
+        self.assertEqual(store_queue.spilled_count, len(records))
+        # 写入的和写到恢复文件的加起来不丢数据；被取消的那条可能已经写入，允许重复
+        stored_ids = {item["note_id"] for item in store.contents}
+        spilled_ids = {record["item"]["note_id"] for record in records}
+        self.assertEqual(stored_ids | spilled_ids, set(range(10)))
+        self.assertTrue(all(record["store_type"] == STORE_TYPE_CONTENT for record in records))
+        self.assertTrue(records[0]["store"].endswith("MemoryStore"))
+
+    async def test_put_waits_when_queue_is_full(self):
+        store_queue = self.make_queue(max_size=2, batch_size=1, workers=1)
+        store = MemoryStore(delay=0.05)
+        for i in range(3):
+            await store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": i})
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": 3}), timeout=0.01)
+        await store_queue.close()
+
+    async def test_store_error_does_not_stop_worker(self):
+        class BrokenStore(MemoryStore):
+            async def store_content(self, content_item):
+                raise ValueError("broken")
+
+        store_queue = self.make_queue(max_size=10, batch_size=10, workers=1, max_retries=0)
+        store = MemoryStore()
+        await store_queue.put(BrokenStore(), STORE_TYPE_CONTENT, {"note_id": 1})
+        await store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": 2})
+        await store_queue.close()
+        self.assertEqual(store.contents, [{"note_id": 2}])
+
+    async def test_retry_until_stored(self):
+        store_queue = self.make_queue(max_size=10, batch_size=10, workers=1, max_retries=2)
+        store = FlakyStore(failures=2)
+        await store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": 1})
+        await store_queue.close()
+        self.assertEqual(store.attempts, 3)
+        self.assertEqual(store.contents, [{"note_id": 1}])
+        self.assertEqual(store_queue.spilled_count, 0)
+        self.assertFalse(os.path.exists(store_queue.recovery_file_path()))
+
+    async def test_failed_after_retries_is_spilled(self):
+        store_queue = self.make_queue(max_size=10, batch_size=10, workers=1, max_retries=1)
+        store = FlakyStore(failures=5)
+        await store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": 1, "title": "标题"})
+        await store_queue.put(store, STORE_TYPE_CONTENT, {"note_id": 2})
+        await store_queue.close()
+        await close_all_writers()
+        self.assertEqual(store.attempts, 2)
+        self.assertEqual(store.contents, [])
+        records = self.read_recovery_file(store_queue)
+        self.assertEqual([record["item"] for record in records], [{"note_id": 1, "title": "标题"}, {"note_id": 2}])
+        self.assertIn("db gone away", records[0]["reason"])
+        self.assertEqual(records[0]["platform"], config.PLATFORM)
+
+    async def test_put_store_items_without_queue_is_one_batch(self):
+        store = MemoryStore()
+        with mock.patch.object(config, "ENABLE_STORE_QUEUE", False):
+            await put_store_items(store, STORE_TYPE_COMMENT, [{"comment_id": i} for i in range(20)])
+        self.assertEqual(store.comment_batches, [20])
+        self.assertEqual(len(store.comments), 20)
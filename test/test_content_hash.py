@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from async_sqlite_db import AsyncSqliteDB
+from tools.content_hash import (ChangeDetectionStats, filter_changed_items,
+                                make_content_hash)
+from var import media_crawler_db_var
+
+
+class TestContentHash(unittest.TestCase):
+
+    def test_ignore_timestamps_and_volatile_fields(self):
+        item = {"note_id": "1", "liked_count": "10", "last_modify_ts": 1, "add_ts": 1, "xsec_token": "a"}
+        same = {"xsec_token": "b", "add_ts": 2, "last_modify_ts": 2, "liked_count": "10", "note_id": "1"}
+        self.assertEqual(make_content_hash(item, ("xsec_token",)), make_content_hash(same, ("xsec_token",)))
+        self.assertNotEqual(make_content_hash(item), make_content_hash(same))
+        self.assertEqual(len(make_content_hash(item)), 32)
+
+    def test_filter_changed_items(self):
+        unchanged = {"comment_id": "1", "like_count": "1"}
+        changed = {"comment_id": "2", "like_count": "5"}
+        new = {"comment_id": "3", "like_count": "0"}
+        existing_hashes = {"1": make_content_hash(unchanged), "2": make_content_hash({"comment_id": "2", "like_count": "4"})}
+
+        items = filter_changed_items([unchanged, changed, new], "comment_id", existing_hashes, "comment")
+        self.assertEqual([item["comment_id"] for item in items], ["2", "3"])
+        self.assertEqual(unchanged["content_hash"], existing_hashes["1"])
+
+    def test_stats(self):
+        stats = ChangeDetectionStats()
+        stats.record("content", 10, 7)
+        stats.record("content", 10, 3)
+        self.assertEqual((stats.checked["content"], stats.skipped["content"]), (20, 10))
+        stats.report()
+
+
+class TestSkipUnchangedWrites(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.temp_dir.name, "media_crawler.db"))
+        with open("schema/sqlite_tables.sql", encoding="utf-8") as f:
+            await self.db.executescript(f.read())
+        self.token = media_crawler_db_var.set(self.db)
+
+    async def asyncTearDown(self):
+        media_crawler_db_var.reset(self.token)
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def make_comment(comment_id: str, like_count: str, last_modify_ts: int) -> dict:
+        return {
+            "comment_id": comment_id, "create_time": 1, "ip_location": "", "note_id": "n1", "content": "c",
+            "user_id": "u1", "nickname": "", "avatar": f"https://img/{last_modify_ts}", "sub_comment_count": 0,
+            "pictures": "", "parent_comment_id": 0, "last_modify_ts": last_modify_ts, "like_count": like_count,
+        }
+
+    async def test_store_comments_skips_unchanged(self):
+        from store.xhs.xhs_store_impl import XhsSqliteStoreImplement
+        store = XhsSqliteStoreImplement()
+        await store.store_comments([self.make_comment("1", "1", 100), self.make_comment("2", "1", 100)])
+        # 第二次爬取：评论1没有变化（头像地址带签名，不参与比较），评论2点赞数变了
+        await store.store_comments([self.make_comment("1", "1", 200), self.make_comment("2", "3", 200)])
+
+        rows = await self.db.query("select comment_id, like_count, last_modify_ts from xhs_note_comment order by comment_id")
+        self.assertEqual([(row["comment_id"], row["like_count"], row["last_modify_ts"]) for row in rows],
+                         [("1", "1", 100), ("2", "3", 200)])
+
+    async def test_update_only_rewrites_counters(self):
+        from store.xhs.xhs_store_impl import XhsSqliteStoreImplement
+        store = XhsSqliteStoreImplement()
+
+        def make_note(title: str, liked_count: str, last_modify_ts: int) -> dict:
+            return {"note_id": "1", "type": "normal", "title": title, "desc": "d", "time": 1, "last_update_time": 1,
+                    "user_id": "u1", "liked_count": liked_count, "last_modify_ts": last_modify_ts}
+
+        await store.store_contents([make_note("t1", "1", 100)])
+        # 标题和点赞数都变了：只改写互动计数，标题保留首次入库的值
+        await store.store_contents([make_note("t2", "5", 200)])
+
+        rows = await self.db.query("select title, liked_count, last_modify_ts from xhs_note")
+        self.assertEqual([(row["title"], row["liked_count"], row["last_modify_ts"]) for row in rows],
+                         [("t1", "5", 200)])
+
+    async def test_douyin_skips_new_aweme_without_title(self):
+        from store.douyin.douyin_store_impl import DouyinSqliteStoreImplement
+        store = DouyinSqliteStoreImplement()
+
+        def make_aweme(aweme_id: str, title: str, liked_count: str) -> dict:
+            return {"aweme_id": aweme_id, "aweme_type": "0", "title": title, "create_time": 1,
+                    "liked_count": liked_count, "last_modify_ts": 1}
+
+        await store.store_contents([make_aweme("1", "t", "1"), make_aweme("2", "", "1")])
+        # 已入库的视频即使没有标题也会更新，新视频没有标题不入库
+        await store.store_contents([make_aweme("1", "", "2"), make_aweme("3", "", "1")])
+
+        rows = await self.db.query("select aweme_id, liked_count from douyin_aweme order by aweme_id")
+        self.assertEqual([(row["aweme_id"], row["liked_count"]) for row in rows], [("1", "2")])
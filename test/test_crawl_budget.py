@@ -0,0 +1,115 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.crawl_budget import (CrawlBudget, parse_duration,
+                                run_crawler_within_budget)
+
+
+class TestCrawlBudget(unittest.TestCase):
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("90"), 90)
+        self.assertEqual(parse_duration("30m"), 1800)
+        self.assertEqual(parse_duration("2h"), 7200)
+        self.assertEqual(parse_duration(""), 0)
+        with self.assertRaises(ValueError):
+            parse_duration("2d")
+
+    def test_unlimited(self):
+        budget = CrawlBudget()
+        budget.record_request(10000)
+        budget.begin_slice(3)
+        self.assertFalse(budget.enabled)
+        self.assertFalse(budget.is_exhausted())
+        self.assertFalse(budget.is_slice_exhausted())
+        self.assertIsNone(budget.hard_timeout())
+
+    def test_request_budget_split_by_slices(self):
+        budget = CrawlBudget(max_requests=10)
+        budget.begin_slice(2)
+        budget.record_request(4)
+        self.assertFalse(budget.is_slice_exhausted())
+        budget.record_request(1)
+        self.assertTrue(budget.is_slice_exhausted())
+        self.assertFalse(budget.is_exhausted())
+
+        # 第二个单元拿到剩下的全部请求数
+        budget.begin_slice(1)
+        budget.record_request(4)
+        self.assertFalse(budget.is_slice_exhausted())
+        budget.record_request(1)
+        self.assertTrue(budget.is_exhausted())
+
+    def test_duration_budget(self):
+        budget = CrawlBudget(max_duration_sec=2, drain_reserve_sec=1)
+        self.assertFalse(budget.is_exhausted())
+        time.sleep(1.1)
+        self.assertTrue(budget.is_exhausted())
+        self.assertLessEqual(budget.hard_timeout(), 1)
+
+    def test_drain_timeout(self):
+        self.assertIsNone(CrawlBudget().drain_timeout(grace_sec=30))
+        budget = CrawlBudget(max_duration_sec=60)
+        self.assertGreater(budget.drain_timeout(grace_sec=30), 59)
+        # 运行时长用完后至少留出 grace_sec 收尾
+        budget._start_time -= 120
+        self.assertEqual(budget.drain_timeout(grace_sec=30), 30)
+
+    def test_budget_exhausted_before_hard_timeout(self):
+        # 没有配置收尾预留时间时也要先于强制取消用完预算
+        budget = CrawlBudget(max_duration_sec=10, drain_reserve_sec=0)
+        self.assertLess(budget.remaining_seconds(), budget.hard_timeout())
+
+
+class FakeCrawler:
+    def __init__(self, run_sec: float):
+        self.run_sec = run_sec
+        self.events = []
+
+    async def start(self):
+        try:
+            await asyncio.sleep(self.run_sec)
+            self.events.append("finished")
+        except asyncio.CancelledError:
+            self.events.append("cancelled")
+            raise
+
+    async def close(self):
+        self.events.append("closed")
+
+
+class TestRunCrawlerWithinBudget(IsolatedAsyncioTestCase):
+
+    async def test_finished_in_time(self):
+        crawler = FakeCrawler(run_sec=0)
+        budget = CrawlBudget(max_duration_sec=10)
+        budget.start()
+        self.assertTrue(await run_crawler_within_budget(crawler, budget))
+        self.assertEqual(crawler.events, ["finished"])
+
+    async def test_hard_timeout_closes_before_cancel(self):
+        crawler = FakeCrawler(run_sec=60)
+        budget = CrawlBudget(max_duration_sec=1)
+        budget.start()
+        budget._start_time -= 0.9
+        self.assertFalse(await run_crawler_within_budget(crawler, budget))
+        # 先关闭浏览器上下文，再取消爬虫任务
+        self.assertEqual(crawler.events, ["closed", "cancelled"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
+
+import config
+from download_media import download_manifests, iter_manifest_items
+from test.test_media_download import MEDIA_CONTENT, make_mock_client
+from tools.async_file_writer import close_all_writers
+from tools.media_download import (make_manifest_file_path,
+                                  submit_media_download,
+                                  submit_segmented_media_download)
+
+
+class TestMediaManifest(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.patchers = [
+            patch.object(config, "MEDIA_DOWNLOAD_MANIFEST_ONLY", True),
+            patch.object(config, "MEDIA_MANIFEST_DIR", os.path.join(self.temp_dir.name, "manifest")),
+            patch.object(config, "PLATFORM", "bili"),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    async def asyncTearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        self.temp_dir.cleanup()
+
+    async def write_manifest(self) -> str:
+        media_dir = os.path.join(self.temp_dir.name, "media")
+        headers = {"Referer": "https://www.bilibili.com", "Cookie": "SESSDATA=secret"}
+        await submit_media_download("https://cdn.test/0.jpg", os.path.join(media_dir, "1", "0.jpg"),
+                                    headers=headers, media_key="bili:0", content_id="1")
+        await submit_segmented_media_download(
+            [{"url": "https://cdn.test/big.mp4", "byte_range": (0, 59999)},
+             {"url": "https://cdn.test/big.mp4", "byte_range": (60000, len(MEDIA_CONTENT) - 1)}],
+            os.path.join(media_dir, "1", "video.mp4"), headers=headers, content_id="1")
+        await submit_media_download("https://cdn.test/2.jpg", os.path.join(media_dir, "2", "0.jpg"), content_id="2")
+        # 同一个文件重复提交时下载命令只下载一次
+        await submit_media_download("https://cdn.test/2.jpg", os.path.join(media_dir, "2", "0.jpg"), content_id="2")
+        await close_all_writers()
+        return make_manifest_file_path("bili")
+
+    async def test_manifest_only_writes_rows(self):
+        manifest_path = await self.write_manifest()
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "media")))
+        with open(manifest_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([row["kind"] for row in rows], ["image", "video", "image", "image"])
+        self.assertEqual(rows[0]["url"], "https://cdn.test/0.jpg")
+        self.assertEqual((rows[0]["platform"], rows[0]["content_id"], rows[0]["media_key"]), ("bili", "1", "bili:0"))
+        # 登录态不写入清单
+        self.assertEqual(rows[1]["headers"], {"Referer": "https://www.bilibili.com"})
+        self.assertEqual(len(list(iter_manifest_items([manifest_path]))), 3)
+
+    async def test_download_manifests(self):
+        manifest_path = await self.write_manifest()
+        # 上次下载时按真实格式改了扩展名的图片也算已经下载
+        existing_file_path = os.path.join(self.temp_dir.name, "media", "2", "0.webp")
+        os.makedirs(os.path.dirname(existing_file_path))
+        with open(existing_file_path, "wb") as f:
+            f.write(b"exists")
+        # 爬虫崩溃时写了一半的行
+        with open(manifest_path, "a", encoding="utf-8") as f:
+            f.write('{"url": "https://cdn.test/3.jpg", "file_pa')
+
+        with patch.object(httpx, "AsyncClient", make_mock_client):
+            pool = await download_manifests([manifest_path], workers=4, per_host_concurrency=2, max_bytes_per_sec=0)
+
+        self.assertEqual((pool.success_count, pool.failed_count), (2, 0))
+        for file_name in ("0.jpg", "video.mp4"):
+            with open(os.path.join(self.temp_dir.name, "media", "1", file_name), "rb") as f:
+                self.assertEqual(f.read(), MEDIA_CONTENT)
+        with open(existing_file_path, "rb") as f:
+            self.assertEqual(f.read(), b"exists")
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "media", "2", "0.jpg")))
@@ -0,0 +1,88 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from async_sqlite_db import AsyncSqliteDB
+from tools.engagement_snapshot import make_snapshot_items, parse_count
+from var import media_crawler_db_var
+
+
+class TestEngagementSnapshot(unittest.TestCase):
+
+    def test_parse_count(self):
+        self.assertEqual(parse_count(12), 12)
+        self.assertEqual(parse_count("1,234"), 1234)
+        self.assertEqual(parse_count("1.2万"), 12000)
+        self.assertEqual(parse_count("10w+"), 100000)
+        self.assertEqual(parse_count("3亿"), 300000000)
+        self.assertIsNone(parse_count(""))
+        self.assertIsNone(parse_count(None))
+        self.assertIsNone(parse_count("赞"))
+
+    def test_make_snapshot_items(self):
+        items = [{"video_id": 1, "liked_count": "5", "video_play_count": "1.5万"}]
+        snapshot_items = make_snapshot_items("bili", items, "video_id",
+                                             {"liked_count": "liked_count", "view_count": "video_play_count"})
+        self.assertEqual(len(snapshot_items), 1)
+        snapshot_item = snapshot_items[0]
+        self.assertEqual((snapshot_item["platform"], snapshot_item["content_id"]), ("bili", "1"))
+        self.assertEqual((snapshot_item["liked_count"], snapshot_item["view_count"]), (5, 15000))
+        self.assertIsNone(snapshot_item["share_count"])
+
+
+class TestSnapshotStore(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.temp_dir.name, "media_crawler.db"))
+        with open("schema/sqlite_tables.sql", encoding="utf-8") as f:
+            await self.db.executescript(f.read())
+        self.token = media_crawler_db_var.set(self.db)
+
+    async def asyncTearDown(self):
+        media_crawler_db_var.reset(self.token)
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def make_note(note_id: str, liked_count: str, last_modify_ts: int) -> dict:
+        return {
+            "note_id": note_id, "type": "normal", "title": "t", "desc": "d", "video_url": "", "time": 1,
+            "last_update_time": 1, "user_id": "u1", "nickname": "", "avatar": "", "liked_count": liked_count,
+            "collected_count": "1", "comment_count": "2", "share_count": "3", "ip_location": "", "image_list": "",
+            "tag_list": "", "last_modify_ts": last_modify_ts, "note_url": "", "source_keyword": "", "xsec_token": "",
+        }
+
+    async def test_counter_changes_only_append_snapshots(self):
+        from store.xhs.xhs_store_impl import XhsSqliteStoreImplement
+        store = XhsSqliteStoreImplement()
+        with patch.object(config, "ENABLE_ENGAGEMENT_SNAPSHOT", True):
+            await store.store_contents([self.make_note("1", "10", 100)])
+            # 第二次刷新只有点赞数变化：追加快照，不改写笔记表
+            await store.store_contents([self.make_note("1", "1.1万", 200)])
+
+        rows = await self.db.query("select liked_count, last_modify_ts from xhs_note")
+        self.assertEqual([(row["liked_count"], row["last_modify_ts"]) for row in rows], [("10", 100)])
+        rows = await self.db.query(
+            "select platform, content_id, liked_count, share_count from content_engagement_snapshot order by id")
+        self.assertEqual([(row["platform"], row["content_id"], row["liked_count"], row["share_count"]) for row in rows],
+                         [("xhs", "1", 10, 3), ("xhs", "1", 11000, 3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
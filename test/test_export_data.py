@@ -0,0 +1,58 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from async_sqlite_db import AsyncSqliteDB
+from export_data import export_platform, export_table
+from var import media_crawler_db_var
+
+
+class TestExportData(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.temp_dir.name, "media_crawler.db"))
+        with open("schema/sqlite_tables.sql", encoding="utf-8") as f:
+            await self.db.executescript(f.read())
+        await self.db.batch_insert_or_update("xhs_note_comment", [{
+            "comment_id": str(i), "create_time": i, "note_id": "n1", "user_id": "u1", "sub_comment_count": 0,
+            "content": f"评论{i}", "add_ts": 1, "last_modify_ts": 1,
+        } for i in range(7)])
+        self.token = media_crawler_db_var.set(self.db)
+
+    async def asyncTearDown(self):
+        media_crawler_db_var.reset(self.token)
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def test_export_jsonl(self):
+        file_path = os.path.join(self.temp_dir.name, "xhs_note_comment.jsonl")
+        row_count = await export_table("xhs_note_comment", file_path, "jsonl", batch_size=3)
+        self.assertEqual(row_count, 7)
+        with open(file_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row["comment_id"] for row in rows], [str(i) for i in range(7)])
+        self.assertEqual(rows[6]["content"], "评论6")
+
+    async def test_export_parquet(self):
+        import pyarrow.parquet as pq
+        output_dir = os.path.join(self.temp_dir.name, "export")
+        await export_platform("xhs", "parquet", output_dir, batch_size=3, tables=["xhs_note_comment"])
+        file_names = os.listdir(os.path.join(output_dir, "xhs"))
+        self.assertEqual(len(file_names), 1)
+        table = pq.read_table(os.path.join(output_dir, "xhs", file_names[0]))
+        self.assertEqual(table.num_rows, 7)
+        self.assertEqual(table.column("create_time").to_pylist(), list(range(7)))
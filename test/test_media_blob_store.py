@@ -0,0 +1,90 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from tools.media_blob_store import MediaBlobStore, make_url_media_key
+from tools.media_download import link_downloaded_media
+
+
+class TestMediaBlobStore(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.blob_store = MediaBlobStore(os.path.join(self.temp_dir.name, "media_blobs"))
+
+    async def asyncTearDown(self):
+        await self.blob_store.close()
+        self.temp_dir.cleanup()
+
+    def write_file(self, relative_path: str, content: bytes) -> str:
+        file_path = os.path.join(self.temp_dir.name, relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as f:
+            f.write(content)
+        return file_path
+
+    async def test_same_content_stored_once(self):
+        first = self.write_file("images/n1/0.jpg", b"same image")
+        second = self.write_file("images/n2/0.jpg", b"same image")
+        blob_path = await self.blob_store.add(first, "xhs:a.jpg")
+        self.assertEqual(await self.blob_store.add(second, "xhs:b.jpg"), blob_path)
+
+        self.assertTrue(os.path.samefile(first, blob_path))
+        self.assertTrue(os.path.samefile(second, blob_path))
+        self.assertEqual(len(os.listdir(os.path.dirname(blob_path))), 1)
+        self.assertEqual(self.blob_store.dedup_bytes, len(b"same image"))
+
+    async def test_link_known_media_key(self):
+        blob_path = await self.blob_store.add(self.write_file("images/n1/0.jpg", b"image"), "wb:pid1")
+        target = os.path.join(self.temp_dir.name, "images", "n3", "0.jpg")
+        self.assertTrue(await self.blob_store.link_existing("wb:pid1", target))
+        self.assertTrue(os.path.samefile(target, blob_path))
+        self.assertFalse(await self.blob_store.link_existing("wb:pid2", target + "x"))
+        self.assertEqual(self.blob_store.dedup_count, 1)
+
+    async def test_link_uses_real_image_extension(self):
+        # 请求的是 avif，实际下载到的是 jpg，扩展名已经改正后放入文件库
+        blob_path = await self.blob_store.add(self.write_file("images/n1/0.jpg", b"image"), "xhs:a:avif")
+        target = os.path.join(self.temp_dir.name, "images", "n5", "0.avif")
+        with patch.object(config, "ENABLE_MEDIA_BLOB_STORE", True), \
+                patch.object(MediaBlobStore, "_instance", self.blob_store):
+            task = {"url": "https://x", "file_path": target, "media_key": "xhs:a:avif"}
+            self.assertTrue(await link_downloaded_media(task))
+        self.assertEqual(task["file_path"], os.path.join(self.temp_dir.name, "images", "n5", "0.jpg"))
+        self.assertTrue(os.path.samefile(task["file_path"], blob_path))
+        self.assertFalse(os.path.exists(target))
+
+    async def test_skip_download_of_known_media(self):
+        await self.blob_store.add(self.write_file("images/n1/0.jpg", b"image"), "xhs:a.jpg")
+        target = os.path.join(self.temp_dir.name, "images", "n4", "0.jpg")
+        with patch.object(config, "ENABLE_MEDIA_BLOB_STORE", True), \
+                patch.object(MediaBlobStore, "_instance", self.blob_store):
+            self.assertTrue(await link_downloaded_media({"url": "https://x", "file_path": target, "media_key": "xhs:a.jpg"}))
+            self.assertFalse(await link_downloaded_media({"url": "https://x", "file_path": target + "x", "media_key": None}))
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), b"image")
+
+
+class TestMediaKey(unittest.TestCase):
+
+    def test_make_url_media_key(self):
+        self.assertEqual(
+            make_url_media_key("xhs", "http://sns-webpic-qc.xhscdn.com/202403211626/c4fc/110/0/01e50c1c_0.jpg!nd_dft_wlteh_webp_3"),
+            "xhs:01e50c1c_0.jpg")
+        self.assertEqual(make_url_media_key("xhs", "https://ci.xiaohongshu.com/01e50c1c_0.jpg?imageView2/2/w/format/png"),
+                         "xhs:01e50c1c_0.jpg")
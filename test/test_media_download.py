@@ -0,0 +1,233 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
+
+import config
+from tools.async_file_writer import close_all_writers
+from tools.media_download import (BandwidthLimiter, MediaDownloadPool,
+                                  correct_image_extension,
+                                  download_segmented_media, download_to_file,
+                                  make_byte_range_segments,
+                                  make_manifest_file_path,
+                                  make_sidecar_file_path, make_temp_file_path,
+                                  sniff_image_extension)
+
+MEDIA_CONTENT = os.urandom(100 * 1024)
+
+
+class InterruptedStream(httpx.AsyncByteStream):
+    """
+    发送一部分数据后连接中断
+    """
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def __aiter__(self):
+        yield self.content
+        raise httpx.ReadError("connection reset")
+
+
+def media_handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/missing.jpg":
+        return httpx.Response(404, content=b"not found")
+    if request.url.path == "/broken.mp4":
+        raise httpx.ReadError("connection reset", request=request)
+    if request.url.path == "/flaky.mp4":
+        etag = '"v1"'
+        range_header = request.headers.get("Range")
+        if range_header is None:
+            return httpx.Response(200, headers={"Content-Length": str(len(MEDIA_CONTENT)), "ETag": etag},
+                                  stream=InterruptedStream(MEDIA_CONTENT[:30000]))
+        assert request.headers.get("If-Range") == etag
+        start = int(range_header[len("bytes="):-1])
+        return httpx.Response(206, content=MEDIA_CONTENT[start:], headers={
+            "Content-Range": f"bytes {start}-{len(MEDIA_CONTENT) - 1}/{len(MEDIA_CONTENT)}", "ETag": etag,
+        })
+    if request.url.path == "/big.mp4" and request.headers.get("Range"):
+        start, end = request.headers["Range"][len("bytes="):].split("-")
+        end = int(end) if end else len(MEDIA_CONTENT) - 1
+        return httpx.Response(206, content=MEDIA_CONTENT[int(start):end + 1], headers={
+            "Content-Range": f"bytes {start}-{end}/{len(MEDIA_CONTENT)}",
+        })
+    if request.url.path.startswith("/part"):
+        index = int(request.url.path[len("/part"):])
+        return httpx.Response(200, content=MEDIA_CONTENT[index * 40000:(index + 1) * 40000])
+    return httpx.Response(200, content=MEDIA_CONTENT)
+
+
+def make_mock_client(proxies=None) -> httpx.AsyncClient:
+    return ASYNC_CLIENT(transport=httpx.MockTransport(media_handler))
+
+
+ASYNC_CLIENT = httpx.AsyncClient
+
+
+class TestMediaDownload(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(media_handler))
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        self.temp_dir.cleanup()
+
+    async def test_stream_to_file(self):
+        file_path = os.path.join(self.temp_dir.name, "note", "0.jpg")
+        self.assertTrue(await download_to_file(self.client, "https://cdn.test/0.jpg", file_path, chunk_size=4096))
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), MEDIA_CONTENT)
+        self.assertFalse(os.path.exists(make_temp_file_path(file_path)))
+
+    async def test_failed_download_leaves_no_file(self):
+        for url in ("https://cdn.test/missing.jpg", "https://cdn.test/broken.mp4"):
+            file_path = os.path.join(self.temp_dir.name, os.path.basename(url))
+            self.assertFalse(await download_to_file(self.client, url, file_path, max_retries=0))
+            self.assertFalse(os.path.exists(file_path))
+            self.assertFalse(os.path.exists(make_temp_file_path(file_path)))
+
+    async def test_resume_with_range(self):
+        file_path = os.path.join(self.temp_dir.name, "video.mp4")
+        # 第一次下载中断，保留临时文件和记录文件
+        self.assertFalse(await download_to_file(self.client, "https://cdn.test/flaky.mp4", file_path,
+                                                chunk_size=1000, max_retries=0))
+        self.assertEqual(os.path.getsize(make_temp_file_path(file_path)), 30000)
+        with open(make_sidecar_file_path(file_path), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["expected_size"], len(MEDIA_CONTENT))
+
+        # 再次下载时从断点继续
+        self.assertTrue(await download_to_file(self.client, "https://cdn.test/flaky.mp4", file_path, max_retries=0))
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), MEDIA_CONTENT)
+        self.assertFalse(os.path.exists(make_temp_file_path(file_path)))
+        self.assertFalse(os.path.exists(make_sidecar_file_path(file_path)))
+
+
+    def test_correct_image_extension(self):
+        images = {
+            "a.avif": b"\xff\xd8\xff\xe0\x00\x10JFIF",
+            "b.jpg": b"RIFF\x00\x00\x00\x00WEBPVP8 ",
+            "c.jpeg": b"\xff\xd8\xff\xe0\x00\x10JFIF",
+            "d.webp": b"\x00\x00\x00\x1cftypavif\x00\x00",
+            "e.mp4": b"\x00\x00\x00\x1cftypisom\x00\x00",
+        }
+        for file_name, content in images.items():
+            with open(os.path.join(self.temp_dir.name, file_name), "wb") as f:
+                f.write(content)
+        self.assertEqual(sniff_image_extension(os.path.join(self.temp_dir.name, "e.mp4")), None)
+        corrected = [os.path.basename(correct_image_extension(os.path.join(self.temp_dir.name, file_name)))
+                     for file_name in images]
+        self.assertEqual(corrected, ["a.jpg", "b.webp", "c.jpeg", "d.avif", "e.mp4"])
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), corrected)
+
+
+class TestSegmentedDownload(IsolatedAsyncioTestCase):
+
+    def test_make_byte_range_segments(self):
+        self.assertEqual(make_byte_range_segments("u", 1000, segment_count=4, min_segment_size=100), [
+            {"url": "u", "byte_range": (0, 249)}, {"url": "u", "byte_range": (250, 499)},
+            {"url": "u", "byte_range": (500, 749)}, {"url": "u", "byte_range": (750, 999)},
+        ])
+        # 文件太小或者大小未知时不切分
+        self.assertEqual(make_byte_range_segments("u", 150, segment_count=4, min_segment_size=100), [{"url": "u"}])
+        self.assertEqual(make_byte_range_segments("u", None), [{"url": "u"}])
+
+    async def test_byte_range_segments(self):
+        with tempfile.TemporaryDirectory() as temp_dir, patch.object(httpx, "AsyncClient", make_mock_client):
+            file_path = os.path.join(temp_dir, "video.mp4")
+            segments = make_byte_range_segments("https://cdn.test/big.mp4", len(MEDIA_CONTENT),
+                                                segment_count=3, min_segment_size=1024)
+            self.assertTrue(await download_segmented_media(segments, file_path))
+            with open(file_path, "rb") as f:
+                self.assertEqual(f.read(), MEDIA_CONTENT)
+            self.assertEqual(os.listdir(temp_dir), ["video.mp4"])
+
+    async def test_url_segments_joined_in_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir, patch.object(httpx, "AsyncClient", make_mock_client):
+            file_path = os.path.join(temp_dir, "video.mp4")
+            segments = [{"url": f"https://cdn.test/part{index}"} for index in range(3)]
+            self.assertTrue(await download_segmented_media(segments, file_path, segment_concurrency=3))
+            with open(file_path, "rb") as f:
+                self.assertEqual(f.read(), MEDIA_CONTENT)
+
+
+class TestMediaDownloadPool(IsolatedAsyncioTestCase):
+
+    async def test_per_host_concurrency(self):
+        running = {}
+        max_running = {}
+
+        async def fake_download_media(url, file_path, bandwidth_limiter=None, **kwargs):
+            host = url.split("/")[2]
+            running[host] = running.get(host, 0) + 1
+            max_running[host] = max(max_running.get(host, 0), running[host])
+            await asyncio.sleep(0.01)
+            running[host] -= 1
+            if url.endswith("bad"):
+                return False
+            with open(file_path, "wb") as f:
+                f.write(b"1234")
+            return True
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                patch("tools.media_download.download_media", fake_download_media):
+            pool = MediaDownloadPool(max_size=5, workers=6, per_host_concurrency=2, max_bytes_per_sec=0)
+            for i in range(8):
+                await pool.submit({"url": f"https://img{i % 2}.test/{i}", "file_path": os.path.join(temp_dir, str(i))})
+            await pool.submit({"url": "https://img0.test/bad", "file_path": os.path.join(temp_dir, "bad")})
+            await pool.close()
+
+        self.assertEqual(max_running, {"img0.test": 2, "img1.test": 2})
+        self.assertEqual((pool.success_count, pool.failed_count, pool.downloaded_bytes), (8, 1, 32))
+
+    async def test_close_timeout_cancels_downloads(self):
+        async def slow_download_media(url, file_path, bandwidth_limiter=None, **kwargs):
+            with open(make_temp_file_path(file_path), "wb") as f:
+                f.write(b"12")
+            await asyncio.sleep(10)
+            return True
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                patch("tools.media_download.download_media", slow_download_media), \
+                patch.object(config, "MEDIA_MANIFEST_DIR", temp_dir), patch.object(config, "PLATFORM", "xhs"):
+            pool = MediaDownloadPool(workers=1, max_bytes_per_sec=0)
+            for i in range(3):
+                await pool.submit({"url": f"https://img.test/{i}", "file_path": os.path.join(temp_dir, f"{i}.jpg")})
+            start_time = time.monotonic()
+            await pool.close(timeout=0.1)
+            await close_all_writers()
+
+            self.assertLess(time.monotonic() - start_time, 5)
+            self.assertEqual(pool.cancelled_count, 3)
+            # 正在下载的临时文件保留，没完成的任务写入媒体清单
+            self.assertTrue(os.path.exists(make_temp_file_path(os.path.join(temp_dir, "0.jpg"))))
+            with open(make_manifest_file_path("xhs"), encoding="utf-8") as f:
+                urls = [json.loads(line)["url"] for line in f]
+            self.assertEqual(sorted(urls), [f"https://img.test/{i}" for i in range(3)])
+
+    async def test_bandwidth_limiter(self):
+        limiter = BandwidthLimiter(max_bytes_per_sec=100 * 1024)
+        start_time = time.monotonic()
+        for _ in range(3):
+            await limiter.consume(50 * 1024)
+        # 桶里初始有 1 秒的令牌，多出来的 50KB 需要等待约 0.5 秒
+        self.assertGreater(time.monotonic() - start_time, 0.4)
@@ -0,0 +1,201 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import config
+from tools.async_file_writer import close_all_writers
+from tools.async_store_queue import (STORE_TYPE_COMMENT, STORE_TYPE_CONTENT,
+                                      STORE_TYPE_CREATOR, AsyncStoreQueue,
+                                      put_store_items)
+from tools.crawl_budget import CrawlBudget
+from tools.seen_index import (SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS,
+                              SEEN_KIND_CREATOR, BloomFilter, SeenIdIndex)
+from var import crawl_budget_var, seen_index_var
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negative(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"content:{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f"comment:{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestSeenIdIndex(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_index(self, freshness_sec: int = 3600) -> SeenIdIndex:
+        index = SeenIdIndex(platform="xhs", index_dir=self.temp_dir.name, freshness_sec=freshness_sec,
+                            bloom_capacity=1000)
+        index.open()
+        return index
+
+    async def test_disabled(self):
+        index = SeenIdIndex()
+        index.open()
+        await index.mark_seen(SEEN_KIND_CONTENT, ["1"])
+        self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT, "1"))
+        index.close()
+
+    async def test_persist_across_runs(self):
+        index = self.make_index()
+        await index.mark_seen(SEEN_KIND_CONTENT, ["1", 2])
+        self.assertTrue(await index.is_fresh(SEEN_KIND_CONTENT, "2"))
+        # 不同类型的ID互不影响
+        self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT_COMMENTS, "1"))
+        index.close()
+
+        index = self.make_index()
+        self.assertEqual(await index.filter_unseen(SEEN_KIND_CONTENT, ["1", "2", "3"]), ["3"])
+        self.assertEqual(index.skipped_count, 2)
+        index.close()
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, "xhs.db")))
+
+    async def test_freshness_window(self):
+        index = self.make_index()
+        await index.mark_seen(SEEN_KIND_CONTENT, ["1", "2"])
+        index._conn.execute("UPDATE seen_ids SET seen_ts = ? WHERE item_id = '1'", (int(time.time()) - 7200,))
+        # 布隆过滤器命中后还要检查精确记录的时间
+        self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT, "1"))
+        self.assertTrue(await index.is_fresh(SEEN_KIND_CONTENT, "2"))
+        index.close()
+
+        # 重新打开时清理过期记录
+        index = self.make_index()
+        count = index._conn.execute("SELECT COUNT(*) FROM seen_ids").fetchone()[0]
+        self.assertEqual(count, 1)
+        index.close()
+
+
+class FakeStore:
+
+    def __init__(self):
+        self.items = []
+
+    async def store_contents(self, items):
+        self.items.extend(items)
+
+    async def store_comments(self, items):
+        self.items.extend(items)
+
+    async def store_creators(self, items):
+        self.items.extend(items)
+
+
+class FailingStore(FakeStore):
+
+    async def store_contents(self, items):
+        raise IOError("disk full")
+
+    async def store_comments(self, items):
+        raise IOError("disk full")
+
+
+class TestMarkOnStore(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.enable_store_queue = config.ENABLE_STORE_QUEUE
+        config.ENABLE_STORE_QUEUE = False
+
+    def tearDown(self):
+        config.ENABLE_STORE_QUEUE = self.enable_store_queue
+        self.temp_dir.cleanup()
+
+    def make_index(self) -> SeenIdIndex:
+        index = SeenIdIndex(platform="dy", index_dir=self.temp_dir.name, freshness_sec=3600, bloom_capacity=1000)
+        index.open()
+        return index
+
+    async def test_put_store_items_marks_ids(self):
+        index = self.make_index()
+        token = seen_index_var.set(index)
+        try:
+            store = FakeStore()
+            await put_store_items(store, STORE_TYPE_CONTENT, [{"aweme_id": "a1", "user_id": "u1"}])
+            await put_store_items(store, STORE_TYPE_COMMENT, [{"comment_id": "c1", "aweme_id": "a1"},
+                                                              {"comment_id": "c2", "aweme_id": "a1"}])
+            await put_store_items(store, STORE_TYPE_CREATOR, [{"user_id": "u1"}])
+            self.assertEqual(len(store.items), 4)
+            self.assertTrue(await index.is_fresh(SEEN_KIND_CONTENT, "a1"))
+            self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT, "u1"))
+            # 评论写入后记录所属视频，评论ID不记录
+            self.assertTrue(await index.is_fresh(SEEN_KIND_CONTENT_COMMENTS, "a1"))
+            self.assertTrue(await index.is_fresh(SEEN_KIND_CREATOR, "u1"))
+            count = index._conn.execute("SELECT COUNT(*) FROM seen_ids").fetchone()[0]
+            self.assertEqual(count, 3)
+        finally:
+            seen_index_var.reset(token)
+            index.close()
+
+    async def test_failed_store_not_marked(self):
+        index = self.make_index()
+        token = seen_index_var.set(index)
+        try:
+            with self.assertRaises(IOError):
+                await put_store_items(FailingStore(), STORE_TYPE_CONTENT, [{"aweme_id": "a1"}])
+            self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT, "a1"))
+        finally:
+            seen_index_var.reset(token)
+            index.close()
+
+    async def test_comments_not_marked_after_budget_exhausted(self):
+        index = self.make_index()
+        token = seen_index_var.set(index)
+        budget = CrawlBudget(max_requests=1)
+        budget.start()
+        budget.record_request()
+        budget_token = crawl_budget_var.set(budget)
+        try:
+            await put_store_items(FakeStore(), STORE_TYPE_COMMENT, [{"comment_id": "c1", "aweme_id": "a1"}])
+            self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT_COMMENTS, "a1"))
+        finally:
+            crawl_budget_var.reset(budget_token)
+            seen_index_var.reset(token)
+            index.close()
+
+    async def test_store_queue_marks_after_store(self):
+        config.ENABLE_STORE_QUEUE = True
+        index = self.make_index()
+        token = seen_index_var.set(index)
+        store_queue = AsyncStoreQueue(batch_size=10, workers=1, max_retries=0,
+                                      recovery_dir=self.temp_dir.name)
+        try:
+            await store_queue.put(FailingStore(), STORE_TYPE_CONTENT, {"aweme_id": "a1"})
+            await store_queue.put(FakeStore(), STORE_TYPE_CONTENT, {"aweme_id": "a2"})
+            # 评论还在队列里或写入失败时，帖子不记录为评论已抓取
+            await store_queue.put(FailingStore(), STORE_TYPE_COMMENT, {"comment_id": "c1", "aweme_id": "a1"})
+            await store_queue.put(FakeStore(), STORE_TYPE_COMMENT, {"comment_id": "c2", "aweme_id": "a2"})
+            self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT_COMMENTS, "a2"))
+            await store_queue.close()
+            self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT, "a1"))
+            self.assertTrue(await index.is_fresh(SEEN_KIND_CONTENT, "a2"))
+            self.assertFalse(await index.is_fresh(SEEN_KIND_CONTENT_COMMENTS, "a1"))
+            self.assertTrue(await index.is_fresh(SEEN_KIND_CONTENT_COMMENTS, "a2"))
+        finally:
+            await close_all_writers()
+            seen_index_var.reset(token)
+            index.close()
@@ -0,0 +1,68 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from lxml import etree
+
+from media_platform.tieba.help import TieBaExtractor
+from test.tieba_test_data import FAKE_PARENT_COMMENT, load_page
+
+
+class TestTieBaExtractor(TestCase):
+
+    def setUp(self):
+        self.extractor = TieBaExtractor()
+
+    def test_extract_search_note_list(self):
+        notes = self.extractor.extract_search_note_list(load_page("search_keyword_notes.html"))
+        self.assertEqual(len(notes), 10)
+        self.assertEqual((notes[0].note_id, notes[0].publish_time), ("9117888152", "2024-08-05 16:45"))
+
+    def test_extract_tieba_note_list(self):
+        notes = self.extractor.extract_tieba_note_list(load_page("tieba_note_list.html"))
+        self.assertEqual(len(notes), 48)
+        self.assertEqual((notes[0].note_id, notes[0].user_nickname, notes[0].total_replay_num),
+                         ("9079949995", "公子伯仲", 18))
+
+    def test_extract_note_detail(self):
+        note = self.extractor.extract_note_detail(load_page("note_detail.html"))
+        self.assertEqual((note.note_id, note.title, note.tieba_name), ("9117905169", "对于一个父亲来说，这个女儿14岁就死了", "以太比特吧"))
+        self.assertEqual((note.ip_location, note.publish_time), ("广东", "2024-08-05 16:56"))
+        self.assertEqual((note.total_replay_num, note.total_replay_page, note.user_nickname), (786, 13, "章景轩"))
+
+    def test_extract_parent_comments(self):
+        comments = self.extractor.extract_tieba_note_parment_comments(load_page("note_comments.html"), "123456")
+        self.assertEqual(len(comments), 30)
+        self.assertEqual((comments[0].comment_id, comments[0].content, comments[0].tieba_id),
+                         ("150726491368", "中国队第22金！无悬念！", "4513750"))
+        self.assertEqual((comments[0].ip_location, comments[0].publish_time), ("福建", "2024-08-06 22:09"))
+
+    def test_extract_sub_comments(self):
+        comments = self.extractor.extract_tieba_note_sub_comments(load_page("note_sub_comments.html"),
+                                                                  FAKE_PARENT_COMMENT)
+        self.assertEqual(len(comments), 10)
+        self.assertEqual((comments[0].comment_id, comments[0].user_nickname, comments[0].parent_comment_id),
+                         ("150726504693", "heinzfrentzen", "123456"))
+
+    def test_parse_once_for_same_page(self):
+        page = load_page("note_detail.html")
+        self.assertIs(self.extractor.parse(page), self.extractor.parse(page))
+
+    def test_extract_data_field_values(self):
+        nodes = [etree.fromstring(f"<li data-field='{value}'/>") for value in
+                 ('{"id": 1, "name": "&amp;lt;b&amp;gt;"}', "", "{}", "{broken", '{"id": 2}')]
+        # 有一个解码失败时逐个解码，其他节点不受影响
+        self.assertEqual(TieBaExtractor.extract_data_field_values(nodes),
+                         [{"id": 1, "name": "<b>"}, {}, {}, {}, {"id": 2}])
+        self.assertEqual(TieBaExtractor.extract_data_field_values(nodes[:1] + nodes[4:]),
+                         [{"id": 1, "name": "<b>"}, {"id": 2}])
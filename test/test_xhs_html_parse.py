@@ -0,0 +1,83 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+from unittest import TestCase
+
+from media_platform.xhs.help import (camel_to_underscore, extract_initial_state,
+                                     js_to_json, transform_json_keys)
+from test.benchmark_xhs_note_html import (BENCHMARK_NOTE_ID, extract_state_text,
+                                          get_note_dict,
+                                          legacy_transform_json_keys,
+                                          make_note_html)
+
+
+class TestTransformJsonKeys(TestCase):
+
+    def test_camel_to_underscore(self):
+        self.assertEqual(camel_to_underscore("noteDetailMap"), "note_detail_map")
+        self.assertEqual(camel_to_underscore("URLDefault"), "u_r_l_default")
+        self.assertEqual(camel_to_underscore("note_id"), "note_id")
+
+    def test_nested_objects(self):
+        data = {"imageList": [{"infoList": [{"imageScene": "WB_DFT"}]}, None, "x"], "emptyMap": {},
+                "nestedList": [[{"innerKey": 1}]]}
+        self.assertEqual(transform_json_keys(data), {
+            "image_list": [{"info_list": [{"image_scene": "WB_DFT"}]}, None, "x"], "empty_map": {},
+            "nested_list": [[{"inner_key": 1}]],
+        })
+
+    def test_same_result_as_legacy(self):
+        state = extract_state_text(make_note_html())
+        note_dict = transform_json_keys(json.loads(state))
+        self.assertEqual(note_dict, legacy_transform_json_keys(state))
+        note = note_dict["note"]["note_detail_map"][BENCHMARK_NOTE_ID]["note"]
+        self.assertEqual(note["image_list"][0]["info_list"][1]["image_scene"], "WB_DFT")
+
+
+class TestExtractInitialState(TestCase):
+
+    def test_js_to_json(self):
+        text = '{"a": undefined, "b": "is undefined", "c": "say \\"undefined\\"", "d": [undefined, "\\\\"], "e": undefined}'
+        self.assertEqual(json.loads(js_to_json(text)), {
+            "a": None, "b": "is undefined", "c": 'say "undefined"', "d": [None, "\\"], "e": None,
+        })
+        self.assertEqual(json.loads(js_to_json('{"a": undefined}', undefined_value='""')), {"a": ""})
+
+    def test_extract_note(self):
+        html = make_note_html()
+        note = extract_initial_state(html, ["note", "noteDetailMap", BENCHMARK_NOTE_ID, "note"])
+        self.assertEqual(note["imageList"][0]["stream"], None)
+        self.assertEqual(get_note_dict(html, BENCHMARK_NOTE_ID)["image_list"][0]["stream"], "")
+        self.assertIsNone(extract_initial_state(html, ["note", "noteDetailMap", "missing", "note"]))
+        self.assertIsNone(extract_initial_state("<html></html>", ["note"]))
+
+    def test_extract_note_decodes_subtree_only(self):
+        # 页面状态其他部分不是合法 JSON 时也能取出笔记详情，说明只解码了笔记详情子对象
+        html = make_note_html().replace('window.__INITIAL_STATE__={', 'window.__INITIAL_STATE__={"fn":function(){},', 1)
+        self.assertEqual(get_note_dict(html, BENCHMARK_NOTE_ID)["image_list"][0]["stream"], "")
+
+    def test_extract_falls_back_to_full_state(self):
+        # noteDetailMap 之外也出现了同名的键，回退到解码整个页面状态
+        html = ('<script>window.__INITIAL_STATE__={"search":{"noteDetailMap":{"n1":{"note":1}}},'
+                '"note":{"noteDetailMap":{"n1":{"note":{"title":undefined}}}}};</script>')
+        self.assertEqual(extract_initial_state(html, ["note", "noteDetailMap", "n1", "note"]), {"title": None})
+
+    def test_undefined_text_in_note_kept(self):
+        html = make_note_html().replace("周末去哪儿", "返回了 undefined 怎么办")
+        self.assertEqual(get_note_dict(html, BENCHMARK_NOTE_ID)["title"], "返回了 undefined 怎么办")
+
+    def test_extract_creator(self):
+        html = ('<script>window.__INITIAL_STATE__={"global":{"x":undefined},'
+                '"user":{"userPageData":{"basicInfo":{"nickname":"小红薯"},"tags":undefined}}};</script>')
+        self.assertEqual(extract_initial_state(html, ["user", "userPageData"]),
+                         {"basicInfo": {"nickname": "小红薯"}, "tags": None})
@@ -0,0 +1,44 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+from unittest.mock import patch
+
+import config
+from store.xhs import get_image_url_format, get_preferred_image_url
+
+IMAGE_ID = "http://sns-webpic-qc.xhscdn.com/202412281040/abc/1040g2sg31bmb2ujq3o005n"
+
+IMAGE = {
+    "url_default": f"{IMAGE_ID}!nd_dft_wlteh_jpg_3",
+    "info_list": [
+        {"image_scene": "WB_PRV", "url": f"{IMAGE_ID}!nd_prv_wlteh_avif_3"},
+        {"image_scene": "WB_DFT", "url": f"{IMAGE_ID}!nd_dft_wlteh_webp_3"},
+        {"image_scene": "WB_DFT", "url": f"{IMAGE_ID}!nd_dft_wlteh_jpg_3"},
+    ],
+}
+
+
+class TestXhsImageFormat(TestCase):
+
+    def test_get_image_url_format(self):
+        self.assertEqual(get_image_url_format(f"{IMAGE_ID}!nd_dft_wlteh_webp_3"), "webp")
+        self.assertEqual(get_image_url_format(f"{IMAGE_ID}!nd_dft_wgth_jpeg_3?a=1"), "jpg")
+        self.assertIsNone(get_image_url_format(IMAGE_ID))
+
+    def test_preferred_image_url(self):
+        # 预览图（WB_PRV）不参与选择
+        self.assertEqual(get_preferred_image_url(IMAGE), (f"{IMAGE_ID}!nd_dft_wlteh_webp_3", "webp"))
+        with patch.object(config, "XHS_IMAGE_FORMAT_PREFERENCE", ["jpg", "webp"]):
+            self.assertEqual(get_preferred_image_url(IMAGE), (f"{IMAGE_ID}!nd_dft_wlteh_jpg_3", "jpg"))
+        self.assertEqual(get_preferred_image_url({"url_default": IMAGE_ID}), (IMAGE_ID, "jpg"))
+        self.assertEqual(get_preferred_image_url({"url_default": ""}), ("", ""))
@@ -0,0 +1,30 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 贴吧页面解析测试和性能测试共用的测试数据，页面保存在 media_platform/tieba/test_data 下
+import os
+
+from model.m_baidu_tieba import TiebaComment
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "media_platform", "tieba", "test_data")
+
+FAKE_PARENT_COMMENT = TiebaComment(comment_id="123456", content="content", user_link="user_link",
+                                   user_nickname="user_nickname", user_avatar="user_avatar",
+                                   publish_time="publish_time", parent_comment_id="parent_comment_id",
+                                   note_id="note_id", note_url="note_url", tieba_id="tieba_id",
+                                   tieba_name="tieba_name", tieba_link="tieba_link")
+
+
+def load_page(file_name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, file_name), encoding="utf-8") as f:
+        return f.read()
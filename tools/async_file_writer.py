@@ -0,0 +1,538 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/22 15:40
+# @Desc    : 追加写入的异步文件写入器（JSON Lines / CSV），支持流式压缩和按大小/条数滚动分段
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import pathlib
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import aiofiles
+
+import config
+from tools import utils
+
+
+def recover_partial_line(file_path: str) -> int:
+    """
+    进程崩溃时最后一行可能只写了一半，这里把文件截断到最后一个完整行，返回被截掉的字节数
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        int: 被截掉的字节数
+
+    """
+    if not os.path.exists(file_path):
+        return 0
+    with open(file_path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        if file_size == 0:
+            return 0
+        f.seek(file_size - 1)
+        if f.read(1) == b"\n":
+            return 0
+
+        # 从后往前按块查找最后一个换行符
+        chunk_size = 64 * 1024
+        position = file_size
+        last_newline = -1
+        while position > 0 and last_newline < 0:
+            read_size = min(chunk_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size)
+            index = chunk.rfind(b"\n")
+            if index >= 0:
+                last_newline = position + index
+        truncate_at = last_newline + 1
+        f.truncate(truncate_at)
+        return file_size - truncate_at
+
+
+COMPRESSION_SUFFIXES = {
+    "": "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+
+def make_compressor(compression: str):
+    """
+    返回一个把一段字节压缩成独立 gzip member / zstd frame 的函数。
+    多个 member/frame 直接拼接仍然是合法的压缩文件，所以每次写入文件都可以独立压缩后追加，
+    进程崩溃时最多丢失最后一段没写完的数据。
+    Args:
+        compression: 压缩算法，""、gzip、zstd
+
+    Returns:
+        Callable[[bytes], bytes]
+
+    """
+    if not compression:
+        return lambda data: data
+    if compression == "gzip":
+        return lambda data: gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        import zstandard
+        # 每个 frame 带上校验和，崩溃恢复时能识别出被文件系统补零的半个 frame
+        compressor = zstandard.ZstdCompressor(level=3, write_checksum=True)
+        return compressor.compress
+    raise ValueError(f"[make_compressor] unsupported compression: {compression}, only support gzip or zstd")
+
+
+def make_decompressor(compression: str):
+    """
+    返回一个只解压一个 gzip member / zstd frame 的解压对象，解压完这一段后 eof 为 True，剩余数据在 unused_data 中
+    Args:
+        compression: 压缩算法，gzip、zstd
+
+    Returns:
+
+    """
+    if compression == "gzip":
+        return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"[make_decompressor] unsupported compression: {compression}, only support gzip or zstd")
+
+
+def recover_partial_frame(file_path: str, compression: str) -> int:
+    """
+    进程崩溃时压缩文件最后一个 gzip member / zstd frame 可能只写了一半，这时整个文件都无法完整解压。
+    这里逐段解压（解压结果直接丢弃）找到最后一个完整的 member/frame，把文件截断到它的结尾，返回被截掉的字节数
+    Args:
+        file_path: 文件路径
+        compression: 压缩算法，gzip、zstd
+
+    Returns:
+        int: 被截掉的字节数
+
+    """
+    if not os.path.exists(file_path):
+        return 0
+    chunk_size = 64 * 1024
+    with open(file_path, "rb+") as f:
+        # position: 已经解压过的字节数，complete_end: 最后一个完整 member/frame 的结尾
+        position = 0
+        complete_end = 0
+        decompressor = None
+        corrupted = False
+        while not corrupted:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            while data:
+                if decompressor is None:
+                    decompressor = make_decompressor(compression)
+                try:
+                    decompressor.decompress(data)
+                except Exception:
+                    # 数据损坏（eg: 写了一半的 member 后面是文件系统补的 0），从上一个完整的 member/frame 之后截断
+                    corrupted = True
+                    break
+                if not decompressor.eof:
+                    # 当前 member/frame 还没有结束，继续读下一块
+                    position += len(data)
+                    break
+                unused_data = decompressor.unused_data
+                position += len(data) - len(unused_data)
+                complete_end = position
+                data = unused_data
+                decompressor = None
+        file_size = f.seek(0, os.SEEK_END)
+        if complete_end < file_size:
+            f.truncate(complete_end)
+        return file_size - complete_end
+
+
+class AsyncBufferedFileWriter:
+    """
+    追加写入的文件写入器基类，一个文件对应一个实例，文件句柄在整个运行期间保持打开。
+    写入先进入内存缓冲区，按条数或时间间隔批量刷到文件，并定期 fsync。
+    第一次写入时启动一个后台协程，每隔 flush_interval_sec 检查一次，没有新写入时缓冲区里的数据也会按时刷到文件。
+    子类只需要实现 serialize 把一条数据转换成要追加的文本。
+
+    开启压缩时文件名追加 .gz/.zst 后缀；开启滚动时 file_path 只作为基础文件名，
+    实际数据写入 {name}.00001{ext} 这样的分段文件，当前分段超过大小或条数上限后切换到下一个分段，
+    同时在 {name}.manifest.json 中记录所有分段。
+    """
+    _writers: Dict[str, "AsyncBufferedFileWriter"] = {}
+    encoding: str = "utf-8"
+
+    def __init__(self, file_path: str, flush_items: int = 0, flush_interval_sec: float = 0,
+                 fsync_interval_sec: float = 0, compression: Optional[str] = None,
+                 rotate_max_bytes: Optional[int] = None, rotate_max_items: Optional[int] = None):
+        """
+        Args:
+            file_path: 文件路径
+            flush_items: 缓冲区达到多少条后写入文件
+            flush_interval_sec: 距离上次写入文件超过多少秒后写入文件
+            fsync_interval_sec: 距离上次 fsync 超过多少秒后 fsync
+            compression: 压缩算法，""、gzip、zstd，为 None 时使用配置 STORE_COMPRESSION
+            rotate_max_bytes: 单个分段写入磁盘的最大字节数，0 表示不按大小滚动，为 None 时使用配置
+            rotate_max_items: 单个分段的最大条数，0 表示不按条数滚动，为 None 时使用配置
+        """
+        self.file_path = file_path
+        self.flush_items = flush_items or config.STORE_FLUSH_ITEMS
+        self.flush_interval_sec = flush_interval_sec or config.STORE_FLUSH_INTERVAL_SEC
+        self.fsync_interval_sec = fsync_interval_sec or config.STORE_FSYNC_INTERVAL_SEC
+        self.compression = config.STORE_COMPRESSION if compression is None else compression
+        if self.compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"[AsyncBufferedFileWriter] unsupported compression: {self.compression}")
+        self.rotate_max_bytes = config.STORE_ROTATE_MAX_BYTES if rotate_max_bytes is None else rotate_max_bytes
+        self.rotate_max_items = config.STORE_ROTATE_MAX_ITEMS if rotate_max_items is None else rotate_max_items
+        self.lock = asyncio.Lock()
+        self._buffer: List[str] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._file = None
+        self._file_is_empty = True
+        self._last_flush_time = time.monotonic()
+        self._last_fsync_time = time.monotonic()
+        self._compress = None
+        self._segments: List[Dict] = []
+        self._segment_index = 0
+        self._segment_bytes = 0
+        self._segment_items = 0
+
+    @property
+    def rotate_enabled(self) -> bool:
+        return bool(self.rotate_max_bytes or self.rotate_max_items)
+
+    @property
+    def manifest_path(self) -> str:
+        root, _ = os.path.splitext(self.file_path)
+        return f"{root}.manifest.json"
+
+    def segment_path(self, index: int) -> str:
+        """
+        获取分段文件路径，未开启滚动时就是 file_path（加上压缩后缀）
+        Args:
+            index: 分段序号，从 1 开始
+
+        Returns:
+
+        """
+        path = self.file_path
+        if self.rotate_enabled:
+            root, ext = os.path.splitext(self.file_path)
+            path = f"{root}.{index:05d}{ext}"
+        return path + COMPRESSION_SUFFIXES[self.compression]
+
+    @property
+    def current_path(self) -> str:
+        return self.segment_path(self._segment_index or 1)
+
+    @classmethod
+    def get_writer(cls, file_path: str, **kwargs):
+        """
+        获取文件对应的写入器，同一个文件在整个运行期间只会有一个写入器
+        Args:
+            file_path: 文件路径
+            **kwargs: 第一次创建写入器时传给构造函数的参数，eg: compression
+
+        Returns:
+
+        """
+        writer = AsyncBufferedFileWriter._writers.get(file_path)
+        if writer is None:
+            writer = cls(file_path, **kwargs)
+            AsyncBufferedFileWriter._writers[file_path] = writer
+        return writer
+
+    @classmethod
+    async def close_all(cls):
+        """
+        刷新并关闭所有写入器，程序退出前调用
+        """
+        writers = list(AsyncBufferedFileWriter._writers.values())
+        AsyncBufferedFileWriter._writers.clear()
+        for writer in writers:
+            await writer.close()
+
+    def serialize(self, item: Any) -> str:
+        raise NotImplementedError
+
+    async def write(self, item: Any):
+        """
+        写入一条数据
+        Args:
+            item: 一条数据
+
+        Returns:
+
+        """
+        await self.write_many([item])
+
+    async def write_many(self, items: List[Any]):
+        """
+        写入多条数据
+        Args:
+            items: 数据列表
+
+        Returns:
+
+        """
+        if not items:
+            return
+        self._ensure_flush_task()
+        async with self.lock:
+            self._buffer.extend(self.serialize(item) for item in items)
+            if len(self._buffer) >= self.flush_items or \
+                    time.monotonic() - self._last_flush_time >= self.flush_interval_sec:
+                await self._flush()
+
+    async def flush(self):
+        """
+        把缓冲区的数据写入文件并 fsync
+        """
+        async with self.lock:
+            await self._flush(force_fsync=True)
+
+    async def close(self):
+        """
+        停止定时刷新，刷新缓冲区并关闭文件
+        """
+        async with self.lock:
+            # 持有锁时定时刷新协程只可能在等待，取消不会打断正在进行的写入
+            flush_task, self._flush_task = self._flush_task, None
+            if flush_task is not None:
+                flush_task.cancel()
+            await self._flush(force_fsync=True)
+            if self._file is not None:
+                await self._file.close()
+                self._file = None
+                await self._update_segment()
+        if flush_task is not None:
+            await asyncio.gather(flush_task, return_exceptions=True)
+
+    def _ensure_flush_task(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        """
+        定时刷新缓冲区，爬虫长时间没有新数据（eg: 等待翻页、被限流）时已经缓冲的数据也能及时落盘
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval_sec)
+            async with self.lock:
+                if self._buffer and time.monotonic() - self._last_flush_time >= self.flush_interval_sec:
+                    try:
+                        await self._flush()
+                    except Exception as e:
+                        utils.logger.error(f"[AsyncBufferedFileWriter._flush_periodically] flush {self.file_path} error: {e}")
+
+    def _prepare_file(self):
+        """
+        打开文件之前对已有文件的处理，子类可以覆盖，在线程池中执行
+        """
+        pass
+
+    def _load_manifest(self):
+        """
+        读取上一次运行留下的清单，继续往最后一个分段追加
+        """
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self._segments = json.load(f).get("segments", [])
+        except (OSError, ValueError) as e:
+            utils.logger.warning(f"[AsyncBufferedFileWriter._load_manifest] ignore broken manifest {self.manifest_path}: {e}")
+            self._segments = []
+
+    def _write_manifest(self, manifest: Dict):
+        """
+        原子地写入分段清单：先写临时文件再 rename，在线程池中执行
+        """
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    async def _save_manifest(self):
+        """
+        保存分段清单，写文件和 rename 放到线程池中执行，不阻塞事件循环
+        """
+        manifest = {
+            "base_file": os.path.basename(self.file_path),
+            "compression": self.compression,
+            "rotate_max_bytes": self.rotate_max_bytes,
+            "rotate_max_items": self.rotate_max_items,
+            "segments": [dict(segment) for segment in self._segments],
+        }
+        await asyncio.get_running_loop().run_in_executor(None, self._write_manifest, manifest)
+
+    async def _update_segment(self, closed: bool = False):
+        if not self.rotate_enabled:
+            return
+        segment = {
+            "file": os.path.basename(self.current_path),
+            "items": self._segment_items,
+            "bytes": self._segment_bytes,
+            "closed": closed,
+        }
+        if self._segments and self._segments[-1]["file"] == segment["file"]:
+            self._segments[-1] = segment
+        else:
+            self._segments.append(segment)
+        await self._save_manifest()
+
+    def _prepare_segment(self):
+        """
+        打开文件之前的准备：创建目录、读取清单确定当前分段、修复上次运行崩溃留下的半行或半个 member/frame。
+        都是阻塞的文件操作，在线程池中执行
+        """
+        pathlib.Path(self.file_path).parent.mkdir(parents=True, exist_ok=True)
+        if self.rotate_enabled and self._segment_index == 0:
+            self._load_manifest()
+            if self._segments:
+                last = self._segments[-1]
+                self._segment_index = len(self._segments)
+                self._segment_items = last.get("items", 0)
+                self._segment_bytes = os.path.getsize(self.current_path) if os.path.exists(self.current_path) else 0
+                if last.get("closed") or self._should_rotate():
+                    self._segment_index += 1
+                    self._segment_items = 0
+        self._segment_index = self._segment_index or 1
+        # 压缩文件不能按行截断，截断到最后一个完整的 member/frame；未压缩文件由子类修复最后半行
+        if self.compression:
+            truncated_size = recover_partial_frame(self.current_path, self.compression)
+            if truncated_size:
+                utils.logger.warning(
+                    f"[AsyncBufferedFileWriter._prepare_segment] drop {truncated_size} bytes of partial "
+                    f"{self.compression} data at the end of {self.current_path}")
+        else:
+            self._prepare_file()
+        path = self.current_path
+        self._segment_bytes = os.path.getsize(path) if os.path.exists(path) else 0
+        self._file_is_empty = self._segment_bytes == 0
+
+    async def _open(self):
+        if self._compress is None:
+            self._compress = make_compressor(self.compression)
+        await asyncio.get_running_loop().run_in_executor(None, self._prepare_segment)
+        self._file = await aiofiles.open(self.current_path, mode="ab")
+        await self._update_segment()
+
+    def _should_rotate(self) -> bool:
+        if self.rotate_max_bytes and self._segment_bytes >= self.rotate_max_bytes:
+            return True
+        if self.rotate_max_items and self._segment_items >= self.rotate_max_items:
+            return True
+        return False
+
+    async def _rotate(self):
+        """
+        关闭当前分段，下一次写入时打开新的分段
+        """
+        await self._fsync()
+        await self._file.close()
+        self._file = None
+        await self._update_segment(closed=True)
+        utils.logger.info(
+            f"[AsyncBufferedFileWriter._rotate] segment {self.current_path} closed, "
+            f"items: {self._segment_items}, bytes: {self._segment_bytes}")
+        self._segment_index += 1
+        self._segment_bytes = 0
+        self._segment_items = 0
+
+    def _file_header(self) -> str:
+        """
+        新文件的文件头，子类可以覆盖
+        """
+        return ""
+
+    async def _fsync(self):
+        await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._file.fileno())
+        self._last_fsync_time = time.monotonic()
+
+    async def _flush(self, force_fsync: bool = False):
+        if self._buffer:
+            if self._file is None:
+                await self._open()
+            data = "".join(self._buffer)
+            items = len(self._buffer)
+            self._buffer.clear()
+            if self._file_is_empty:
+                data = self._file_header() + data
+                self._file_is_empty = False
+            payload = self._compress(data.encode(self.encoding))
+            await self._file.write(payload)
+            await self._file.flush()
+            self._segment_bytes += len(payload)
+            self._segment_items += items
+            if self.rotate_enabled and self._should_rotate():
+                await self._rotate()
+        self._last_flush_time = time.monotonic()
+
+        if self._file is None:
+            return
+        if force_fsync or time.monotonic() - self._last_fsync_time >= self.fsync_interval_sec:
+            await self._fsync()
+
+
+class AsyncJsonlWriter(AsyncBufferedFileWriter):
+    """
+    JSON Lines 追加写入器，每条数据一行紧凑的 json
+    """
+
+    def serialize(self, item: Any) -> str:
+        return json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def _prepare_file(self):
+        truncated_size = recover_partial_line(self.current_path)
+        if truncated_size:
+            utils.logger.warning(
+                f"[AsyncJsonlWriter._prepare_file] drop {truncated_size} bytes of partial line at the end of {self.current_path}")
+
+
+class AsyncCsvWriter(AsyncBufferedFileWriter):
+    """
+    CSV 追加写入器，新文件（包括每个滚动分段）会用第一条数据的 key 写一次带 BOM 的表头，方便 Excel 直接打开
+    """
+
+    def __init__(self, file_path: str, **kwargs):
+        super().__init__(file_path, **kwargs)
+        self._header: Optional[List[str]] = None
+
+    @staticmethod
+    def _format_row(row: List[Any]) -> str:
+        output = io.StringIO()
+        csv.writer(output).writerow(row)
+        return output.getvalue()
+
+    def serialize(self, item: Dict) -> str:
+        if self._header is None:
+            self._header = list(item.keys())
+        return self._format_row(list(item.values()))
+
+    def _file_header(self) -> str:
+        return "\ufeff" + self._format_row(self._header or [])
+
+
+async def close_all_writers():
+    """
+    刷新并关闭所有文件写入器
+    """
+    await AsyncBufferedFileWriter.close_all()
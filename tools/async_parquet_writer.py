@@ -0,0 +1,205 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/24 16:30
+# @Desc    : Parquet 列式写入器，按列缓冲数据，每 N 条写一个 row group
+
+import asyncio
+import os
+import pathlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from tools import utils
+from tools.async_file_writer import AsyncBufferedFileWriter
+
+# 同一次运行写入的 parquet 文件使用相同的后缀，parquet 文件不能追加，每次运行都会在分区目录下生成新文件
+RUN_ID = time.strftime("%Y%m%d%H%M%S")
+
+
+def make_partition_file_name(store_path: str, platform: str, store_type: str, crawler_type: str) -> str:
+    """
+    按平台、数据类型、日期分区的文件名，eg: data/parquet/platform=xhs/type=comments/date=2024-12-24/search_20241224163000.parquet
+    Args:
+        store_path: 根目录
+        platform: 平台
+        store_type: 数据类型 contents | comments | creator
+        crawler_type: 爬虫类型 search | detail | creator
+
+    Returns:
+
+    """
+    return (f"{store_path}/platform={platform}/type={store_type}/date={utils.get_current_date()}/"
+            f"{crawler_type}_{RUN_ID}.parquet")
+
+
+def _infer_arrow_type(values: List[Any]) -> pa.DataType:
+    """
+    根据第一个 row group 的数据确定列类型，只有全是整数/浮点数/布尔值的列使用数值类型，其他都按字符串保存
+    """
+    non_null_values = [value for value in values if value is not None]
+    if not non_null_values:
+        return pa.string()
+    if all(isinstance(value, bool) for value in non_null_values):
+        return pa.bool_()
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in non_null_values):
+        return pa.int64()
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in non_null_values):
+        return pa.float64()
+    return pa.string()
+
+
+def _coerce(value: Any, arrow_type: pa.DataType) -> Any:
+    """
+    把一个值转换成列类型，不能无损转换时抛出 ValueError，由调用方把整列放宽成字符串
+    """
+    if value is None:
+        return None
+    if pa.types.is_string(arrow_type):
+        return value if isinstance(value, str) else str(value)
+    if pa.types.is_boolean(arrow_type):
+        if not isinstance(value, bool):
+            raise ValueError(f"{value!r} is not a bool")
+        return value
+    if pa.types.is_integer(arrow_type):
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(f"{value!r} is not an integer")
+            return int(value)
+        return int(value)
+    return float(value)
+
+
+def _coerce_column(values: List[Any], field: pa.Field) -> Tuple[pa.Field, List[Any]]:
+    """
+    把一列数据转换成字段类型，有值不能转换时把这一列放宽成字符串，保证数据不会变成空值
+    Args:
+        values: 一列数据
+        field: 列字段
+
+    Returns:
+        Tuple[pa.Field, List[Any]]: 实际使用的字段和转换后的数据
+
+    """
+    try:
+        return field, [_coerce(value, field.type) for value in values]
+    except (TypeError, ValueError, OverflowError) as e:
+        utils.logger.warning(f"[AsyncParquetWriter] widen column {field.name} from {field.type} to string: {e}")
+        field = pa.field(field.name, pa.string())
+        return field, [_coerce(value, field.type) for value in values]
+
+
+class AsyncParquetWriter(AsyncBufferedFileWriter):
+    """
+    Parquet 写入器，一个文件对应一个实例，和其他文件写入器共用注册表，程序退出时由 close_all_writers 关闭。
+    数据按列缓冲，达到 row_group_size 条后在线程池里编码压缩写成一个 row group。
+    列和列类型在写第一个 row group 时确定，之后新增的字段会被忽略。
+    之后的数据不能转换成已确定的列类型时，这一列放宽成字符串，由于 parquet 文件的 schema 不能修改，
+    当前文件写完文件尾后切换到 {name}.00002.parquet 这样的新文件继续写。
+    """
+
+    def __init__(self, file_path: str, row_group_size: int = 0, compression: str = ""):
+        """
+        Args:
+            file_path: 文件路径
+            row_group_size: 每个 row group 的行数
+            compression: 压缩算法 zstd | snappy | gzip | none
+        """
+        super().__init__(file_path)
+        self.row_group_size = row_group_size or config.PARQUET_ROW_GROUP_SIZE
+        self.compression = compression or config.PARQUET_COMPRESSION
+        self._columns: Dict[str, List[Any]] = {}
+        self._row_count = 0
+        self._schema: Optional[pa.Schema] = None
+        self._parquet_writer: Optional[pq.ParquetWriter] = None
+        self._part_index = 1
+
+    @property
+    def current_path(self) -> str:
+        if self._part_index == 1:
+            return self.file_path
+        root, ext = os.path.splitext(self.file_path)
+        return f"{root}.{self._part_index:05d}{ext}"
+
+    async def write_many(self, items: List[Dict]):
+        """
+        写入多条数据
+        Args:
+            items: 数据列表
+
+        Returns:
+
+        """
+        if not items:
+            return
+        async with self.lock:
+            for item in items:
+                if self._schema is None:
+                    for key in item.keys():
+                        self._columns.setdefault(key, [None] * self._row_count)
+                for key, values in self._columns.items():
+                    values.append(item.get(key))
+                self._row_count += 1
+                if self._row_count >= self.row_group_size:
+                    await self._flush()
+
+    async def flush(self):
+        async with self.lock:
+            await self._flush()
+
+    async def close(self):
+        """
+        写入剩余数据并写入 parquet 文件尾，文件尾写入之前文件不可读
+        """
+        async with self.lock:
+            await self._flush()
+            await self._close_parquet_writer()
+
+    async def _close_parquet_writer(self):
+        if self._parquet_writer is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._parquet_writer.close)
+            self._parquet_writer = None
+
+    async def _flush(self, force_fsync: bool = False):
+        if not self._row_count:
+            return
+        if self._schema is None:
+            self._schema = pa.schema([
+                pa.field(name, _infer_arrow_type(values)) for name, values in self._columns.items()
+            ])
+        fields, arrays = [], []
+        for field in self._schema:
+            field, values = _coerce_column(self._columns[field.name], field)
+            fields.append(field)
+            arrays.append(pa.array(values, type=field.type))
+        schema = pa.schema(fields)
+        if not schema.equals(self._schema):
+            # 已经写过 row group 的文件不能修改 schema，写完文件尾后切换到新文件
+            if self._parquet_writer is not None:
+                await self._close_parquet_writer()
+                self._part_index += 1
+                utils.logger.info(f"[AsyncParquetWriter._flush] schema widened, continue writing {self.current_path}")
+            self._schema = schema
+        table = pa.Table.from_arrays(arrays, schema=self._schema)
+        self._columns = {field.name: [] for field in self._schema}
+        self._row_count = 0
+        await asyncio.get_running_loop().run_in_executor(None, self._write_table, table)
+
+    def _write_table(self, table: pa.Table):
+        if self._parquet_writer is None:
+            pathlib.Path(self.current_path).parent.mkdir(parents=True, exist_ok=True)
+            self._parquet_writer = pq.ParquetWriter(self.current_path, self._schema, compression=self.compression)
+        self._parquet_writer.write_table(table, row_group_size=self.row_group_size)
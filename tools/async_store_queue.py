@@ -0,0 +1,311 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/23 10:20
+# @Desc    : 存储写入队列（write-behind），爬虫协程只负责入队，后台协程批量写入存储
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from tools import utils
+from tools.async_file_writer import AsyncJsonlWriter
+from tools.seen_index import (SEEN_KIND_CONTENT, SEEN_KIND_CONTENT_COMMENTS,
+                              SEEN_KIND_CREATOR)
+from var import crawl_budget_var, seen_index_var
+
+STORE_TYPE_CONTENT = "content"
+STORE_TYPE_COMMENT = "comment"
+STORE_TYPE_CREATOR = "creator"
+
+# 帖子数据里的帖子ID字段（按顺序取第一个有值的字段），评论数据里同名字段是所属帖子的ID
+CONTENT_ID_FIELDS = ("note_id", "aweme_id", "video_id", "content_id")
+
+# 入库数据对应的已爬取ID索引类型，以及数据里的ID字段；
+# 评论写入成功后记录所属帖子（SEEN_KIND_CONTENT_COMMENTS），评论阶段按帖子粒度跳过，评论自身的ID不记录
+SEEN_ID_FIELDS = {
+    STORE_TYPE_CONTENT: (SEEN_KIND_CONTENT, CONTENT_ID_FIELDS),
+    STORE_TYPE_COMMENT: (SEEN_KIND_CONTENT_COMMENTS, CONTENT_ID_FIELDS),
+    STORE_TYPE_CREATOR: (SEEN_KIND_CREATOR, ("user_id",)),
+}
+
+
+class AsyncStoreQueue:
+    """
+    store/* 入口函数和 AbstractStore 实现之间的有界队列。
+    入队后立即返回，只有队列满的时候爬虫协程才会等待（背压），后台协程按批次取出数据写入存储。
+    写入失败的数据按退避时间重试，重试用完或者退出时没来得及写入的数据追加到恢复文件，不会丢弃。
+    """
+    _instance: Optional["AsyncStoreQueue"] = None
+
+    def __init__(self, max_size: int = 0, batch_size: int = 0, workers: int = 0,
+                 max_retries: Optional[int] = None, retry_backoff_sec: Optional[float] = None,
+                 recovery_dir: str = ""):
+        """
+        Args:
+            max_size: 队列最大长度
+            batch_size: 后台协程一次最多取出多少条数据写入
+            workers: 后台写入协程数量
+            max_retries: 写入失败后的最大重试次数
+            retry_backoff_sec: 第一次重试前等待的秒数，之后每次翻倍
+            recovery_dir: 恢复文件目录
+        """
+        self.max_size = max_size or config.STORE_QUEUE_MAX_SIZE
+        self.batch_size = batch_size or config.STORE_QUEUE_BATCH_SIZE
+        self.workers = workers or config.STORE_QUEUE_WORKERS
+        self.max_retries = config.STORE_QUEUE_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff_sec = config.STORE_QUEUE_RETRY_BACKOFF_SEC if retry_backoff_sec is None else retry_backoff_sec
+        self.recovery_dir = recovery_dir or config.STORE_QUEUE_RECOVERY_DIR
+        self.spilled_count = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def get_instance(cls) -> "AsyncStoreQueue":
+        """
+        获取全局的存储队列
+        Returns:
+
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _ensure_started(self):
+        """
+        第一次入队时才启动后台协程，这样后台协程会继承爬虫协程的上下文变量（crawler_type_var、media_crawler_db_var 等）
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def put(self, store, store_type: str, item: Dict):
+        """
+        数据入队，队列满时等待后台协程消费
+        Args:
+            store: AbstractStore 实现
+            store_type: 数据类型 content | comment | creator
+            item: 要保存的数据
+
+        Returns:
+
+        """
+        self._ensure_started()
+        await self._queue.put((store, store_type, item))
+
+    async def _worker(self):
+        """
+        后台写入协程，每次取出队列中已有的数据（最多 batch_size 条）批量写入
+        """
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # 还没有写入（或写入恢复文件）的数据，每写完一组就从中去掉
+            pending = list(batch)
+            try:
+                await self._store_batch(pending)
+            except asyncio.CancelledError:
+                # close 超时取消时，正在写入的这一批写到恢复文件
+                if pending:
+                    await self._spill(pending, "store queue closed before the batch was stored")
+                raise
+            except Exception as e:
+                utils.logger.error(f"[AsyncStoreQueue._worker] store batch of {len(batch)} items error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _store_batch(self, batch: List[Tuple[Any, str, Dict]]):
+        """
+        按存储实现和数据类型分组，每组调用一次批量写入接口（store_contents、store_comments、store_creators），组内保持入队顺序，
+        写入成功的组才记录到已爬取ID索引，重试后仍然失败的组写到恢复文件
+        Args:
+            batch: 队列中取出的数据，写完的组会从列表中去掉
+
+        Returns:
+
+        """
+        groups: Dict[Tuple[type, str], Tuple[Any, List[Dict]]] = {}
+        for store, store_type, item in batch:
+            key = (type(store), store_type)
+            if key not in groups:
+                groups[key] = (store, [])
+            groups[key][1].append(item)
+
+        for key, (store, items) in groups.items():
+            await self._store_group(store, key[1], items)
+            batch[:] = [entry for entry in batch if (type(entry[0]), entry[1]) != key]
+
+    async def _store_group(self, store, store_type: str, items: List[Dict]):
+        """
+        调用一次批量写入接口，失败时按指数退避重试，重试用完后写到恢复文件
+        Args:
+            store: AbstractStore 实现
+            store_type: 数据类型 content | comment | creator
+            items: 同一个存储实现、同一种类型的数据
+
+        Returns:
+
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                await getattr(store, f"store_{store_type}s")(items)
+                break
+            except Exception as e:
+                error = f"{type(store).__name__} store_{store_type}s error: {e}"
+                if attempt >= self.max_retries:
+                    utils.logger.error(f"[AsyncStoreQueue._store_group] {error}, give up after {attempt + 1} attempts")
+                    await self._spill([(store, store_type, item) for item in items], error)
+                    return
+                backoff = self.retry_backoff_sec * 2 ** attempt
+                utils.logger.warning(f"[AsyncStoreQueue._store_group] {error}, retry in {backoff}s")
+                await asyncio.sleep(backoff)
+        await _mark_seen(store_type, items)
+
+    def recovery_file_path(self) -> str:
+        """
+        恢复文件路径，每个平台每天一个文件，eg: data/store_recovery/xhs_2024-12-23.jsonl
+        """
+        return f"{self.recovery_dir}/{config.PLATFORM}_{utils.get_current_date()}.jsonl"
+
+    async def _spill(self, entries: List[Tuple[Any, str, Dict]], reason: str):
+        """
+        把没能写入存储的数据追加到恢复文件，每行记录存储实现、数据类型、数据和原因，之后可以按行重新写入
+        Args:
+            entries: (store, store_type, item) 列表
+            reason: 没有写入的原因
+
+        Returns:
+
+        """
+        recovery_file_path = self.recovery_file_path()
+        # 恢复文件要能直接逐行读取，不压缩也不滚动分段，写完立即落盘
+        writer = AsyncJsonlWriter.get_writer(recovery_file_path, compression="", rotate_max_bytes=0, rotate_max_items=0)
+        spill_ts = utils.get_current_timestamp()
+        await writer.write_many([
+            {
+                "platform": config.PLATFORM,
+                "store": f"{type(store).__module__}.{type(store).__qualname__}",
+                "store_type": store_type,
+                "item": item,
+                "reason": reason,
+                "spill_ts": spill_ts,
+            }
+            for store, store_type, item in entries
+        ])
+        await writer.flush()
+        self.spilled_count += len(entries)
+        utils.logger.error(f"[AsyncStoreQueue._spill] {len(entries)} items are written to {recovery_file_path}: {reason}")
+
+    async def close(self, timeout: Optional[float] = None):
+        """
+        等待队列中的数据全部写入存储后停止后台协程，程序退出前调用
+        Args:
+            timeout: 最长等待秒数，超时后停止写入，正在写入和队列中剩余的数据写到恢复文件，None 表示一直等到全部写入
+
+        Returns:
+
+        """
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                utils.logger.error(
+                    f"[AsyncStoreQueue.close] store queue not drained in {timeout}s, "
+                    f"{self._queue.qsize()} queued items are written to the recovery file")
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            remaining = []
+            while not self._queue.empty():
+                remaining.append(self._queue.get_nowait())
+            if remaining:
+                await self._spill(remaining, "store queue not drained before exit")
+        self._queue = None
+
+
+async def _mark_seen(store_type: str, items: List[Dict]):
+    """
+    把已经写入存储的数据ID记录到已爬取ID索引，未开启索引或该类型不需要记录时为空操作
+    """
+    seen_index = seen_index_var.get()
+    if not seen_index.enabled or store_type not in SEEN_ID_FIELDS:
+        return
+    if store_type == STORE_TYPE_COMMENT and crawl_budget_var.get().is_exhausted():
+        # 预算用完时评论翻页会提前结束，帖子的评论可能不完整，不记录，下次运行重新抓取
+        return
+    kind, id_fields = SEEN_ID_FIELDS[store_type]
+    item_ids = []
+    for item in items:
+        item_id = next((item.get(field) for field in id_fields if item.get(field)), None)
+        if item_id is not None:
+            item_ids.append(item_id)
+    # 同一个帖子的多条评论只记录一次
+    await seen_index.mark_seen(kind, list(dict.fromkeys(item_ids)))
+
+
+async def put_store_item(store, store_type: str, item: Dict):
+    """
+    store/* 入口函数统一通过这里写入数据，未开启存储队列时直接写入存储
+    Args:
+        store: AbstractStore 实现
+        store_type: 数据类型 content | comment | creator
+        item: 要保存的数据
+
+    Returns:
+
+    """
+    if not config.ENABLE_STORE_QUEUE:
+        await getattr(store, f"store_{store_type}")(item)
+        await _mark_seen(store_type, [item])
+        return
+    await AsyncStoreQueue.get_instance().put(store, store_type, item)
+
+
+async def put_store_items(store, store_type: str, items: List[Dict]):
+    """
+    批量写入数据，未开启存储队列时调用一次存储的批量写入接口
+    Args:
+        store: AbstractStore 实现
+        store_type: 数据类型 content | comment | creator
+        items: 要保存的数据列表
+
+    Returns:
+
+    """
+    if not items:
+        return
+    if not config.ENABLE_STORE_QUEUE:
+        await getattr(store, f"store_{store_type}s")(items)
+        await _mark_seen(store_type, items)
+        return
+    store_queue = AsyncStoreQueue.get_instance()
+    for item in items:
+        await store_queue.put(store, store_type, item)
+
+
+async def close_store_queue(timeout: Optional[float] = None):
+    """
+    把存储队列中的数据全部写入存储
+    Args:
+        timeout: 最长等待秒数，None 表示一直等到全部写入
+
+    Returns:
+
+    """
+    if AsyncStoreQueue._instance is not None:
+        await AsyncStoreQueue._instance.close(timeout=timeout)
@@ -0,0 +1,94 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/27 10:30
+# @Desc    : 入库数据的内容哈希，用于重新爬取时跳过没有变化的记录
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Sequence
+
+from . import utils
+
+# 不参与内容哈希计算的字段：程序生成的时间戳以及哈希本身
+HASH_EXCLUDE_FIELDS = ("add_ts", "last_modify_ts", "content_hash")
+
+
+def make_content_hash(item: Dict, volatile_fields: Sequence[str] = ()) -> str:
+    """
+    计算一条记录有意义字段的哈希（md5 hex，32位）
+    Args:
+        item: 一条记录
+        volatile_fields: 每次请求都会变化但不代表内容变化的字段，例如带签名的图片地址、xsec_token
+
+    Returns:
+        str: 内容哈希
+
+    """
+    fields = {
+        key: value for key, value in item.items()
+        if key not in HASH_EXCLUDE_FIELDS and key not in volatile_fields
+    }
+    data = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.md5(data.encode("utf-8")).hexdigest()
+
+
+class ChangeDetectionStats:
+    """
+    按数据类型统计检查过的记录数和因为内容没有变化而跳过写入的记录数，程序退出前汇总输出
+    """
+
+    def __init__(self):
+        self.checked: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def record(self, store_type: str, checked: int, skipped: int):
+        self.checked[store_type] = self.checked.get(store_type, 0) + checked
+        self.skipped[store_type] = self.skipped.get(store_type, 0) + skipped
+
+    def report(self):
+        """
+        输出跳过写入的统计
+        """
+        for store_type, checked in self.checked.items():
+            skipped = self.skipped.get(store_type, 0)
+            utils.logger.info(
+                f"[ChangeDetectionStats.report] {store_type}: skipped {skipped} unchanged writes of {checked} "
+                f"({skipped / checked:.1%})")
+
+
+change_detection_stats = ChangeDetectionStats()
+
+
+def filter_changed_items(items: List[Dict], key_field: str, existing_hashes: Dict[str, Optional[str]],
+                         store_type: str, volatile_fields: Sequence[str] = ()) -> List[Dict]:
+    """
+    给每条记录写入 content_hash，并去掉库中已存在且内容哈希相同（没有变化）的记录
+    Args:
+        items: 待入库的记录
+        key_field: 记录的ID字段
+        existing_hashes: 库中已存在记录的 ID -> 内容哈希
+        store_type: 数据类型 content | comment | creator，用于统计
+        volatile_fields: 不参与哈希计算的易变字段
+
+    Returns:
+        List[Dict]: 需要写入的记录（新增的和内容有变化的）
+
+    """
+    changed_items: List[Dict] = []
+    for item in items:
+        item["content_hash"] = make_content_hash(item, volatile_fields)
+        if existing_hashes.get(str(item.get(key_field))) == item["content_hash"]:
+            continue
+        changed_items.append(item)
+    change_detection_stats.record(store_type, len(items), len(items) - len(changed_items))
+    return changed_items
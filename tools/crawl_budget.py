@@ -0,0 +1,217 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/20 10:12
+# @Desc    : 爬虫运行预算（最长运行时长 / 最大请求数）控制
+
+import asyncio
+import re
+import time
+from typing import Optional
+
+from . import utils
+
+# 开启最长运行时长时至少预留的收尾时间（秒），保证预算先于强制取消用完，爬虫能自己停止派发新任务
+MIN_DRAIN_RESERVE_SEC = 1
+
+
+def parse_duration(duration: str) -> int:
+    """
+    解析时长字符串为秒数，支持纯数字（秒）以及 s/m/h 后缀，例如：90、30m、2h
+    Args:
+        duration: 时长字符串
+
+    Returns:
+        int: 秒数
+
+    """
+    if isinstance(duration, (int, float)):
+        return int(duration)
+    duration = str(duration).strip().lower()
+    if not duration:
+        return 0
+    match = re.fullmatch(r"(\d+)([smh]?)", duration)
+    if not match:
+        raise ValueError(f"invalid duration: {duration}, eg: 90 | 30m | 2h")
+    value, unit = int(match.group(1)), match.group(2)
+    return value * {"": 1, "s": 1, "m": 60, "h": 3600}[unit]
+
+
+class CrawlBudget:
+    """
+    单次运行的时间和请求预算。
+    调度层在开始新的关键词、新的分页、新的评论任务之前询问预算是否还允许，
+    已经在执行的任务不会被打断，由 main 在截止时间统一收尾并刷新存储。
+    """
+
+    def __init__(self, max_duration_sec: int = 0, max_requests: int = 0, drain_reserve_sec: int = 0):
+        """
+        Args:
+            max_duration_sec: 最长运行时长（秒），0 表示不限制
+            max_requests: 最大请求数，0 表示不限制
+            drain_reserve_sec: 截止时间前预留给在途任务收尾的时间（秒）
+        """
+        self.max_duration_sec = max_duration_sec
+        self.max_requests = max_requests
+        self.drain_reserve_sec = min(max(drain_reserve_sec, MIN_DRAIN_RESERVE_SEC), max_duration_sec // 2) \
+            if max_duration_sec else 0
+        self.request_count = 0
+        self._start_time = time.monotonic()
+        self._slice_deadline: Optional[float] = None
+        self._slice_request_limit: Optional[int] = None
+        self._exhausted_logged = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_duration_sec > 0 or self.max_requests > 0
+
+    def start(self):
+        """
+        重新开始计时，在爬虫开始工作时调用
+        """
+        self._start_time = time.monotonic()
+        self.request_count = 0
+        self._slice_deadline = None
+        self._slice_request_limit = None
+        self._exhausted_logged = False
+
+    def record_request(self, count: int = 1):
+        """
+        记录已发出的请求数
+        Args:
+            count: 请求数
+
+        Returns:
+
+        """
+        self.request_count += count
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start_time
+
+    def remaining_seconds(self) -> Optional[float]:
+        """
+        距离停止派发新任务的剩余秒数（已扣除收尾预留时间），None 表示不限制
+        """
+        if not self.max_duration_sec:
+            return None
+        return self.max_duration_sec - self.drain_reserve_sec - self.elapsed()
+
+    def remaining_requests(self) -> Optional[int]:
+        """
+        剩余可用请求数，None 表示不限制
+        """
+        if not self.max_requests:
+            return None
+        return self.max_requests - self.request_count
+
+    def is_exhausted(self) -> bool:
+        """
+        整体预算是否已经用完，用完之后不再开始任何新的工作
+        """
+        remaining_seconds = self.remaining_seconds()
+        remaining_requests = self.remaining_requests()
+        exhausted = (remaining_seconds is not None and remaining_seconds <= 0) or (
+            remaining_requests is not None and remaining_requests <= 0
+        )
+        if exhausted and not self._exhausted_logged:
+            self._exhausted_logged = True
+            utils.logger.info(
+                f"[CrawlBudget.is_exhausted] crawl budget exhausted, elapsed: {self.elapsed():.1f}s, "
+                f"requests: {self.request_count}, stop scheduling new work and drain in-flight tasks ..."
+            )
+        return exhausted
+
+    def begin_slice(self, slices_left: int):
+        """
+        把剩余预算平均分给剩下的工作单元（关键词 / 创作者 / 贴吧等），当前单元用不完的预算会自动留给后面的单元
+        Args:
+            slices_left: 包括当前单元在内还剩多少个工作单元
+
+        Returns:
+
+        """
+        slices_left = max(slices_left, 1)
+        remaining_seconds = self.remaining_seconds()
+        remaining_requests = self.remaining_requests()
+        self._slice_deadline = None
+        self._slice_request_limit = None
+        if remaining_seconds is not None:
+            self._slice_deadline = time.monotonic() + max(remaining_seconds, 0) / slices_left
+        if remaining_requests is not None:
+            self._slice_request_limit = self.request_count + max(remaining_requests, 0) // slices_left
+
+    def is_slice_exhausted(self) -> bool:
+        """
+        当前工作单元的预算是否已经用完，用完之后应该切换到下一个单元
+        """
+        if self.is_exhausted():
+            return True
+        if self._slice_deadline is not None and time.monotonic() >= self._slice_deadline:
+            return True
+        if self._slice_request_limit is not None and self.request_count >= self._slice_request_limit:
+            return True
+        return False
+
+    def hard_timeout(self) -> Optional[float]:
+        """
+        main 中等待爬虫结束的最长时间，None 表示不限制
+        """
+        if not self.max_duration_sec:
+            return None
+        return max(self.max_duration_sec - self.elapsed(), 0)
+
+    def drain_timeout(self, grace_sec: float = 0) -> Optional[float]:
+        """
+        main 退出前等待存储队列、下载池收尾的最长时间：剩余的运行时长，至少 grace_sec，None 表示不限制
+        Args:
+            grace_sec: 截止时间已过时仍然留给收尾的时间（秒）
+
+        Returns:
+
+        """
+        if not self.max_duration_sec:
+            return None
+        return max(self.max_duration_sec - self.elapsed(), grace_sec)
+
+
+async def run_crawler_within_budget(crawler, crawl_budget: CrawlBudget) -> bool:
+    """
+    运行爬虫直到结束或者达到最长运行时长。
+    预算在截止时间前 drain_reserve_sec 秒用完，爬虫不再派发新任务并自己结束；截止时间到了在途任务还没结束时，
+    先调用爬虫的 close 关闭浏览器上下文，再取消爬虫任务，不会在取消过程中遗留浏览器进程
+    Args:
+        crawler: AbstractCrawler 实现
+        crawl_budget: 运行预算
+
+    Returns:
+        bool: 爬虫是否在截止时间前结束
+
+    """
+    crawler_task = asyncio.ensure_future(crawler.start())
+    try:
+        await asyncio.wait_for(asyncio.shield(crawler_task), timeout=crawl_budget.hard_timeout())
+        return True
+    except asyncio.TimeoutError:
+        utils.logger.info(
+            f"[run_crawler_within_budget] reached max duration {crawl_budget.max_duration_sec}s, "
+            f"close the crawler and cancel in-flight tasks"
+        )
+        return False
+    finally:
+        if not crawler_task.done():
+            try:
+                await crawler.close()
+            except Exception as e:
+                utils.logger.warning(f"[run_crawler_within_budget] close crawler error: {e}")
+            crawler_task.cancel()
+            await asyncio.gather(crawler_task, return_exceptions=True)
@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/27 15:10
+# @Desc    : 互动数据（点赞、收藏、评论、分享、播放）时间序列快照，只追加窄行，不改写帖子宽表
+
+import re
+from typing import Any, Dict, List, Optional
+
+from . import utils
+
+# 快照表名以及快照表中的计数字段
+SNAPSHOT_TABLE_NAME = "content_engagement_snapshot"
+SNAPSHOT_COUNTER_FIELDS = ("liked_count", "collected_count", "comment_count", "share_count", "view_count")
+
+_COUNT_UNITS = {
+    "万": 10000,
+    "w": 10000,
+    "亿": 100000000,
+    "k": 1000,
+}
+
+
+def parse_count(value: Any) -> Optional[int]:
+    """
+    把平台返回的计数转换成整数，支持 1234、"1,234"、"1.2万"、"10w+" 这样的格式
+    Args:
+        value: 计数
+
+    Returns:
+        Optional[int]: 无法解析时返回 None
+
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().lower().replace(",", "").rstrip("+")
+    if not text:
+        return None
+    multiplier = 1
+    if text[-1] in _COUNT_UNITS:
+        multiplier = _COUNT_UNITS[text[-1]]
+        text = text[:-1]
+    if not re.fullmatch(r"\d+(\.\d+)?", text):
+        return None
+    return int(float(text) * multiplier)
+
+
+def make_snapshot_items(platform: str, items: List[Dict], key_field: str,
+                        counter_fields: Dict[str, str]) -> List[Dict]:
+    """
+    从帖子记录中取出互动计数，生成快照表的记录
+    Args:
+        platform: 平台名称
+        items: 帖子记录
+        key_field: 帖子ID字段
+        counter_fields: 快照表计数字段 -> 帖子记录中的字段
+
+    Returns:
+        List[Dict]: 快照记录
+
+    """
+    snapshot_ts = utils.get_current_timestamp()
+    snapshot_items: List[Dict] = []
+    for item in items:
+        snapshot_item = {
+            "platform": platform,
+            "content_id": str(item.get(key_field)),
+            "snapshot_ts": snapshot_ts,
+        }
+        for snapshot_field in SNAPSHOT_COUNTER_FIELDS:
+            content_field = counter_fields.get(snapshot_field)
+            snapshot_item[snapshot_field] = parse_count(item.get(content_field)) if content_field else None
+        snapshot_items.append(snapshot_item)
+    return snapshot_items
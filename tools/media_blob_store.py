@@ -0,0 +1,219 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/29 10:30
+# @Desc    : 按内容哈希寻址的媒体文件库：相同内容只保存一份，原来的保存路径通过硬链接指向同一份文件，
+#            下载前按媒体ID（图片ID、pid 等）查询，已经下载过的媒体直接链接，不再重复下载
+
+import asyncio
+import functools
+import hashlib
+import os
+import pathlib
+import shutil
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlparse
+
+import config
+
+from . import utils
+
+
+def make_url_media_key(platform: str, url: str) -> str:
+    """
+    用地址的最后一段作为媒体ID，去掉查询参数和图片处理参数（!xxx），同一个图片换了签名或者 CDN 域名也能识别出来
+    eg: http://sns-webpic-qc.xhscdn.com/202403211626/c4fc.../110/0/01e50c1c135e8c01_0.jpg!nd_dft_wlteh_webp_3
+        -> xhs:01e50c1c135e8c01_0.jpg
+    Args:
+        platform: 平台
+        url: 图片、视频地址
+
+    Returns:
+        str: 媒体ID
+
+    """
+    return f"{platform}:{urlparse(url).path.rsplit('/', 1)[-1].split('!', 1)[0]}"
+
+
+class MediaBlobStore:
+    """
+    媒体文件按 sha256 保存在 {root_dir}/blobs/{哈希前两位}/{哈希}{扩展名}，
+    索引库 {root_dir}/index.db 记录媒体ID -> 文件哈希，以及每个保存路径（笔记ID/pid 对应的文件）-> 文件哈希。
+    所有文件操作和索引读写都在一个后台线程里串行执行，不阻塞事件循环
+    """
+    _instance: Optional["MediaBlobStore"] = None
+
+    def __init__(self, root_dir: str = ""):
+        """
+        Args:
+            root_dir: 媒体文件库目录，默认使用配置 MEDIA_BLOB_DIR
+        """
+        self.root_dir = root_dir or config.MEDIA_BLOB_DIR
+        self.dedup_count = 0
+        self.dedup_bytes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media_blob")
+
+    @classmethod
+    def get_instance(cls) -> "MediaBlobStore":
+        """
+        获取全局的媒体文件库
+        Returns:
+
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            pathlib.Path(self.root_dir).mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.root_dir, "index.db"), isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS media_keys ("
+                "media_key TEXT PRIMARY KEY, blob_path TEXT NOT NULL, size INTEGER NOT NULL, add_ts INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS media_files ("
+                "file_path TEXT PRIMARY KEY, blob_path TEXT NOT NULL, media_key TEXT, add_ts INTEGER NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def make_blob_path(self, blob_hash: str, extension: str) -> str:
+        return os.path.join(self.root_dir, "blobs", blob_hash[:2], f"{blob_hash}{extension}")
+
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(functools.partial(f.read, 1024 * 1024), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    @staticmethod
+    def _link(blob_path: str, file_path: str):
+        """
+        让 file_path 指向 blob_path，优先使用硬链接，跨文件系统等不支持硬链接时复制一份
+        """
+        if os.path.exists(file_path) and os.path.samefile(blob_path, file_path):
+            return
+        pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        temp_file_path = f"{file_path}.link"
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        try:
+            os.link(blob_path, temp_file_path)
+        except OSError:
+            shutil.copyfile(blob_path, temp_file_path)
+        os.replace(temp_file_path, file_path)
+
+    def _record_file(self, file_path: str, blob_path: str, media_key: Optional[str]):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO media_files (file_path, blob_path, media_key, add_ts) VALUES (?, ?, ?, ?)",
+            (file_path, blob_path, media_key, utils.get_current_timestamp())
+        )
+
+    def _link_existing(self, media_key: str, file_path: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT blob_path, size FROM media_keys WHERE media_key = ?", (media_key,)
+        ).fetchone()
+        if row is None or not os.path.exists(row[0]):
+            return None
+        # 图片下载完成后会按真实格式改扩展名，文件库里的扩展名才是真实格式
+        root, extension = os.path.splitext(file_path)
+        blob_extension = os.path.splitext(row[0])[1]
+        if blob_extension and extension.lower() != blob_extension:
+            file_path = root + blob_extension
+        self._link(row[0], file_path)
+        self._record_file(file_path, row[0], media_key)
+        self.dedup_count += 1
+        self.dedup_bytes += row[1]
+        return file_path
+
+    def _add(self, file_path: str, media_key: Optional[str]) -> str:
+        blob_hash = self._hash_file(file_path)
+        blob_path = self.make_blob_path(blob_hash, os.path.splitext(file_path)[1].lower())
+        size = os.path.getsize(file_path)
+        if os.path.exists(blob_path):
+            # 不同ID的相同内容（转发的图片等）只保留一份
+            self.dedup_bytes += size
+        else:
+            pathlib.Path(blob_path).parent.mkdir(parents=True, exist_ok=True)
+            os.replace(file_path, blob_path)
+        self._link(blob_path, file_path)
+        if media_key:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO media_keys (media_key, blob_path, size, add_ts) VALUES (?, ?, ?, ?)",
+                (media_key, blob_path, size, utils.get_current_timestamp())
+            )
+        self._record_file(file_path, blob_path, media_key)
+        return blob_path
+
+    async def link_existing(self, media_key: str, file_path: str) -> Optional[str]:
+        """
+        媒体ID已经下载过时直接把 file_path 链接到已有文件，扩展名和已有文件不一致时使用已有文件的扩展名
+        Args:
+            media_key: 媒体ID
+            file_path: 保存路径
+
+        Returns:
+            Optional[str]: 实际链接的保存路径，没有下载过时为 None
+
+        """
+        return await self._run(self._link_existing, media_key, file_path)
+
+    async def add(self, file_path: str, media_key: Optional[str] = None) -> str:
+        """
+        把刚下载完成的文件放入文件库：按内容哈希移动到 blobs 目录（相同内容已存在时删除这份），再把 file_path 链接回去
+        Args:
+            file_path: 下载完成的文件
+            media_key: 媒体ID
+
+        Returns:
+            str: 文件库中的路径
+
+        """
+        return await self._run(self._add, file_path, media_key)
+
+    def report(self):
+        if self.dedup_count or self.dedup_bytes:
+            utils.logger.info(
+                f"[MediaBlobStore.report] skipped downloads: {self.dedup_count}, "
+                f"deduplicated size: {self.dedup_bytes / 1024 / 1024:.1f}MB")
+
+    async def close(self):
+        """
+        关闭索引库，程序退出前调用
+        """
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+        self.report()
+
+
+async def close_media_blob_store():
+    """
+    关闭媒体文件库
+    """
+    if MediaBlobStore._instance is not None:
+        await MediaBlobStore._instance.close()
+        MediaBlobStore._instance = None
@@ -0,0 +1,787 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/28 15:40
+# @Desc    : 图片、视频流式下载：响应分块写入同目录下的临时文件，下载完成后原子重命名，单个下载的内存占用只有一个块，
+#             中断的下载用 Range 请求断点续传；
+#             以及独立的媒体下载池：爬虫只提交下载任务，后台协程按 CDN 域名限制并发、按总带宽限速下载；
+#             只写清单模式下爬虫只把下载任务写入媒体清单，由 download_media.py 在其他机器上下载
+
+import asyncio
+import json
+import os
+import pathlib
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiofiles
+import httpx
+
+import config
+
+from . import utils
+from .async_file_writer import AsyncJsonlWriter
+from .media_blob_store import MediaBlobStore
+
+# 下载中的临时文件后缀，下载完成后重命名成正式文件名，下载中断时保留用于断点续传
+TEMP_FILE_SUFFIX = ".part"
+
+
+# 媒体清单中不保存的请求头，登录态只留在爬虫机器上
+MANIFEST_EXCLUDED_HEADERS = ("cookie",)
+
+# 按保存路径的扩展名区分媒体类型
+VIDEO_FILE_EXTENSIONS = (".mp4", ".flv", ".mov", ".m4s")
+IMAGE_FILE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".heic")
+
+# 图片文件头和对应的扩展名，webp、avif/heic 的文件头不是固定前缀，在 sniff_image_extension 中单独判断
+IMAGE_FILE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF8", "gif"),
+)
+
+
+def make_temp_file_path(file_path: str) -> str:
+    return file_path + TEMP_FILE_SUFFIX
+
+
+def make_sidecar_file_path(file_path: str) -> str:
+    """
+    断点续传的记录文件，记录下载地址、文件总大小和 ETag / Last-Modified
+    """
+    return file_path + TEMP_FILE_SUFFIX + ".json"
+
+
+class BandwidthLimiter:
+    """
+    令牌桶限速，所有下载共享同一个限速器，每写入一块数据消耗对应字节数的令牌，令牌不够时等待
+    """
+
+    def __init__(self, max_bytes_per_sec: int = 0):
+        """
+        Args:
+            max_bytes_per_sec: 每秒最多下载的字节数，0 表示不限速
+        """
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self._allowance = float(max_bytes_per_sec)
+        self._last_time = time.monotonic()
+
+    async def consume(self, size: int):
+        """
+        消耗 size 字节的令牌，令牌可以透支，透支的部分按速率折算成等待时间
+        Args:
+            size: 字节数
+
+        Returns:
+
+        """
+        if self.max_bytes_per_sec <= 0:
+            return
+        now = time.monotonic()
+        self._allowance = min(float(self.max_bytes_per_sec),
+                              self._allowance + (now - self._last_time) * self.max_bytes_per_sec)
+        self._last_time = now
+        self._allowance -= size
+        if self._allowance < 0:
+            await asyncio.sleep(-self._allowance / self.max_bytes_per_sec)
+
+
+def _load_sidecar(sidecar_file_path: str) -> Dict:
+    try:
+        with open(sidecar_file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_sidecar(sidecar_file_path: str, sidecar: Dict):
+    with open(sidecar_file_path, "w", encoding="utf-8") as f:
+        json.dump(sidecar, f)
+
+
+def _remove_partial_file(file_path: str):
+    for path in (make_temp_file_path(file_path), make_sidecar_file_path(file_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _parse_content_range(content_range: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    解析 Content-Range 响应头，eg: bytes 100-199/1000 -> (100, 1000)，总大小未知时为 None
+    """
+    match = re.fullmatch(r"bytes (\d+)-\d+/(\d+|\*)", (content_range or "").strip())
+    if not match:
+        return None, None
+    total = match.group(2)
+    return int(match.group(1)), int(total) if total != "*" else None
+
+
+async def _download_once(client: httpx.AsyncClient, url: str, file_path: str, headers: Optional[Dict],
+                         timeout: Optional[float], chunk_size: int,
+                         bandwidth_limiter: Optional[BandwidthLimiter],
+                         byte_range: Optional[Tuple[int, int]]) -> Optional[bool]:
+    """
+    下载一次，已有临时文件和记录文件时用 Range 请求从断点继续下载，指定 byte_range 时只下载文件的这一段
+    Returns:
+        Optional[bool]: True 下载完成，False 无法下载（不再重试），None 下载中断，可以从断点重试
+
+    """
+    temp_file_path = make_temp_file_path(file_path)
+    sidecar_file_path = make_sidecar_file_path(file_path)
+    sidecar = _load_sidecar(sidecar_file_path)
+    offset = os.path.getsize(temp_file_path) if sidecar and os.path.exists(temp_file_path) else 0
+
+    range_start, range_end = byte_range or (0, None)
+
+    # 下载的字节数要和 Content-Length 对得上，不接受压缩传输
+    request_headers = {"Accept-Encoding": "identity", **(headers or {})}
+    if offset or byte_range:
+        request_headers["Range"] = f"bytes={range_start + offset}-{'' if range_end is None else range_end}"
+    if offset:
+        # 文件在服务端变化时 If-Range 不成立，服务端会返回完整的 200 响应
+        validator = sidecar.get("etag") or sidecar.get("last_modified")
+        if validator:
+            request_headers["If-Range"] = validator
+
+    try:
+        async with client.stream("GET", url, headers=request_headers, timeout=timeout) as response:
+            if response.status_code == 416 and offset and offset == sidecar.get("expected_size"):
+                # 上次已经下载完整，只差重命名
+                mode = None
+            elif response.status_code == 206 and (offset or byte_range):
+                content_start, total_size = _parse_content_range(response.headers.get("Content-Range"))
+                if content_start != range_start + offset:
+                    utils.logger.warning(
+                        f"[download_to_file] unexpected Content-Range of {url}: "
+                        f"{response.headers.get('Content-Range')}, download again")
+                    _remove_partial_file(file_path)
+                    return None
+                if offset:
+                    mode = "ab"
+                    if byte_range is None:
+                        sidecar["expected_size"] = total_size or sidecar.get("expected_size")
+                    utils.logger.info(f"[download_to_file] resume {file_path} from {offset} bytes")
+                else:
+                    mode = "wb"
+                    sidecar = {
+                        "url": url,
+                        "expected_size": range_end - range_start + 1,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+            elif response.status_code == 200 and byte_range is None:
+                mode = "wb"
+                content_length = response.headers.get("Content-Length")
+                sidecar = {
+                    "url": url,
+                    "expected_size": int(content_length) if content_length else None,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+            elif response.status_code == 416:
+                utils.logger.warning(f"[download_to_file] range of {file_path} not satisfiable, download again")
+                _remove_partial_file(file_path)
+                return None
+            else:
+                utils.logger.error(f"[download_to_file] request {url} err, status code: {response.status_code}")
+                _remove_partial_file(file_path)
+                return False
+
+            if mode is not None:
+                _save_sidecar(sidecar_file_path, sidecar)
+                async with aiofiles.open(temp_file_path, mode) as f:
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        await f.write(chunk)
+                        if bandwidth_limiter is not None:
+                            await bandwidth_limiter.consume(len(chunk))
+    except (httpx.HTTPError, OSError) as e:
+        utils.logger.warning(f"[download_to_file] download {url} to {file_path} interrupted: {e}")
+        return None
+
+    downloaded_size = os.path.getsize(temp_file_path)
+    expected_size = sidecar.get("expected_size")
+    if expected_size is not None and downloaded_size != expected_size:
+        utils.logger.warning(
+            f"[download_to_file] size of {file_path} is {downloaded_size}, expected {expected_size}")
+        if downloaded_size > expected_size:
+            _remove_partial_file(file_path)
+        return None
+    os.replace(temp_file_path, file_path)
+    os.remove(sidecar_file_path)
+    return True
+
+
+async def download_to_file(client: httpx.AsyncClient, url: str, file_path: str,
+                           headers: Optional[Dict] = None, timeout: Optional[float] = None,
+                           chunk_size: int = 0, bandwidth_limiter: Optional[BandwidthLimiter] = None,
+                           max_retries: Optional[int] = None, byte_range: Optional[Tuple[int, int]] = None) -> bool:
+    """
+    流式下载一个文件，响应按块写入临时文件，完成并校验大小后重命名为 file_path，不会留下不完整的正式文件。
+    下载中断时保留临时文件和记录了文件大小、ETag 的记录文件，重试（包括下次运行）时用 Range 请求从断点继续下载
+    Args:
+        client: httpx 客户端
+        url: 下载地址
+        file_path: 保存路径
+        headers: 请求头
+        timeout: 超时时间
+        chunk_size: 每次写入磁盘的块大小，默认使用配置 MEDIA_DOWNLOAD_CHUNK_SIZE
+        bandwidth_limiter: 带宽限速器
+        max_retries: 下载中断后的重试次数，为 None 时使用配置 MEDIA_DOWNLOAD_MAX_RETRIES
+        byte_range: 只下载文件的一段 (起始字节, 结束字节)，包含结束字节，服务端不支持 Range 时下载失败
+
+    Returns:
+        bool: 是否下载成功
+
+    """
+    chunk_size = chunk_size or config.MEDIA_DOWNLOAD_CHUNK_SIZE
+    max_retries = config.MEDIA_DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+    pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    for attempt in range(max_retries + 1):
+        if attempt:
+            await asyncio.sleep(attempt)
+        result = await _download_once(client, url, file_path, headers, timeout, chunk_size, bandwidth_limiter,
+                                      byte_range)
+        if result is not None:
+            if result:
+                utils.logger.info(f"[download_to_file] save {file_path} success ...")
+            return result
+    utils.logger.error(
+        f"[download_to_file] download {url} to {file_path} failed after {max_retries} retries, "
+        f"partial file is kept for resuming")
+    return False
+
+
+async def download_media(url: str, file_path: str, proxies: Optional[Dict] = None,
+                         headers: Optional[Dict] = None, timeout: Optional[float] = None,
+                         bandwidth_limiter: Optional[BandwidthLimiter] = None) -> bool:
+    """
+    使用新的 httpx 客户端流式下载一个文件，参数和各平台客户端的请求参数保持一致
+    Args:
+        url: 下载地址
+        file_path: 保存路径
+        proxies: 代理
+        headers: 请求头
+        timeout: 超时时间
+        bandwidth_limiter: 带宽限速器
+
+    Returns:
+        bool: 是否下载成功
+
+    """
+    async with httpx.AsyncClient(proxies=proxies) as client:
+        return await download_to_file(client, url, file_path, headers=headers, timeout=timeout,
+                                      bandwidth_limiter=bandwidth_limiter)
+
+
+def make_byte_range_segments(url: str, size: Optional[int], segment_count: int = 0,
+                             min_segment_size: int = 0) -> List[Dict]:
+    """
+    把一个大文件按字节范围切成多段，文件大小未知或者太小时不切分
+    Args:
+        url: 下载地址
+        size: 文件大小
+        segment_count: 切分的段数，默认使用配置 MEDIA_DOWNLOAD_SEGMENT_CONCURRENCY
+        min_segment_size: 每段的最小字节数，默认使用配置 MEDIA_DOWNLOAD_MIN_SEGMENT_SIZE
+
+    Returns:
+        List[Dict]: 分段列表，每段包含 url 和 byte_range
+
+    """
+    segment_count = segment_count or config.MEDIA_DOWNLOAD_SEGMENT_CONCURRENCY
+    min_segment_size = min_segment_size or config.MEDIA_DOWNLOAD_MIN_SEGMENT_SIZE
+    if not size or size <= 0:
+        return [{"url": url}]
+    segment_count = max(1, min(segment_count, size // min_segment_size))
+    if segment_count == 1:
+        return [{"url": url}]
+    segment_size = -(-size // segment_count)
+    return [
+        {"url": url, "byte_range": (start, min(start + segment_size, size) - 1)}
+        for start in range(0, size, segment_size)
+    ]
+
+
+async def _join_files(part_file_paths: List[str], file_path: str, chunk_size: int):
+    """
+    按顺序把分段文件拼接成一个文件，拼接完成后原子重命名并删除分段文件
+    """
+    temp_file_path = make_temp_file_path(file_path)
+    async with aiofiles.open(temp_file_path, "wb") as output:
+        for part_file_path in part_file_paths:
+            async with aiofiles.open(part_file_path, "rb") as part_file:
+                while True:
+                    chunk = await part_file.read(chunk_size)
+                    if not chunk:
+                        break
+                    await output.write(chunk)
+    os.replace(temp_file_path, file_path)
+    for part_file_path in part_file_paths:
+        os.remove(part_file_path)
+
+
+async def download_segmented_media(segments: List[Dict], file_path: str, proxies: Optional[Dict] = None,
+                                   headers: Optional[Dict] = None, timeout: Optional[float] = None,
+                                   bandwidth_limiter: Optional[BandwidthLimiter] = None,
+                                   segment_concurrency: int = 0) -> bool:
+    """
+    多连接分段下载：同时下载所有分段（多个地址，或者同一个地址的不同字节范围），全部完成后按顺序拼接成一个文件。
+    每个分段都支持断点续传，已经下载完成的分段下次不会重复下载
+    Args:
+        segments: 分段列表，每段包含 url，以及可选的 byte_range (起始字节, 结束字节)
+        file_path: 保存路径
+        proxies: 代理
+        headers: 请求头
+        timeout: 超时时间
+        bandwidth_limiter: 带宽限速器
+        segment_concurrency: 同时下载的分段数，默认使用配置 MEDIA_DOWNLOAD_SEGMENT_CONCURRENCY
+
+    Returns:
+        bool: 是否下载成功
+
+    """
+    if len(segments) == 1 and not segments[0].get("byte_range"):
+        return await download_media(segments[0]["url"], file_path, proxies=proxies, headers=headers,
+                                    timeout=timeout, bandwidth_limiter=bandwidth_limiter)
+
+    semaphore = asyncio.Semaphore(segment_concurrency or config.MEDIA_DOWNLOAD_SEGMENT_CONCURRENCY)
+    part_file_paths = [f"{file_path}.seg{index:03d}" for index in range(len(segments))]
+
+    async def download_segment(client: httpx.AsyncClient, segment: Dict, part_file_path: str) -> bool:
+        if os.path.exists(part_file_path):
+            return True
+        async with semaphore:
+            return await download_to_file(client, segment["url"], part_file_path, headers=headers, timeout=timeout,
+                                          bandwidth_limiter=bandwidth_limiter,
+                                          byte_range=segment.get("byte_range"))
+
+    async with httpx.AsyncClient(proxies=proxies) as client:
+        results = await asyncio.gather(*[
+            download_segment(client, segment, part_file_path)
+            for segment, part_file_path in zip(segments, part_file_paths)
+        ])
+    if not all(results):
+        utils.logger.error(
+            f"[download_segmented_media] {results.count(False)} of {len(segments)} segments of {file_path} failed")
+        return False
+    await _join_files(part_file_paths, file_path, config.MEDIA_DOWNLOAD_CHUNK_SIZE)
+    utils.logger.info(f"[download_segmented_media] save {file_path} from {len(segments)} segments success ...")
+    return True
+
+
+def sniff_image_extension(file_path: str) -> Optional[str]:
+    """
+    按文件头识别图片的真实格式，CDN 返回的 Content-Type 不一定可靠（eg: application/octet-stream）
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        Optional[str]: jpg、png、gif、webp、avif、heic，不是图片时为 None
+
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(16)
+    for signature, extension in IMAGE_FILE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand in (b"avif", b"avis"):
+            return "avif"
+        if brand in (b"heic", b"heix", b"mif1"):
+            return "heic"
+    return None
+
+
+def correct_image_extension(file_path: str) -> str:
+    """
+    下载完成的图片扩展名和真实格式不一致时（eg: 请求 avif 但返回了 jpg），重命名为正确的扩展名
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 重命名后的文件路径，不需要重命名时就是 file_path
+
+    """
+    root, extension = os.path.splitext(file_path)
+    if extension.lower() not in IMAGE_FILE_EXTENSIONS:
+        return file_path
+    real_extension = sniff_image_extension(file_path)
+    if real_extension is None or real_extension == extension.lower().lstrip(".").replace("jpeg", "jpg"):
+        return file_path
+    new_file_path = f"{root}.{real_extension}"
+    os.replace(file_path, new_file_path)
+    utils.logger.info(f"[correct_image_extension] {file_path} is a {real_extension} image, rename to {new_file_path}")
+    return new_file_path
+
+
+def find_downloaded_file(file_path: str) -> Optional[str]:
+    """
+    查找已经下载完成的文件，图片下载完成后可能按真实格式改过扩展名（correct_image_extension），
+    同名的其他图片扩展名的文件也算已经下载
+    Args:
+        file_path: 下载任务的保存路径
+
+    Returns:
+        Optional[str]: 已经存在的文件路径，没有下载过时为 None
+
+    """
+    if os.path.exists(file_path):
+        return file_path
+    root, extension = os.path.splitext(file_path)
+    if extension.lower() not in IMAGE_FILE_EXTENSIONS:
+        return None
+    for image_extension in IMAGE_FILE_EXTENSIONS:
+        if os.path.exists(root + image_extension):
+            return root + image_extension
+    return None
+
+
+async def link_downloaded_media(task: Dict) -> bool:
+    """
+    开启媒体文件库时，按媒体ID查找已经下载过的文件，找到时直接链接到保存路径（同时把 task 中的 file_path
+    更新为实际链接的路径），不再下载
+    Args:
+        task: 下载任务
+
+    Returns:
+        bool: 是否已经下载过
+
+    """
+    if not config.ENABLE_MEDIA_BLOB_STORE or not task.get("media_key"):
+        return False
+    linked_file_path = await MediaBlobStore.get_instance().link_existing(task["media_key"], task["file_path"])
+    if linked_file_path:
+        task["file_path"] = linked_file_path
+        utils.logger.info(f"[link_downloaded_media] {task['media_key']} was downloaded before, link to {task['file_path']}")
+        return True
+    return False
+
+
+async def run_download_task(task: Dict, bandwidth_limiter: Optional[BandwidthLimiter] = None) -> bool:
+    """
+    执行一个下载任务（单个地址或者分段下载），图片的扩展名按真实格式改正（同时更新 task 中的 file_path），
+    开启媒体文件库时下载完成的文件放入文件库
+    Args:
+        task: 下载任务，包含 url 或 segments、file_path、proxies、headers、timeout，以及可选的 media_key
+        bandwidth_limiter: 带宽限速器
+
+    Returns:
+        bool: 是否下载成功
+
+    """
+    download_kwargs = {key: value for key, value in task.items() if key not in ("media_key", "content_id")}
+    if "segments" in download_kwargs:
+        success = await download_segmented_media(bandwidth_limiter=bandwidth_limiter, **download_kwargs)
+    else:
+        success = await download_media(bandwidth_limiter=bandwidth_limiter, **download_kwargs)
+    if success:
+        task["file_path"] = correct_image_extension(task["file_path"])
+    if success and config.ENABLE_MEDIA_BLOB_STORE:
+        await MediaBlobStore.get_instance().add(task["file_path"], task.get("media_key"))
+    return success
+
+
+class MediaDownloadPool:
+    """
+    独立的媒体下载池，和爬虫流程解耦：爬虫协程提交下载任务后立即返回，只有队列满的时候才会等待（背压）。
+    后台协程从队列取任务下载，同一个 CDN 域名同时下载的数量有上限，所有下载共享总带宽上限。
+    """
+    _instance: Optional["MediaDownloadPool"] = None
+
+    def __init__(self, max_size: int = 0, workers: int = 0, per_host_concurrency: int = 0,
+                 max_bytes_per_sec: Optional[int] = None):
+        """
+        Args:
+            max_size: 队列最大长度
+            workers: 后台下载协程数量
+            per_host_concurrency: 同一个域名同时下载的最大数量
+            max_bytes_per_sec: 所有下载每秒最多下载的字节数，0 表示不限速，为 None 时使用配置
+        """
+        self.max_size = max_size or config.MEDIA_DOWNLOAD_QUEUE_MAX_SIZE
+        self.workers = workers or config.MEDIA_DOWNLOAD_WORKERS
+        self.per_host_concurrency = per_host_concurrency or config.MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY
+        self.bandwidth_limiter = BandwidthLimiter(
+            config.MEDIA_DOWNLOAD_MAX_BYTES_PER_SEC if max_bytes_per_sec is None else max_bytes_per_sec)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # 正在下载的任务，收尾超时被取消时写入媒体清单
+        self._active_tasks: Dict[int, Dict] = {}
+        self._start_time = 0.0
+        self.success_count = 0
+        self.failed_count = 0
+        self.linked_count = 0
+        self.cancelled_count = 0
+        self.downloaded_bytes = 0
+
+    @classmethod
+    def get_instance(cls) -> "MediaDownloadPool":
+        """
+        获取全局的媒体下载池
+        Returns:
+
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._start_time = time.monotonic()
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_semaphores[host]
+
+    async def submit(self, task: Dict):
+        """
+        提交下载任务，队列满时等待后台协程消费
+        Args:
+            task: 下载任务，包含 download_media 的参数 url、file_path、proxies、headers、timeout，
+                  分段下载任务用 segments 代替 url，以及可选的媒体ID media_key
+
+        Returns:
+
+        """
+        self._ensure_started()
+        await self._queue.put(task)
+
+    async def _worker(self):
+        while True:
+            task = await self._queue.get()
+            self._active_tasks[id(task)] = task
+            try:
+                await self._download(task)
+            except Exception as e:
+                self.failed_count += 1
+                utils.logger.error(f"[MediaDownloadPool._worker] download {task.get('file_path')} error: {e}")
+            finally:
+                self._active_tasks.pop(id(task), None)
+                self._queue.task_done()
+
+    async def _download(self, task: Dict):
+        if await link_downloaded_media(task):
+            self.linked_count += 1
+            return
+        # 分段下载按第一段的域名计入并发，分段之间的并发由 MEDIA_DOWNLOAD_SEGMENT_CONCURRENCY 控制
+        url = task["segments"][0]["url"] if "segments" in task else task["url"]
+        async with self._host_semaphore(url):
+            success = await run_download_task(task, self.bandwidth_limiter)
+        if success:
+            self.success_count += 1
+            self.downloaded_bytes += os.path.getsize(task["file_path"])
+        else:
+            self.failed_count += 1
+
+    def report(self):
+        """
+        输出本次运行的下载数量和平均下载速度
+        """
+        if not self.success_count and not self.failed_count and not self.linked_count and not self.cancelled_count:
+            return
+        cost = max(time.monotonic() - self._start_time, 0.001)
+        utils.logger.info(
+            f"[MediaDownloadPool.report] downloaded: {self.success_count}, failed: {self.failed_count}, "
+            f"already downloaded: {self.linked_count}, cancelled: {self.cancelled_count}, "
+            f"size: {self.downloaded_bytes / 1024 / 1024:.1f}MB, cost: {cost:.1f}s, "
+            f"throughput: {self.downloaded_bytes / 1024 / 1024 / cost:.2f}MB/s")
+
+    async def close(self, timeout: Optional[float] = None):
+        """
+        等待队列中的下载任务全部完成后停止后台协程，程序退出前调用。
+        超过 timeout 还没有完成时取消剩余的下载，已经下载的部分保留在 .part 临时文件中，
+        没完成的任务写入媒体清单，之后用 download_media.py 从断点继续下载
+        Args:
+            timeout: 最长等待秒数，None 表示一直等到全部下载完成
+
+        Returns:
+
+        """
+        unfinished_tasks: List[Dict] = []
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                unfinished_tasks = list(self._active_tasks.values())
+                while not self._queue.empty():
+                    unfinished_tasks.append(self._queue.get_nowait())
+                    self._queue.task_done()
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        if unfinished_tasks:
+            self.cancelled_count += len(unfinished_tasks)
+            utils.logger.warning(
+                f"[MediaDownloadPool.close] downloads not finished in {timeout}s, cancel {len(unfinished_tasks)} tasks, "
+                f"partial files are kept and the tasks are written to {make_manifest_file_path(config.PLATFORM)}")
+            for task in unfinished_tasks:
+                await write_media_manifest(task)
+        self.report()
+
+
+def make_manifest_file_path(platform: str) -> str:
+    """
+    媒体清单文件路径，每个平台每天一个文件，eg: data/media_manifest/xhs_2024-12-28.jsonl
+    """
+    return f"{config.MEDIA_MANIFEST_DIR}/{platform}_{utils.get_current_date()}.jsonl"
+
+
+def make_manifest_item(task: Dict, platform: str) -> Dict:
+    """
+    把下载任务转换成媒体清单中的一行：下载地址（或分段）、帖子ID、媒体类型、保存路径、媒体ID和去掉登录态的请求头，
+    代理和超时由下载的机器决定，不写入清单
+    Args:
+        task: 下载任务
+        platform: 平台
+
+    Returns:
+        Dict: 清单中的一行
+
+    """
+    item = {"platform": platform, "content_id": task.get("content_id")}
+    if "segments" in task:
+        item["segments"] = task["segments"]
+    else:
+        item["url"] = task["url"]
+    file_path = task["file_path"]
+    item["kind"] = "video" if os.path.splitext(file_path)[1].lower() in VIDEO_FILE_EXTENSIONS else "image"
+    item["file_path"] = file_path
+    item["media_key"] = task.get("media_key")
+    item["headers"] = {
+        key: value for key, value in (task.get("headers") or {}).items()
+        if key.lower() not in MANIFEST_EXCLUDED_HEADERS
+    }
+    return item
+
+
+def make_task_from_manifest_item(item: Dict, proxies: Optional[Dict] = None,
+                                 timeout: Optional[float] = None) -> Dict:
+    """
+    把媒体清单中的一行还原成下载任务
+    Args:
+        item: 清单中的一行
+        proxies: 下载使用的代理
+        timeout: 超时时间
+
+    Returns:
+        Dict: 下载任务
+
+    """
+    task = {"file_path": item["file_path"], "proxies": proxies, "headers": item.get("headers") or None,
+            "timeout": timeout, "media_key": item.get("media_key")}
+    if item.get("segments"):
+        # JSON 里的字节范围是列表，还原成元组
+        task["segments"] = [
+            {**segment, "byte_range": tuple(segment["byte_range"])} if segment.get("byte_range") else segment
+            for segment in item["segments"]
+        ]
+    else:
+        task["url"] = item["url"]
+    return task
+
+
+async def write_media_manifest(task: Dict):
+    """
+    只写清单模式下把下载任务追加到当天的媒体清单，不下载
+    Args:
+        task: 下载任务
+
+    Returns:
+
+    """
+    # 清单要能在其他机器上直接逐行读取，不压缩也不滚动分段
+    writer = AsyncJsonlWriter.get_writer(make_manifest_file_path(config.PLATFORM), compression="",
+                                         rotate_max_bytes=0, rotate_max_items=0)
+    await writer.write(make_manifest_item(task, config.PLATFORM))
+
+
+async def _submit_task(task: Dict):
+    if config.MEDIA_DOWNLOAD_MANIFEST_ONLY:
+        await write_media_manifest(task)
+        return
+    if not config.ENABLE_MEDIA_DOWNLOAD_POOL:
+        if not await link_downloaded_media(task):
+            await run_download_task(task)
+        return
+    await MediaDownloadPool.get_instance().submit(task)
+
+
+async def submit_media_download(url: str, file_path: str, proxies: Optional[Dict] = None,
+                                headers: Optional[Dict] = None, timeout: Optional[float] = None,
+                                media_key: Optional[str] = None, content_id: Optional[str] = None):
+    """
+    各平台客户端统一通过这里下载图片、视频，开启下载池时只提交任务，未开启时直接下载，只写清单模式下写入媒体清单
+    Args:
+        url: 下载地址
+        file_path: 保存路径
+        proxies: 代理
+        headers: 请求头
+        timeout: 超时时间
+        media_key: 媒体ID，开启媒体文件库时用于跳过已经下载过的媒体
+        content_id: 媒体所属的帖子ID，写入媒体清单
+
+    Returns:
+
+    """
+    await _submit_task({
+        "url": url, "file_path": file_path, "proxies": proxies, "headers": headers, "timeout": timeout,
+        "media_key": media_key, "content_id": content_id,
+    })
+
+
+async def submit_segmented_media_download(segments: List[Dict], file_path: str, proxies: Optional[Dict] = None,
+                                          headers: Optional[Dict] = None, timeout: Optional[float] = None,
+                                          media_key: Optional[str] = None, content_id: Optional[str] = None):
+    """
+    提交多连接分段下载任务，未开启下载池时直接下载
+    Args:
+        segments: 分段列表，每段包含 url，以及可选的 byte_range
+        file_path: 保存路径
+        proxies: 代理
+        headers: 请求头
+        timeout: 超时时间
+        media_key: 媒体ID，开启媒体文件库时用于跳过已经下载过的媒体
+        content_id: 媒体所属的帖子ID，写入媒体清单
+
+    Returns:
+
+    """
+    await _submit_task({
+        "segments": segments, "file_path": file_path, "proxies": proxies, "headers": headers, "timeout": timeout,
+        "media_key": media_key, "content_id": content_id,
+    })
+
+
+async def close_media_download_pool(timeout: Optional[float] = None):
+    """
+    等待下载池中的任务全部完成，超过 timeout 时取消剩余的下载
+    Args:
+        timeout: 最长等待秒数，None 表示一直等到全部下载完成
+
+    Returns:
+
+    """
+    if MediaDownloadPool._instance is not None:
+        await MediaDownloadPool._instance.close(timeout=timeout)
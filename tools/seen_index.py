@@ -0,0 +1,220 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Time    : 2024/12/26 11:20
+# @Desc    : 跨运行的已爬取ID索引：内存布隆过滤器 + 磁盘上的精确集合（SQLite），用于跳过新鲜期内已经爬过的内容
+
+import asyncio
+import functools
+import hashlib
+import math
+import os
+import pathlib
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from . import utils
+
+# 索引中记录的ID类型
+SEEN_KIND_CONTENT = "content"
+# 已经抓取过评论的帖子ID，评论阶段按帖子粒度跳过
+SEEN_KIND_CONTENT_COMMENTS = "content_comments"
+# 已经保存过的创作者ID，创作者阶段跳过创作者主页信息的请求
+SEEN_KIND_CREATOR = "creator"
+
+
+class BloomFilter:
+    """
+    简单的布隆过滤器，不在过滤器中的key一定没见过，在过滤器中的key需要再查精确集合确认
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: 预计容纳的key数量
+            error_rate: 期望的误判率
+        """
+        capacity = max(capacity, 1)
+        self.num_bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2)) + 1
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # 双重哈希：一次 blake2b 得到两个 64 位哈希，组合出 k 个位置
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenIdIndex:
+    """
+    每个平台一个索引文件（{index_dir}/{platform}.db），记录每个ID最后一次入库的时间。
+    启动时把新鲜期内的ID加载进布隆过滤器，查询时布隆过滤器未命中直接返回，命中后再查磁盘上的精确记录。
+    磁盘读写都串行提交到一个单独的线程，不阻塞事件循环。
+    未开启时所有查询都返回未见过，写入为空操作。
+    """
+
+    def __init__(self, platform: str = "", index_dir: str = "", freshness_sec: int = 0,
+                 bloom_capacity: int = 1000000, bloom_error_rate: float = 0.001):
+        """
+        Args:
+            platform: 平台名称，决定索引文件名
+            index_dir: 索引文件目录，为空表示不开启
+            freshness_sec: 新鲜期（秒），在新鲜期内入库过的ID会被跳过，0 表示不开启
+            bloom_capacity: 布隆过滤器预计容纳的本次新增ID数量
+            bloom_error_rate: 布隆过滤器的误判率
+        """
+        self.platform = platform
+        self.index_dir = index_dir
+        self.freshness_sec = freshness_sec
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.skipped_count = 0
+        self._conn = None
+        self._bloom = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.platform and self.index_dir and self.freshness_sec > 0)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.index_dir, f"{self.platform}.db")
+
+    @staticmethod
+    def _make_key(kind: str, item_id) -> str:
+        return f"{kind}:{item_id}"
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def open(self):
+        """
+        打开索引文件，清理过期记录，并把新鲜期内的ID加载进布隆过滤器
+        """
+        if not self.enabled or self._conn is not None:
+            return
+        pathlib.Path(self.index_dir).mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.index_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_ids ("
+            "kind TEXT NOT NULL, item_id TEXT NOT NULL, seen_ts INTEGER NOT NULL, "
+            "PRIMARY KEY (kind, item_id)) WITHOUT ROWID"
+        )
+        expire_ts = int(time.time()) - self.freshness_sec
+        self._conn.execute("DELETE FROM seen_ids WHERE seen_ts < ?", (expire_ts,))
+        fresh_count = self._conn.execute("SELECT COUNT(*) FROM seen_ids").fetchone()[0]
+        self._bloom = BloomFilter(fresh_count + self.bloom_capacity, self.bloom_error_rate)
+        for kind, item_id in self._conn.execute("SELECT kind, item_id FROM seen_ids"):
+            self._bloom.add(self._make_key(kind, item_id))
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="seen_index")
+        utils.logger.info(
+            f"[SeenIdIndex.open] loaded {fresh_count} ids crawled in the last {self.freshness_sec}s from {self.index_path}")
+
+    def _query_seen_ts(self, kind: str, item_id: str) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT seen_ts FROM seen_ids WHERE kind = ? AND item_id = ?", (kind, item_id)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def _upsert_rows(self, rows: List[tuple]):
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT INTO seen_ids (kind, item_id, seen_ts) VALUES (?, ?, ?) "
+                "ON CONFLICT(kind, item_id) DO UPDATE SET seen_ts = excluded.seen_ts",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    async def is_fresh(self, kind: str, item_id) -> bool:
+        """
+        ID 是否在新鲜期内入库过
+        Args:
+            kind: ID 类型
+            item_id: ID
+
+        Returns:
+            bool
+
+        """
+        if self._conn is None or item_id is None:
+            return False
+        item_id = str(item_id)
+        if self._make_key(kind, item_id) not in self._bloom:
+            return False
+        # 布隆过滤器命中后才查磁盘，大部分新ID不会离开事件循环
+        seen_ts = await self._run(self._query_seen_ts, kind, item_id)
+        fresh = seen_ts is not None and seen_ts >= int(time.time()) - self.freshness_sec
+        if fresh:
+            self.skipped_count += 1
+        return fresh
+
+    async def filter_unseen(self, kind: str, item_ids: List) -> List:
+        """
+        过滤掉新鲜期内入库过的ID
+        Args:
+            kind: ID 类型
+            item_ids: ID 列表
+
+        Returns:
+            List: 需要爬取的ID列表，保持原有顺序
+
+        """
+        return [item_id for item_id in item_ids if not await self.is_fresh(kind, item_id)]
+
+    async def mark_seen(self, kind: str, item_ids: Iterable):
+        """
+        记录一批ID已经入库
+        Args:
+            kind: ID 类型
+            item_ids: ID 列表
+
+        Returns:
+
+        """
+        if self._conn is None:
+            return
+        now = int(time.time())
+        rows = [(kind, str(item_id), now) for item_id in item_ids if item_id is not None and item_id != ""]
+        if not rows:
+            return
+        await self._run(self._upsert_rows, rows)
+        for row in rows:
+            self._bloom.add(self._make_key(row[0], row[1]))
+
+    def close(self):
+        if self._conn is None:
+            return
+        # 等待已经提交的写入完成后再关闭连接
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._conn.close()
+        self._conn = None
+        utils.logger.info(f"[SeenIdIndex.close] skipped {self.skipped_count} items crawled within the freshness window")
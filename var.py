@@ -11,15 +11,20 @@
 
 from asyncio.tasks import Task
 from contextvars import ContextVar
-from typing import List
+from typing import List, Union
 
 import aiomysql
 
 from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
+from tools.crawl_budget import CrawlBudget
+from tools.seen_index import SeenIdIndex
 
 request_keyword_var: ContextVar[str] = ContextVar("request_keyword", default="")
 crawler_type_var: ContextVar[str] = ContextVar("crawler_type", default="")
 comment_tasks_var: ContextVar[List[Task]] = ContextVar("comment_tasks", default=[])
-media_crawler_db_var: ContextVar[AsyncMysqlDB] = ContextVar("media_crawler_db_var")
+media_crawler_db_var: ContextVar[Union[AsyncMysqlDB, AsyncSqliteDB]] = ContextVar("media_crawler_db_var")
 db_conn_pool_var: ContextVar[aiomysql.Pool] = ContextVar("db_conn_pool_var")
-source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
\ No newline at end of file
+source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
+crawl_budget_var: ContextVar[CrawlBudget] = ContextVar("crawl_budget", default=CrawlBudget())
+seen_index_var: ContextVar[SeenIdIndex] = ContextVar("seen_index", default=SeenIdIndex())